@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+
+# Lazy weight loading benchmarking tool
+#
+# This tool compares the cold start of a model loaded with `from_pretrained(..., lazy_loading=True)`, which only loads
+# the weights of each layer the first time it runs, with the one of a model loaded eagerly. It reports the time spent
+# in `from_pretrained`, the time of the first forward pass and the time to first output (the sum of both), and checks
+# that both models return the same outputs.
+#
+# Example:
+#
+#     python ./scripts/benchmark/lazy-loading-benchmark.py --model google-bert/bert-large-uncased \
+#     --sequence-length 128
+#
+# The model has to be available as a safetensors checkpoint. Each mode is run in a new process, so that both start
+# with the same state of the page cache (use `--drop-caches` as root to measure reads from the disk).
+
+import argparse
+import multiprocessing
+import subprocess
+import time
+
+import torch
+
+from transformers import AutoModel
+
+
+def run(mode, args, queue):
+    start = time.perf_counter()
+    model = AutoModel.from_pretrained(args.model, lazy_loading=mode == "lazy", low_cpu_mem_usage=True)
+    load_time = time.perf_counter() - start
+
+    torch.manual_seed(0)
+    input_ids = torch.randint(0, model.config.vocab_size, (args.batch_size, args.sequence_length))
+    start = time.perf_counter()
+    with torch.no_grad():
+        output = model(input_ids)[0]
+    forward_time = time.perf_counter() - start
+    queue.put((load_time, forward_time, output))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", type=str, required=True, help="Name or path of a model with safetensors weights.")
+    parser.add_argument("--batch-size", type=int, default=1)
+    parser.add_argument("--sequence-length", type=int, default=128)
+    parser.add_argument("--drop-caches", action="store_true", help="Drop the page cache before each run (root only).")
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn")
+    results = {}
+    for mode in ["eager", "lazy"]:
+        if args.drop_caches:
+            subprocess.run(["sync"], check=True)
+            with open("/proc/sys/vm/drop_caches", "w") as f:
+                f.write("3\n")
+        queue = context.Queue()
+        process = context.Process(target=run, args=(mode, args, queue))
+        process.start()
+        results[mode] = queue.get()
+        process.join()
+
+    if not torch.allclose(results["eager"][2], results["lazy"][2]):
+        raise ValueError("The outputs of the lazily loaded model are different from the ones of the eager model")
+
+    print(f"{args.model}, batch of {args.batch_size}x{args.sequence_length} tokens\n")
+    print("| mode | from_pretrained (s) | first forward (s) | time to first output (s) |")
+    print("|---|---|---|---|")
+    for mode, (load_time, forward_time, _) in results.items():
+        print(f"| {mode} | {load_time:.2f} | {forward_time:.2f} | {load_time + forward_time:.2f} |")
+
+
+if __name__ == "__main__":
+    main()
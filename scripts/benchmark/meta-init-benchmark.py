@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+
+# Model instantiation benchmarking tool
+#
+# This tool compares the time `from_pretrained` takes when the model is first built on the meta device (the default
+# when Accelerate is installed and the checkpoint contains all the weights), and only the weights missing from the
+# checkpoint are created and initialized, with the time it takes when the model is first built with all its weights on
+# the CPU (`low_cpu_mem_usage=False`), for several architectures. Randomly initialized checkpoints are saved in a
+# temporary folder first, so that no download is needed.
+#
+# Example:
+#
+#     python ./scripts/benchmark/meta-init-benchmark.py --architectures bert llama --num-runs 3
+#
+# Each load is run in a new process, so that all of them start from the same state.
+
+import argparse
+import multiprocessing
+import tempfile
+import time
+
+import torch
+
+from transformers import (
+    BertConfig,
+    BertModel,
+    GPT2Config,
+    GPT2LMHeadModel,
+    LlamaConfig,
+    LlamaForCausalLM,
+    T5Config,
+    T5ForConditionalGeneration,
+)
+
+
+# Configurations of a few hundred million parameters (the sizes of bert-large, gpt2-medium and t5-base).
+ARCHITECTURES = {
+    "bert": (
+        BertModel,
+        BertConfig(hidden_size=1024, num_hidden_layers=24, num_attention_heads=16, intermediate_size=4096),
+    ),
+    "gpt2": (GPT2LMHeadModel, GPT2Config(n_embd=1024, n_layer=24, n_head=16)),
+    "t5": (T5ForConditionalGeneration, T5Config(d_model=768, d_ff=3072, num_layers=12, num_heads=12)),
+    "llama": (
+        LlamaForCausalLM,
+        LlamaConfig(hidden_size=1024, intermediate_size=2816, num_hidden_layers=16, num_attention_heads=16),
+    ),
+}
+
+
+def load(architecture, folder, low_cpu_mem_usage, queue):
+    model_class = ARCHITECTURES[architecture][0]
+    start = time.perf_counter()
+    model_class.from_pretrained(folder, low_cpu_mem_usage=low_cpu_mem_usage)
+    queue.put(time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--architectures",
+        type=str,
+        nargs="+",
+        default=list(ARCHITECTURES),
+        choices=list(ARCHITECTURES),
+    )
+    parser.add_argument(
+        "--num-runs",
+        type=int,
+        default=3,
+        help="The number of loads of each model, the best is kept.",
+    )
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn")
+    results = {}
+    for architecture in args.architectures:
+        model_class, config = ARCHITECTURES[architecture]
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            model = model_class(config)
+            num_parameters = model.num_parameters()
+            model.save_pretrained(tmp_dir)
+            del model
+
+            timings = {}
+            for mode, low_cpu_mem_usage in [("cpu", False), ("meta", None)]:
+                times = []
+                for _ in range(args.num_runs):
+                    queue = context.Queue()
+                    process = context.Process(
+                        target=load,
+                        args=(architecture, tmp_dir, low_cpu_mem_usage, queue),
+                    )
+                    process.start()
+                    times.append(queue.get())
+                    process.join()
+                timings[mode] = min(times)
+        results[architecture] = (num_parameters, timings)
+
+    print(f"torch {torch.__version__}, {torch.get_num_threads()} threads, best of {args.num_runs} runs\n")
+    print("| architecture | parameters | built on CPU (s) | built on meta (s) | speedup |")
+    print("|---|---|---|---|---|")
+    for architecture, (num_parameters, timings) in results.items():
+        print(
+            f"| {architecture} | {num_parameters / 1e6:.0f}M | {timings['cpu']:.2f} | {timings['meta']:.2f} | "
+            f"{timings['cpu'] / timings['meta']:.1f}x |"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+
+# Multi-process loading benchmarking tool
+#
+# This tool starts several worker processes loading the same checkpoint at the same time, like the workers of an
+# inference server, with and without `shared_memory_loading=True`, and compares the time it takes until all of them
+# have loaded the model and the memory they use together once it's loaded (the sum of their proportional set sizes, in
+# which the pages shared by several processes are only counted once). A randomly initialized checkpoint is saved in a
+# temporary folder first, so that no download is needed.
+#
+# Example:
+#
+#     python ./scripts/benchmark/shared-memory-loading-benchmark.py --num-workers 4 --dtype bfloat16
+#
+# Only runs on Linux.
+
+import argparse
+import multiprocessing
+import tempfile
+import time
+
+import torch
+
+from transformers import LlamaConfig, LlamaForCausalLM
+
+
+def get_pss():
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            if line.startswith("Pss:"):
+                return int(line.split()[1]) * 1024
+    return 0
+
+
+def load(folder, shared_memory_loading, dtype, start_event, barrier, queue):
+    start_event.wait()
+    model = LlamaForCausalLM.from_pretrained(folder, shared_memory_loading=shared_memory_loading, torch_dtype=dtype)
+    end = time.perf_counter()
+    # Read all the weights once, so that the pages of the memory mapped files are counted
+    with torch.no_grad():
+        for param in model.parameters():
+            param.sum()
+    # Measure once all the workers have loaded the model, when the shared pages are split between all of them
+    barrier.wait()
+    queue.put((end, get_pss()))
+    barrier.wait()
+
+
+def run(folder, num_workers, shared_memory_loading, dtype):
+    context = multiprocessing.get_context("spawn")
+    start_event = context.Event()
+    barrier = context.Barrier(num_workers)
+    queue = context.Queue()
+    processes = [
+        context.Process(target=load, args=(folder, shared_memory_loading, dtype, start_event, barrier, queue))
+        for _ in range(num_workers)
+    ]
+    for process in processes:
+        process.start()
+    # Let the workers import the library before starting to measure
+    time.sleep(10)
+    start = time.perf_counter()
+    start_event.set()
+    results = [queue.get() for _ in processes]
+    for process in processes:
+        process.join()
+    return max(end for end, _ in results) - start, sum(pss for _, pss in results)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--num-workers", type=int, default=4)
+    parser.add_argument("--dtype", type=str, default="float32", choices=["float32", "float16", "bfloat16"])
+    parser.add_argument("--hidden-size", type=int, default=1024)
+    parser.add_argument("--num-hidden-layers", type=int, default=16)
+    args = parser.parse_args()
+    dtype = getattr(torch, args.dtype)
+
+    config = LlamaConfig(
+        hidden_size=args.hidden_size,
+        intermediate_size=int(args.hidden_size * 2.6875),
+        num_hidden_layers=args.num_hidden_layers,
+        num_attention_heads=args.hidden_size // 64,
+    )
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        model = LlamaForCausalLM(config)
+        num_parameters = model.num_parameters()
+        model.save_pretrained(tmp_dir, max_shard_size="200MB")
+        del model
+
+        results = {}
+        for mode, shared_memory_loading in [("separate", False), ("shared", True)]:
+            results[mode] = run(tmp_dir, args.num_workers, shared_memory_loading, dtype)
+
+    print(
+        f"{num_parameters / 1e6:.0f}M parameters loaded in {args.dtype} by {args.num_workers} workers, "
+        f"{torch.get_num_threads()} threads\n"
+    )
+    print("| loading | time until all workers are ready (s) | total PSS (MB) |")
+    print("|---|---|---|")
+    for mode, (duration, pss) in results.items():
+        print(f"| {mode} | {duration:.2f} | {pss / 2**20:.0f} |")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+
+# Slow tokenizer parallel encoding benchmarking tool
+#
+# This tool compares the throughput of the serial batch encoding of a Python (slow) tokenizer with the one of its
+# parallel encoding mode (`tokenizer.enable_parallel_encoding()`), for several numbers of workers, and checks that
+# they return the same outputs.
+#
+# Example:
+#
+#     python ./scripts/benchmark/tokenizer-parallel-encoding-benchmark.py --tokenizer FacebookAI/xlm-mlm-en-2048 \
+#     --num-workers 2 4 8 --num-texts 20000 --batch-size 1000
+#
+# The texts are read from `--text-file` (one per line) if given, otherwise random texts are generated from the
+# vocabulary of the tokenizer.
+
+import argparse
+import random
+import time
+
+from transformers import AutoTokenizer
+
+
+def get_texts(tokenizer, args):
+    if args.text_file is not None:
+        with open(args.text_file, encoding="utf-8") as f:
+            texts = [line.strip() for line in f if line.strip()]
+        return (texts * (args.num_texts // len(texts) + 1))[: args.num_texts]
+
+    rng = random.Random(args.seed)
+    vocab = [token for token in tokenizer.get_vocab() if token.isalpha()]
+    return [" ".join(rng.choices(vocab, k=rng.randint(1, args.max_words))) for _ in range(args.num_texts)]
+
+
+def encode(tokenizer, texts, args):
+    start = time.perf_counter()
+    input_ids = []
+    for i in range(0, len(texts), args.batch_size):
+        input_ids.extend(tokenizer(texts[i : i + args.batch_size], truncation=True)["input_ids"])
+    return input_ids, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tokenizer", type=str, required=True, help="Name or path of a slow tokenizer.")
+    parser.add_argument("--num-workers", type=int, nargs="+", default=[2, 4], help="Numbers of workers to compare.")
+    parser.add_argument("--num-texts", type=int, default=10000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--max-words", type=int, default=200, help="Maximum number of words of the random texts.")
+    parser.add_argument("--text-file", type=str, default=None)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    tokenizer = AutoTokenizer.from_pretrained(args.tokenizer, use_fast=False)
+    texts = get_texts(tokenizer, args)
+    num_chars = sum(len(text) for text in texts)
+
+    reference, serial_time = encode(tokenizer, texts, args)
+    results = [("serial", serial_time)]
+    for num_workers in args.num_workers:
+        tokenizer.enable_parallel_encoding(num_workers=num_workers, min_batch_size=1)
+        # The first batch starts the workers
+        encode(tokenizer, texts[: args.batch_size], args)
+        input_ids, parallel_time = encode(tokenizer, texts, args)
+        tokenizer.disable_parallel_encoding()
+        if input_ids != reference:
+            raise ValueError(f"The outputs with {num_workers} workers are different from the serial ones")
+        results.append((f"{num_workers} workers", parallel_time))
+
+    print(f"{len(texts)} texts, {num_chars} characters, batches of {args.batch_size}\n")
+    print("| mode | time (s) | texts/s | speedup |")
+    print("|---|---|---|---|")
+    for mode, duration in results:
+        print(f"| {mode} | {duration:.2f} | {len(texts) / duration:.0f} | {serial_time / duration:.2f}x |")
+
+
+if __name__ == "__main__":
+    main()
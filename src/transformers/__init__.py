@@ -1007,6 +1007,7 @@ _import_structure = {
     ],
     "processing_utils": ["ProcessorMixin"],
     "quantizers": [],
+    "shared_memory_loading": [],
     "testing_utils": [],
     "tokenization_utils": ["PreTrainedTokenizer"],
     "tokenization_utils_base": [
@@ -0,0 +1,95 @@
+# Copyright 2024 The HuggingFace Team. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+from argparse import ArgumentParser
+from typing import List, Optional
+
+from . import BaseTransformersCLICommand
+
+
+def convert_to_safetensors_command_factory(args):
+    return ConvertToSafetensorsCommand(
+        args.folders, args.output_dir, args.variant, args.discard_tied_weights, not args.no_verify
+    )
+
+
+class ConvertToSafetensorsCommand(BaseTransformersCLICommand):
+    """
+    Converts local PyTorch checkpoints (`pytorch_model.bin` files or shards) to the safetensors format, one shard at a
+    time, see [`~safetensors_conversion.convert_checkpoint_to_safetensors`].
+    """
+
+    @staticmethod
+    def register_subcommand(parser: ArgumentParser):
+        convert_parser = parser.add_parser(
+            "convert-to-safetensors", help="Convert local PyTorch checkpoints to the safetensors format."
+        )
+        convert_parser.add_argument(
+            "folders", type=str, nargs="+", help="Folders containing the PyTorch checkpoints to convert."
+        )
+        convert_parser.add_argument(
+            "--output-dir",
+            type=str,
+            default=None,
+            help=(
+                "Where to save the safetensors checkpoints, in a subfolder named after each input folder. Defaults to "
+                "the input folders."
+            ),
+        )
+        convert_parser.add_argument("--variant", type=str, default=None, help="The variant of the checkpoints.")
+        convert_parser.add_argument(
+            "--discard-tied-weights",
+            type=str,
+            nargs="*",
+            default=None,
+            help=(
+                "Patterns of the names of the tied weights that are not saved. Defaults to the ones of the "
+                "architecture in the config of each checkpoint."
+            ),
+        )
+        convert_parser.add_argument(
+            "--no-verify", action="store_true", help="Don't check the checksums of the converted tensors."
+        )
+        convert_parser.set_defaults(func=convert_to_safetensors_command_factory)
+
+    def __init__(
+        self,
+        folders: List[str],
+        output_dir: Optional[str],
+        variant: Optional[str],
+        discard_tied_weights: Optional[List[str]],
+        verify: bool,
+    ):
+        self._folders = folders
+        self._output_dir = output_dir
+        self._variant = variant
+        self._discard_tied_weights = discard_tied_weights
+        self._verify = verify
+
+    def run(self):
+        from ..safetensors_conversion import convert_checkpoint_to_safetensors
+
+        for folder in self._folders:
+            output_dir = None
+            if self._output_dir is not None:
+                output_dir = os.path.join(self._output_dir, os.path.basename(os.path.normpath(folder)))
+            output_file = convert_checkpoint_to_safetensors(
+                folder,
+                output_dir=output_dir,
+                variant=self._variant,
+                discard_tied_weights=self._discard_tied_weights,
+                verify=self._verify,
+            )
+            print(f"{folder}: converted to {output_file}")
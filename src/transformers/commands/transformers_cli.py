@@ -18,6 +18,7 @@ from argparse import ArgumentParser
 from .add_new_model import AddNewModelCommand
 from .add_new_model_like import AddNewModelLikeCommand
 from .convert import ConvertCommand
+from .convert_to_safetensors import ConvertToSafetensorsCommand
 from .download import DownloadCommand
 from .env import EnvironmentCommand
 from .lfs import LfsCommands
@@ -25,6 +26,7 @@ from .pt_to_tf import PTtoTFCommand
 from .run import RunCommand
 from .serving import ServeCommand
 from .user import UserCommands
+from .warm_tokenizer_cache import WarmTokenizerCacheCommand
 
 
 def main():
@@ -33,6 +35,7 @@ def main():
 
     # Register commands
     ConvertCommand.register_subcommand(commands_parser)
+    ConvertToSafetensorsCommand.register_subcommand(commands_parser)
     DownloadCommand.register_subcommand(commands_parser)
     EnvironmentCommand.register_subcommand(commands_parser)
     RunCommand.register_subcommand(commands_parser)
@@ -42,6 +45,7 @@ def main():
     AddNewModelLikeCommand.register_subcommand(commands_parser)
     LfsCommands.register_subcommand(commands_parser)
     PTtoTFCommand.register_subcommand(commands_parser)
+    WarmTokenizerCacheCommand.register_subcommand(commands_parser)
 
     # Let's go
     args = parser.parse_args()
@@ -0,0 +1,80 @@
+# Copyright 2024 The HuggingFace Team. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+from argparse import ArgumentParser
+from typing import List, Optional
+
+from . import BaseTransformersCLICommand
+
+
+def warm_tokenizer_cache_command_factory(args):
+    return WarmTokenizerCacheCommand(args.models, args.revision, args.cache_dir, args.trust_remote_code)
+
+
+class WarmTokenizerCacheCommand(BaseTransformersCLICommand):
+    """
+    Loads the fast tokenizers of some models so that the ones that have to be converted from their slow tokenizer are
+    stored in the cache of converted tokenizers (`HF_CONVERTED_TOKENIZERS_CACHE`), and are not converted again when the
+    models are loaded by other processes.
+    """
+
+    @staticmethod
+    def register_subcommand(parser: ArgumentParser):
+        warm_parser = parser.add_parser(
+            "warm-tokenizer-cache", help="Convert the slow tokenizers of some models ahead of time."
+        )
+        warm_parser.add_argument("models", type=str, nargs="+", help="Names or paths of the models.")
+        warm_parser.add_argument("--revision", type=str, default=None, help="The revision of the models to use.")
+        warm_parser.add_argument(
+            "--cache-dir", type=str, default=None, help="Path to the location where the models are downloaded."
+        )
+        warm_parser.add_argument(
+            "--trust-remote-code",
+            action="store_true",
+            help="Whether or not to allow for custom tokenizers defined on the Hub in their own modeling files. Use only if you've reviewed the code as it will execute on your local machine",
+        )
+        warm_parser.set_defaults(func=warm_tokenizer_cache_command_factory)
+
+    def __init__(self, models: List[str], revision: Optional[str], cache_dir: Optional[str], trust_remote_code: bool):
+        self._models = models
+        self._revision = revision
+        self._cache_dir = cache_dir
+        self._trust_remote_code = trust_remote_code
+
+    def run(self):
+        from ..models.auto import AutoTokenizer
+        from ..utils import CONVERTED_TOKENIZERS_CACHE
+
+        def cached_conversions():
+            if not os.path.isdir(CONVERTED_TOKENIZERS_CACHE):
+                return set()
+            return set(os.listdir(CONVERTED_TOKENIZERS_CACHE))
+
+        for model in self._models:
+            cached = cached_conversions()
+            tokenizer = AutoTokenizer.from_pretrained(
+                model,
+                revision=self._revision,
+                cache_dir=self._cache_dir,
+                trust_remote_code=self._trust_remote_code,
+                use_fast=True,
+            )
+            added = sorted(cached_conversions() - cached)
+            if not tokenizer.is_fast:
+                print(f"{model}: no fast tokenizer, nothing to convert")
+            elif added:
+                print(f"{model}: converted to {os.path.join(CONVERTED_TOKENIZERS_CACHE, added[0], 'tokenizer.json')}")
+            else:
+                print(f"{model}: loaded from a tokenizer.json file or from the cache")
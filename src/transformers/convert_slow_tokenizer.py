@@ -19,15 +19,27 @@ All the conversions are grouped here to gather SentencePiece dependencies outsid
 allow to make our dependency on SentencePiece optional.
 """
 
+import hashlib
+import json
+import os
 import warnings
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 
+import tokenizers
+from filelock import FileLock
 from packaging import version
 from tokenizers import AddedToken, Regex, Tokenizer, decoders, normalizers, pre_tokenizers, processors
 from tokenizers.models import BPE, Unigram, WordPiece
 
-from .utils import is_protobuf_available, requires_backends
-from .utils.import_utils import PROTOBUF_IMPORT_ERROR
+from .utils import CONVERTED_TOKENIZERS_CACHE, __version__, is_protobuf_available, logging, requires_backends
+from .utils.import_utils import ENV_VARS_TRUE_VALUES, PROTOBUF_IMPORT_ERROR
+
+
+logger = logging.get_logger(__name__)
+
+# Bump this when a converter changes its output for the same slow tokenizer, to invalidate the conversions stored in
+# the cache of converted tokenizers.
+CONVERTER_CACHE_VERSION = 1
 
 
 def import_protobuf(error_message=""):
@@ -1508,3 +1520,121 @@ def convert_slow_tokenizer(transformer_tokenizer) -> Tokenizer:
     converter_class = SLOW_TO_FAST_CONVERTERS[tokenizer_class_name]
 
     return converter_class(transformer_tokenizer).converted()
+
+
+def get_conversion_cache_key(transformer_tokenizer, source_files: Optional[Dict[str, str]] = None) -> Optional[str]:
+    """
+    Returns the key under which the conversion of a slow tokenizer is stored in the cache of converted tokenizers. The
+    key is a hash of the contents of the vocabulary files of the tokenizer, of its init kwargs and added tokens, and of
+    the versions of the converter, Transformers and Tokenizers.
+
+    Args:
+        transformer_tokenizer ([`~tokenization_utils_base.PreTrainedTokenizer`]):
+            Instance of a slow tokenizer to convert.
+        source_files (`Dict[str, str]`, *optional*):
+            The paths of the vocabulary files the tokenizer was instantiated from, indexed by the keys of its
+            `vocab_files_names`. Only used for the files that the tokenizer does not keep track of.
+
+    Return:
+        `Optional[str]`: The key, or `None` if the tokenizer has no converter or if its vocabulary files are unknown
+        (e.g. when they were passed as positional arguments), in which case the conversion cannot be cached.
+    """
+    tokenizer_class_name = transformer_tokenizer.__class__.__name__
+    if tokenizer_class_name not in SLOW_TO_FAST_CONVERTERS:
+        return None
+
+    init_kwargs = {key: value for key, value in transformer_tokenizer.init_kwargs.items() if not key.startswith("_")}
+    hasher = hashlib.sha256()
+    hasher.update(f"{CONVERTER_CACHE_VERSION}:{__version__}:{tokenizers.__version__}".encode())
+    hasher.update(f"{tokenizer_class_name}:{SLOW_TO_FAST_CONVERTERS[tokenizer_class_name].__name__}".encode())
+    for file_id in sorted(transformer_tokenizer.vocab_files_names):
+        if file_id in init_kwargs:
+            file_path = init_kwargs.pop(file_id)
+        elif getattr(transformer_tokenizer, file_id, None) is not None:
+            file_path = getattr(transformer_tokenizer, file_id)
+        elif source_files is not None and file_id in source_files:
+            file_path = source_files[file_id]
+        else:
+            return None
+        hasher.update(f"{file_id}:".encode())
+        if file_path is not None and os.path.isfile(file_path):
+            with open(file_path, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    hasher.update(chunk)
+        elif file_path is not None:
+            return None
+
+    # The location of the files does not change the conversion
+    for key in ("name_or_path", "tokenizer_file", "added_tokens_decoder"):
+        init_kwargs.pop(key, None)
+    added_tokens = sorted(transformer_tokenizer.added_tokens_decoder.items())
+    hasher.update(json.dumps(init_kwargs, sort_keys=True, default=repr).encode())
+    hasher.update(repr(added_tokens).encode())
+    return hasher.hexdigest()
+
+
+def _load_converted_tokenizer(cache_file: str) -> Optional[Tokenizer]:
+    if not os.path.isfile(cache_file):
+        return None
+    try:
+        return Tokenizer.from_file(cache_file)
+    except Exception as e:
+        logger.warning(f"Ignoring the corrupted converted tokenizer {cache_file}: {e}")
+        return None
+
+
+def cached_convert_slow_tokenizer(
+    transformer_tokenizer, cache_dir: Optional[str] = None, source_files: Optional[Dict[str, str]] = None
+) -> Tokenizer:
+    """
+    Same as [`convert_slow_tokenizer`], but stores the converted tokenizer as a `tokenizer.json` file in an on-disk
+    cache, so that a given slow tokenizer is only converted once across processes. A file lock makes concurrent
+    processes wait for the one doing the conversion instead of converting it again.
+
+    The cache is located in `HF_CONVERTED_TOKENIZERS_CACHE` (defaults to `~/.cache/huggingface/converted_tokenizers`)
+    and can be disabled by setting `TRANSFORMERS_NO_TOKENIZER_CONVERSION_CACHE=1`. Use `transformers-cli
+    warm-tokenizer-cache` to fill it ahead of time.
+
+    Args:
+        transformer_tokenizer ([`~tokenization_utils_base.PreTrainedTokenizer`]):
+            Instance of a slow tokenizer to convert in the backend tokenizer for
+            [`~tokenization_utils_base.PreTrainedTokenizerFast`].
+        cache_dir (`str`, *optional*):
+            The directory of the cache, overrides `HF_CONVERTED_TOKENIZERS_CACHE`.
+        source_files (`Dict[str, str]`, *optional*):
+            The paths of the vocabulary files the tokenizer was instantiated from, see [`get_conversion_cache_key`].
+
+    Return:
+        A instance of [`~tokenizers.Tokenizer`] to be used as the backend tokenizer of a
+        [`~tokenization_utils_base.PreTrainedTokenizerFast`]
+    """
+    if os.environ.get("TRANSFORMERS_NO_TOKENIZER_CONVERSION_CACHE", "0").upper() in ENV_VARS_TRUE_VALUES:
+        return convert_slow_tokenizer(transformer_tokenizer)
+    cache_key = get_conversion_cache_key(transformer_tokenizer, source_files=source_files)
+    if cache_key is None:
+        return convert_slow_tokenizer(transformer_tokenizer)
+
+    cache_dir = CONVERTED_TOKENIZERS_CACHE if cache_dir is None else cache_dir
+    cache_file = os.path.join(cache_dir, cache_key, "tokenizer.json")
+    fast_tokenizer = _load_converted_tokenizer(cache_file)
+    if fast_tokenizer is not None:
+        return fast_tokenizer
+
+    try:
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        with FileLock(cache_file + ".lock"):
+            # Another process may have converted the tokenizer while we were waiting for the lock
+            fast_tokenizer = _load_converted_tokenizer(cache_file)
+            if fast_tokenizer is None:
+                fast_tokenizer = convert_slow_tokenizer(transformer_tokenizer)
+                # Readers don't take the lock, so the file is only moved in place once complete
+                tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+                fast_tokenizer.save(tmp_file)
+                os.replace(tmp_file, cache_file)
+                # The serialization rounds the scores of the vocabulary, reload it to behave like the other processes
+                fast_tokenizer = Tokenizer.from_file(cache_file)
+    except OSError as e:
+        logger.info(f"Could not use the cache of converted tokenizers in {cache_dir}: {e}")
+        if fast_tokenizer is None:
+            fast_tokenizer = convert_slow_tokenizer(transformer_tokenizer)
+    return fast_tokenizer
@@ -14,9 +14,12 @@
 # limitations under the License.
 
 import base64
+import collections
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
-from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple, Union
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
 import numpy as np
 import requests
@@ -293,7 +296,9 @@ def valid_coco_panoptic_annotations(annotations: Iterable[Dict[str, Union[List,
     return all(is_valid_annotation_coco_panoptic(ann) for ann in annotations)
 
 
-def load_image(image: Union[str, "PIL.Image.Image"], timeout: Optional[float] = None) -> "PIL.Image.Image":
+def load_image(
+    image: Union[str, "PIL.Image.Image"], timeout: Optional[float] = None, draft_size: Optional[int] = None
+) -> "PIL.Image.Image":
     """
     Loads `image` to a PIL Image.
 
@@ -302,6 +307,10 @@ def load_image(image: Union[str, "PIL.Image.Image"], timeout: Optional[float] =
             The image to convert to the PIL Image format.
         timeout (`float`, *optional*):
             The timeout value in seconds for the URL request.
+        draft_size (`int`, *optional*):
+            If set, JPEG images loaded from a URL, a path or a base64 string are decoded at the smallest reduced scale
+            (PIL's draft mode) that keeps both of their sides at least `draft_size` pixels long, which is much faster
+            than decoding the full image when it is going to be downsized anyway.
 
     Returns:
         `PIL.Image.Image`: A PIL Image.
@@ -326,6 +335,8 @@ def load_image(image: Union[str, "PIL.Image.Image"], timeout: Optional[float] =
                 raise ValueError(
                     f"Incorrect image source. Must be a valid URL starting with `http://` or `https://`, a valid path to an image file, or a base64 encoded string. Got {image}. Failed with {e}"
                 )
+        if draft_size is not None and image.format == "JPEG":
+            image.draft("RGB", (draft_size, draft_size))
     elif isinstance(image, PIL.Image.Image):
         image = image
     else:
@@ -337,6 +348,106 @@ def load_image(image: Union[str, "PIL.Image.Image"], timeout: Optional[float] =
     return image
 
 
+class ImagePrefetcher:
+    """
+    Loads images with [`load_image`] ahead of their consumer in a pool of threads, so that reading and decoding them
+    overlaps with the rest of the work (e.g. running a model on the previous images).
+
+    Args:
+        num_workers (`int`, *optional*, defaults to 4):
+            The number of threads loading images.
+        max_prefetch (`int`, *optional*):
+            The maximum number of images loaded ahead of the consumer. Defaults to `4 * num_workers`.
+        cache_size (`int`, *optional*, defaults to 0):
+            The number of decoded images kept in memory, keyed by their URL, path or base64 string. Useful when the
+            same images are seen several times. Files modified since they were cached are loaded again.
+        draft_size (`int`, *optional*):
+            Passed along to [`load_image`] to decode JPEG images at a reduced size.
+        timeout (`float`, *optional*):
+            The timeout value in seconds for the URL requests.
+    """
+
+    def __init__(
+        self,
+        num_workers: int = 4,
+        max_prefetch: Optional[int] = None,
+        cache_size: int = 0,
+        draft_size: Optional[int] = None,
+        timeout: Optional[float] = None,
+    ):
+        if num_workers < 1:
+            raise ValueError(f"`num_workers` should be at least 1, got {num_workers}")
+        self.num_workers = num_workers
+        self.max_prefetch = max(max_prefetch if max_prefetch is not None else 4 * num_workers, 1)
+        self.cache_size = cache_size
+        self.draft_size = draft_size
+        self.timeout = timeout
+        self._cache = collections.OrderedDict()
+        self._cache_lock = threading.Lock()
+
+    @classmethod
+    def from_image_processor(cls, image_processor, **kwargs) -> "ImagePrefetcher":
+        """
+        Instantiates an [`ImagePrefetcher`] with a `draft_size` large enough for the resizing of `image_processor`, so
+        that the reduced size decoding does not change the size of the images it outputs. Their pixels, and so the
+        outputs of the model, can still differ slightly from the ones of the images decoded at full size.
+        """
+        if "draft_size" not in kwargs and getattr(image_processor, "do_resize", False):
+            size = getattr(image_processor, "size", None)
+            sizes = list(size.values()) if isinstance(size, dict) else [size]
+            sizes = [size for size in sizes if isinstance(size, int)]
+            # Both sides of the decoded image have to be at least as large as any side of the resized image
+            kwargs["draft_size"] = max(sizes) if sizes else None
+        return cls(**kwargs)
+
+    def _cache_key(self, image: str) -> Tuple:
+        if os.path.isfile(image):
+            return (image, os.stat(image).st_mtime_ns)
+        return (image,)
+
+    def load(self, image: Any) -> Any:
+        """
+        Loads `image` with [`load_image`], going through the cache. Inputs that are not URLs, paths or base64 strings
+        are returned as is.
+        """
+        if not isinstance(image, str):
+            return image
+        if self.cache_size <= 0:
+            return load_image(image, timeout=self.timeout, draft_size=self.draft_size)
+
+        key = self._cache_key(image)
+        with self._cache_lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+        loaded = load_image(image, timeout=self.timeout, draft_size=self.draft_size)
+        with self._cache_lock:
+            self._cache[key] = loaded
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return loaded
+
+    def __call__(self, images: Iterable[Any]) -> Iterator[Any]:
+        """
+        Yields the images of `images` loaded, in order, while the next ones are being loaded in the background.
+        Errors raised while loading an image are raised when it is reached.
+        """
+        executor = ThreadPoolExecutor(max_workers=self.num_workers, thread_name_prefix="image_prefetcher")
+        pending = collections.deque()
+        try:
+            for image in images:
+                pending.append(executor.submit(self.load, image))
+                if len(pending) >= self.max_prefetch:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+
 def validate_preprocess_arguments(
     do_rescale: Optional[bool] = None,
     rescale_factor: Optional[float] = None,
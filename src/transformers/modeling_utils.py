@@ -17,6 +17,7 @@ import collections
 import copy
 import functools
 import gc
+import hashlib
 import importlib.metadata
 import inspect
 import itertools
@@ -24,8 +25,10 @@ import json
 import os
 import re
 import shutil
+import sys
 import tempfile
 import warnings
+from concurrent.futures import Future, ThreadPoolExecutor
 from contextlib import contextmanager
 from dataclasses import dataclass
 from functools import partial, wraps
@@ -46,6 +49,7 @@ from .integrations import PeftAdapterMixin, deepspeed_config, is_deepspeed_zero3
 from .pytorch_utils import (  # noqa: F401
     Conv1D,
     apply_chunking_to_forward,
+    copy_tensors_to_cpu,
     find_pruneable_heads_and_indices,
     id_tensor_storage,
     is_torch_greater_or_equal_than_1_13,
@@ -55,6 +59,7 @@ from .pytorch_utils import (  # noqa: F401
 )
 from .quantizers import AutoHfQuantizer, HfQuantizer
 from .safetensors_conversion import auto_conversion
+from .shared_memory_loading import get_shared_memory_checkpoint_files
 from .utils import (
     ADAPTER_SAFE_WEIGHTS_NAME,
     ADAPTER_WEIGHTS_NAME,
@@ -126,6 +131,9 @@ logger = logging.get_logger(__name__)
 
 _init_weights = True
 
+# Maximum number of elements of the blocks in which the tokens added by `resize_token_embeddings` are initialized
+_RESIZE_INIT_BLOCK_NUMEL = 2**22
+
 
 def is_fsdp_enabled():
     return (
@@ -411,6 +419,113 @@ def shard_checkpoint(
     return shards, index
 
 
+def _save_shards(
+    shards,
+    save_directory,
+    safe_serialization=True,
+    save_function=torch.save,
+    index=None,
+    index_file=None,
+    num_workers=1,
+):
+    def save_shard(shard_file):
+        if safe_serialization:
+            # At some point we will need to deal better with save_function (used for TPU and other distributed
+            # joyfulness), but for now this enough.
+            safe_save_file(shards[shard_file], os.path.join(save_directory, shard_file), metadata={"format": "pt"})
+        else:
+            save_function(shards[shard_file], os.path.join(save_directory, shard_file))
+
+    if num_workers > 1 and len(shards) > 1:
+        with ThreadPoolExecutor(max_workers=min(num_workers, len(shards))) as executor:
+            # Consume the results to raise the errors
+            list(executor.map(save_shard, shards))
+    else:
+        for shard_file in shards:
+            save_shard(shard_file)
+
+    if index is not None:
+        with open(index_file, "w", encoding="utf-8") as f:
+            content = json.dumps(index, indent=2, sort_keys=True) + "\n"
+            f.write(content)
+
+
+_async_save_executor = None
+
+
+def save_in_background(function: Callable, *args, **kwargs) -> Future:
+    """
+    Calls `function(*args, **kwargs)` on the background thread writing the checkpoints saved with
+    `save_pretrained(..., async_save=True)`, after the ones already submitted. The objects passed should not be
+    modified until the returned future is done, [`~pytorch_utils.copy_tensors_to_cpu`] can be used to snapshot them.
+    """
+    global _async_save_executor
+    if _async_save_executor is None:
+        _async_save_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="save_pretrained")
+    return _async_save_executor.submit(function, *args, **kwargs)
+
+
+def get_delta_checkpoint_base(folder: Union[str, os.PathLike]) -> Optional[str]:
+    """
+    Returns the absolute path of the base checkpoint of the delta checkpoint in `folder` (see the `base_checkpoint`
+    argument of [`~PreTrainedModel.save_pretrained`]), or `None` if `folder` does not contain a delta checkpoint.
+    """
+    index_file = os.path.join(folder, SAFE_WEIGHTS_INDEX_NAME)
+    if not os.path.isfile(index_file):
+        return None
+    with open(index_file, "r", encoding="utf-8") as f:
+        metadata = json.load(f).get("metadata", {})
+    if "base_checkpoint" not in metadata:
+        return None
+    return os.path.abspath(os.path.join(folder, metadata["base_checkpoint"]))
+
+
+def _tensor_hash(tensor):
+    # The hash covers the dtype and shape of the tensor as well as its content
+    tensor = tensor.detach().cpu().contiguous()
+    tensor_hash = hashlib.sha256(f"{tensor.dtype}{tuple(tensor.shape)}".encode())
+    tensor_hash.update(tensor.reshape(-1).view(torch.uint8).numpy())
+    return tensor_hash.hexdigest()
+
+
+# Hashes of the tensors of the base checkpoints of delta checkpoints, for each checkpoint file and its size and
+# modification time
+_tensor_hashes_cache = {}
+
+
+def _get_checkpoint_tensor_hashes(folder):
+    """
+    Returns the files containing the tensors of the safetensors checkpoint in `folder` (mapping each key to the path
+    of its file) and the hashes of these tensors, read from the index of a delta checkpoint or computed from the files.
+    """
+    index_file = os.path.join(folder, SAFE_WEIGHTS_INDEX_NAME)
+    if os.path.isfile(index_file):
+        with open(index_file, "r", encoding="utf-8") as f:
+            index = json.load(f)
+        weight_map = {key: os.path.normpath(os.path.join(folder, f)) for key, f in index["weight_map"].items()}
+        if "tensor_hashes" in index["metadata"]:
+            return weight_map, index["metadata"]["tensor_hashes"]
+    elif os.path.isfile(os.path.join(folder, SAFE_WEIGHTS_NAME)):
+        checkpoint_file = os.path.normpath(os.path.join(folder, SAFE_WEIGHTS_NAME))
+        with safe_open(checkpoint_file, framework="pt") as f:
+            weight_map = {key: checkpoint_file for key in f.keys()}
+    else:
+        raise ValueError(
+            f"Can't find a safetensors checkpoint ({SAFE_WEIGHTS_NAME} or {SAFE_WEIGHTS_INDEX_NAME}) in {folder}."
+        )
+
+    tensor_hashes = {}
+    for checkpoint_file in set(weight_map.values()):
+        stat = os.stat(checkpoint_file)
+        cache_key = (os.path.abspath(checkpoint_file), stat.st_size, stat.st_mtime_ns)
+        if cache_key not in _tensor_hashes_cache:
+            with safe_open(checkpoint_file, framework="pt") as f:
+                _tensor_hashes_cache[cache_key] = {key: _tensor_hash(f.get_tensor(key)) for key in f.keys()}
+        file_hashes = _tensor_hashes_cache[cache_key]
+        tensor_hashes.update({key: file_hashes[key] for key, f in weight_map.items() if f == checkpoint_file})
+    return weight_map, tensor_hashes
+
+
 def load_sharded_checkpoint(model, folder, strict=True, prefer_safe=True):
     """
     This is the same as
@@ -486,6 +601,11 @@ def load_sharded_checkpoint(model, folder, strict=True, prefer_safe=True):
 
     for shard_file in shard_files:
         state_dict = loader(os.path.join(folder, shard_file))
+        if "base_checkpoint" in index.get("metadata", {}):
+            # The files of the base of a delta checkpoint can contain outdated values of the weights saved in the delta
+            state_dict = {
+                key: value for key, value in state_dict.items() if index["weight_map"].get(key) == shard_file
+            }
         model.load_state_dict(state_dict, strict=False)
 
         # Make sure memory is freed before we load the next state dict.
@@ -496,9 +616,61 @@ def load_sharded_checkpoint(model, folder, strict=True, prefer_safe=True):
     return torch.nn.modules.module._IncompatibleKeys(missing_keys, unexpected_keys)
 
 
-def load_state_dict(checkpoint_file: Union[str, os.PathLike]):
+# The dtypes of the safetensors format, see https://github.com/huggingface/safetensors
+_SAFETENSORS_DTYPES = {
+    "F64": torch.float64,
+    "F32": torch.float32,
+    "F16": torch.float16,
+    "BF16": torch.bfloat16,
+    "I64": torch.int64,
+    "I32": torch.int32,
+    "I16": torch.int16,
+    "I8": torch.int8,
+    "U8": torch.uint8,
+    "BOOL": torch.bool,
+}
+if hasattr(torch, "float8_e4m3fn"):
+    _SAFETENSORS_DTYPES.update({"F8_E4M3": torch.float8_e4m3fn, "F8_E5M2": torch.float8_e5m2})
+
+
+def _mmap_safetensors_file(checkpoint_file: Union[str, os.PathLike]) -> Dict[str, torch.Tensor]:
+    """
+    Reads a safetensors file without copying its tensors: the file is memory mapped in copy-on-write mode and the
+    tensors are views of the mapping, so their pages are only read when they are used and are shared with the other
+    processes mapping the same file. Tensors that are not aligned in the file for their dtype are copied.
+    """
+    with open(checkpoint_file, "rb") as f:
+        header_size = int.from_bytes(f.read(8), "little")
+        header = json.loads(f.read(header_size))
+    header.pop("__metadata__", None)
+    if (
+        not hasattr(torch, "UntypedStorage")
+        or sys.byteorder != "little"
+        or any(info["dtype"] not in _SAFETENSORS_DTYPES for info in header.values())
+    ):
+        return safe_load_file(checkpoint_file)
+
+    storage = torch.UntypedStorage.from_file(os.fspath(checkpoint_file), False, os.path.getsize(checkpoint_file))
+    data_start = 8 + header_size
+    state_dict = {}
+    for name, info in header.items():
+        dtype = _SAFETENSORS_DTYPES[info["dtype"]]
+        begin, end = info["data_offsets"]
+        element_size = torch.empty(0, dtype=dtype).element_size()
+        if (data_start + begin) % element_size == 0:
+            tensor = torch.empty(0, dtype=dtype).set_(storage, (data_start + begin) // element_size, info["shape"])
+        else:
+            tensor = torch.empty(0, dtype=torch.uint8).set_(storage, data_start + begin, (end - begin,))
+            tensor = tensor.clone().view(dtype).reshape(info["shape"])
+        state_dict[name] = tensor
+    return state_dict
+
+
+def load_state_dict(checkpoint_file: Union[str, os.PathLike], mmap_weights: bool = False):
     """
     Reads a PyTorch checkpoint file, returning properly formatted errors if they arise.
+
+    With `mmap_weights=True`, the tensors of safetensors files are views of the memory mapped file instead of copies.
     """
     if checkpoint_file.endswith(".safetensors") and is_safetensors_available():
         # Check format of the archive
@@ -509,6 +681,8 @@ def load_state_dict(checkpoint_file: Union[str, os.PathLike]):
                 f"The safetensors archive passed at {checkpoint_file} does not contain the valid metadata. Make sure "
                 "you save your model with the `save_pretrained` method."
             )
+        if mmap_weights:
+            return _mmap_safetensors_file(checkpoint_file)
         return safe_load_file(checkpoint_file)
     try:
         if (
@@ -555,6 +729,171 @@ def load_state_dict(checkpoint_file: Union[str, os.PathLike]):
             )
 
 
+def load_state_dicts(
+    checkpoint_files: List[Union[str, os.PathLike]], prefetch_shards: int = 0, mmap_weights: bool = False
+):
+    """
+    Yields the state dicts of `checkpoint_files`, in order, as read by [`load_state_dict`].
+
+    With `prefetch_shards > 0`, the next `prefetch_shards` files are read and deserialized on background threads while
+    the caller processes the current state dict, so at most `prefetch_shards + 1` state dicts are in memory at once.
+    """
+    if prefetch_shards <= 0:
+        for checkpoint_file in checkpoint_files:
+            yield load_state_dict(checkpoint_file, mmap_weights=mmap_weights)
+        return
+
+    checkpoint_files = iter(checkpoint_files)
+    pending = collections.deque()
+    with ThreadPoolExecutor(max_workers=prefetch_shards, thread_name_prefix="load_state_dict") as executor:
+        try:
+            for checkpoint_file in itertools.islice(checkpoint_files, prefetch_shards):
+                pending.append(executor.submit(load_state_dict, checkpoint_file, mmap_weights))
+            while pending:
+                for checkpoint_file in itertools.islice(checkpoint_files, 1):
+                    pending.append(executor.submit(load_state_dict, checkpoint_file, mmap_weights))
+                # No reference to the state dict is kept here, so that it is freed as soon as the caller is done with it
+                yield pending.popleft().result()
+        finally:
+            # Stop reading the next files if the caller stops early
+            for future in pending:
+                future.cancel()
+
+
+class _LazyWeightsLoader:
+    """
+    Loads the weights of the layers of a model built on the meta device the first time they are used. The layers are
+    the modules of the `nn.ModuleList`s of the model: each of them gets a forward pre-hook that reads its weights from
+    the safetensors checkpoint and loads them in the model, while the weights of the next `prefetch_layers` layers are
+    read on a background thread. The other weights (embeddings, heads, ...) are loaded right away.
+
+    `checkpoint_keys` maps each key of the checkpoint, as renamed by `_load_pretrained_model`, to the file containing
+    it and its original name. The other arguments are the ones of `_load_state_dict_into_meta_model`.
+    """
+
+    def __init__(
+        self,
+        model,
+        checkpoint_keys,
+        loaded_keys,
+        start_prefix,
+        expected_keys,
+        dtype=None,
+        keep_in_fp32_modules=None,
+        prefetch_layers=2,
+    ):
+        self.model = model
+        self.checkpoint_keys = checkpoint_keys
+        self.load_kwargs = {
+            "loaded_state_dict_keys": set(loaded_keys),
+            "start_prefix": start_prefix,
+            "expected_keys": set(expected_keys),
+            "dtype": dtype,
+            "keep_in_fp32_modules": keep_in_fp32_modules,
+            "is_safetensors": True,
+        }
+        self.prefetch_layers = prefetch_layers
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="lazy_weights")
+        self.pending = {}
+
+        # Parameters shared between several modules are loaded right away, so that they stay shared
+        shared_params = collections.Counter(id(param) for _, param in model.named_parameters(remove_duplicate=False))
+        self.layer_keys = []
+        self.hooks = []
+        layer_prefixes = []
+        for name, module in model.named_modules():
+            if not isinstance(module, nn.ModuleList) or any(name.startswith(p) for p in layer_prefixes):
+                continue
+            for index, layer in enumerate(module):
+                if any(shared_params[id(param)] > 1 for param in layer.parameters()):
+                    continue
+                layer_name = f"{name}.{index}" if name else str(index)
+                keys = [f"{start_prefix}{layer_name}.{key}" for key in layer.state_dict()]
+                keys = [key for key in keys if key in checkpoint_keys]
+                if len(keys) == 0:
+                    continue
+                layer_prefixes.append(f"{layer_name}.")
+                hook = layer.register_forward_pre_hook(partial(self._pre_forward_hook, len(self.layer_keys)))
+                self.layer_keys.append(keys)
+                self.hooks.append(hook)
+
+        layer_keys = set(itertools.chain.from_iterable(self.layer_keys))
+        self._load(self._read([key for key in checkpoint_keys if key not in layer_keys]))
+        self._prefetch(range(self.prefetch_layers))
+
+    def _read(self, keys):
+        files = collections.defaultdict(list)
+        for key in keys:
+            checkpoint_file, original_key = self.checkpoint_keys[key]
+            files[checkpoint_file].append(original_key)
+        state_dict = {}
+        for checkpoint_file, original_keys in files.items():
+            with safe_open(checkpoint_file, framework="pt") as f:
+                for original_key in original_keys:
+                    # Cloning reads the weights from the disk now rather than when they are first used
+                    state_dict[original_key] = f.get_tensor(original_key).clone()
+        return state_dict
+
+    def _load(self, state_dict):
+        _load_state_dict_into_meta_model(self.model, state_dict, **self.load_kwargs)
+
+    def _prefetch(self, indices):
+        for index in indices:
+            if index < len(self.layer_keys) and self.hooks[index] is not None and index not in self.pending:
+                self.pending[index] = self.executor.submit(self._read, self.layer_keys[index])
+
+    def _pre_forward_hook(self, index, module, args):
+        future = self.pending.pop(index, None)
+        state_dict = future.result() if future is not None else self._read(self.layer_keys[index])
+        self.hooks[index].remove()
+        self.hooks[index] = None
+        self._prefetch(range(index + 1, index + 1 + self.prefetch_layers))
+        self._load(state_dict)
+        if all(hook is None for hook in self.hooks):
+            self.executor.shutdown(wait=False)
+
+
+@contextmanager
+def _init_empty_weights():
+    """
+    Same as Accelerate's `init_empty_weights`, except that parameters already on the meta device are registered as
+    they are instead of being copied, so that the parameters shared between modules in `__init__` (like
+    `self.decoder.bias = self.bias`) stay shared.
+    """
+    register_parameter = nn.Module.register_parameter
+    with init_empty_weights():
+        register_empty_parameter = nn.Module.register_parameter
+
+        def register_parameter_on_meta(module, name, param):
+            if param is not None and param.device.type == "meta":
+                register_parameter(module, name, param)
+            else:
+                register_empty_parameter(module, name, param)
+
+        nn.Module.register_parameter = register_parameter_on_meta
+        try:
+            yield
+        finally:
+            nn.Module.register_parameter = register_empty_parameter
+
+
+def _checkpoint_covers_model(model, checkpoint_keys) -> bool:
+    """
+    Whether a checkpoint contains all the parameters of `model` (one of the names of the parameters shared between
+    modules is enough), with or without the prefix of its base model.
+    """
+    prefix = f"{model.base_model_prefix}." if model.base_model_prefix else None
+
+    def remove_prefix(key):
+        return key[len(prefix) :] if prefix is not None and key.startswith(prefix) else key
+
+    checkpoint_keys = {remove_prefix(key) for key in checkpoint_keys}
+    names_by_param = collections.defaultdict(list)
+    for name, param in model.named_parameters(remove_duplicate=False):
+        names_by_param[param].append(remove_prefix(name))
+    return all(any(name in checkpoint_keys for name in names) for names in names_by_param.values())
+
+
 def set_initialized_submodules(model, state_dict_keys):
     """
     Sets the `_is_hf_initialized` flag in all submodules of a given model when all its weights are in the loaded state
@@ -771,6 +1110,14 @@ def _load_state_dict_into_meta_model(
                 break
 
         if old_param is not None:
+            if hf_quantizer is None and old_param.shape != param.shape:
+                # Same error as the one of `load_state_dict`, accelerate would raise a less helpful one.
+                error_msgs.append(
+                    f"size mismatch for {param_name}: copying a param with shape {param.shape} from checkpoint, the "
+                    f"shape in current model is {old_param.shape}."
+                )
+                continue
+
             if dtype is None:
                 param = param.to(old_param.dtype)
 
@@ -1764,7 +2111,9 @@ class PreTrainedModel(nn.Module, ModuleUtilsMixin, GenerationMixin, PushToHubMix
         """
         Resizes input token embeddings matrix of the model if `new_num_tokens != config.vocab_size`.
 
-        Takes care of tying weights embeddings afterwards if the model class has a `tie_weights()` method.
+        Takes care of tying weights embeddings afterwards if the model class has a `tie_weights()` method. Outside of
+        DeepSpeed ZeRO-3, the embeddings modules are resized in place, so that the parameters tied to them are resized
+        with them, and only the added tokens are initialized.
 
         Arguments:
             new_num_tokens (`int`, *optional*):
@@ -1799,7 +2148,7 @@ class PreTrainedModel(nn.Module, ModuleUtilsMixin, GenerationMixin, PushToHubMix
     def _resize_token_embeddings(self, new_num_tokens, pad_to_multiple_of=None):
         old_embeddings = self.get_input_embeddings()
         new_embeddings = self._get_resized_embeddings(old_embeddings, new_num_tokens, pad_to_multiple_of)
-        if hasattr(old_embeddings, "_hf_hook"):
+        if new_embeddings is not old_embeddings and hasattr(old_embeddings, "_hf_hook"):
             hook = old_embeddings._hf_hook
             add_hook_to_module(new_embeddings, hook)
         old_embeddings_requires_grad = old_embeddings.weight.requires_grad
@@ -1820,7 +2169,7 @@ class PreTrainedModel(nn.Module, ModuleUtilsMixin, GenerationMixin, PushToHubMix
         if self.get_output_embeddings() is not None and not self.config.tie_word_embeddings:
             old_lm_head = self.get_output_embeddings()
             new_lm_head = self._get_resized_lm_head(old_lm_head, new_num_tokens)
-            if hasattr(old_lm_head, "_hf_hook"):
+            if new_lm_head is not old_lm_head and hasattr(old_lm_head, "_hf_hook"):
                 hook = old_lm_head._hf_hook
                 add_hook_to_module(new_lm_head, hook)
             old_lm_head_requires_grad = old_lm_head.weight.requires_grad
@@ -1836,8 +2185,9 @@ class PreTrainedModel(nn.Module, ModuleUtilsMixin, GenerationMixin, PushToHubMix
         pad_to_multiple_of: Optional[int] = None,
     ) -> nn.Embedding:
         """
-        Build a resized Embedding Module from a provided token Embedding Module. Increasing the size will add newly
-        initialized vectors at the end. Reducing the size will remove vectors from the end
+        Resize a provided token Embedding Module. Increasing the size will add newly initialized vectors at the end.
+        Reducing the size will remove vectors from the end. The module is resized in place, except with DeepSpeed
+        ZeRO-3 where a new one is built.
 
         Args:
             old_embeddings (`torch.nn.Embedding`):
@@ -1900,6 +2250,11 @@ class PreTrainedModel(nn.Module, ModuleUtilsMixin, GenerationMixin, PushToHubMix
                 f" {nn.Embedding}."
             )
 
+        if not is_deepspeed_zero3_enabled():
+            # Resize the embeddings in place, which keeps the weights tied to them and the type of the module
+            self._resize_vocab_in_place(old_embeddings, new_num_tokens)
+            return old_embeddings
+
         # Build new embeddings
 
         # When using DeepSpeed ZeRO-3, we shouldn't create new embeddings with DeepSpeed init
@@ -1921,13 +2276,10 @@ class PreTrainedModel(nn.Module, ModuleUtilsMixin, GenerationMixin, PushToHubMix
         # numbers of tokens to copy
         n = min(old_num_tokens, new_num_tokens)
 
-        if is_deepspeed_zero3_enabled():
-            import deepspeed
+        import deepspeed
 
-            params = [old_embeddings.weight, new_embeddings.weight]
-            with deepspeed.zero.GatheredParameters(params, modifier_rank=0):
-                new_embeddings.weight.data[:n, :] = old_embeddings.weight.data[:n, :]
-        else:
+        params = [old_embeddings.weight, new_embeddings.weight]
+        with deepspeed.zero.GatheredParameters(params, modifier_rank=0):
             new_embeddings.weight.data[:n, :] = old_embeddings.weight.data[:n, :]
 
         return new_embeddings
@@ -1936,8 +2288,9 @@ class PreTrainedModel(nn.Module, ModuleUtilsMixin, GenerationMixin, PushToHubMix
         self, old_lm_head: nn.Linear, new_num_tokens: Optional[int] = None, transposed: Optional[bool] = False
     ) -> nn.Linear:
         """
-        Build a resized Linear Module from a provided old Linear Module. Increasing the size will add newly initialized
-        vectors at the end. Reducing the size will remove vectors from the end
+        Resize a provided old Linear Module. Increasing the size will add newly initialized vectors at the end.
+        Reducing the size will remove vectors from the end. The module is resized in place, except with DeepSpeed
+        ZeRO-3 where a new one is built.
 
         Args:
             old_lm_head (`torch.nn.Linear`):
@@ -1980,6 +2333,10 @@ class PreTrainedModel(nn.Module, ModuleUtilsMixin, GenerationMixin, PushToHubMix
                 f" {nn.Linear}."
             )
 
+        if not is_deepspeed_zero3_enabled():
+            self._resize_vocab_in_place(old_lm_head, new_num_tokens, transposed=transposed)
+            return old_lm_head
+
         # Build new lm head
         new_lm_head_shape = (old_lm_head_dim, new_num_tokens) if not transposed else (new_num_tokens, old_lm_head_dim)
         has_new_lm_head_bias = old_lm_head.bias is not None
@@ -2000,15 +2357,10 @@ class PreTrainedModel(nn.Module, ModuleUtilsMixin, GenerationMixin, PushToHubMix
 
         num_tokens_to_copy = min(old_num_tokens, new_num_tokens)
 
-        if is_deepspeed_zero3_enabled():
-            import deepspeed
+        import deepspeed
 
-            params = [old_lm_head.weight, old_lm_head.bias, new_lm_head.weight, new_lm_head.bias]
-            with deepspeed.zero.GatheredParameters(params, modifier_rank=0):
-                self._copy_lm_head_original_to_resized(
-                    new_lm_head, old_lm_head, num_tokens_to_copy, transposed, has_new_lm_head_bias
-                )
-        else:
+        params = [old_lm_head.weight, old_lm_head.bias, new_lm_head.weight, new_lm_head.bias]
+        with deepspeed.zero.GatheredParameters(params, modifier_rank=0):
             self._copy_lm_head_original_to_resized(
                 new_lm_head, old_lm_head, num_tokens_to_copy, transposed, has_new_lm_head_bias
             )
@@ -2028,6 +2380,63 @@ class PreTrainedModel(nn.Module, ModuleUtilsMixin, GenerationMixin, PushToHubMix
         if has_new_lm_head_bias:
             new_lm_head.bias.data[:num_tokens_to_copy] = old_lm_head.bias.data[:num_tokens_to_copy]
 
+    @torch.no_grad()
+    def _resize_vocab_in_place(self, module: Union[nn.Embedding, nn.Linear], new_num_tokens: int, transposed=False):
+        """
+        Resizes the vocabulary dimension of the weight (and bias) of an embedding or linear layer, which is their first
+        dimension (the second one of the weight if `transposed`), keeping the same module and parameters, so that the
+        weights tied to them, their hooks and references stay valid.
+
+        A single tensor of the new size is allocated for each parameter, the kept tokens are copied in it and the added
+        ones are initialized with `_init_weights`, by blocks of `_RESIZE_INIT_BLOCK_NUMEL` elements at most, instead
+        of initializing a whole new matrix first.
+        """
+        weight = module.weight
+        vocab_dim = 1 if transposed else 0
+        old_num_tokens = weight.shape[vocab_dim]
+        num_tokens_to_copy = min(old_num_tokens, new_num_tokens)
+        hidden_size = weight.shape[1 - vocab_dim]
+        # The bias of a transposed layer isn't indexed by tokens
+        bias = getattr(module, "bias", None) if not transposed else None
+
+        new_shape = (hidden_size, new_num_tokens) if transposed else (new_num_tokens, hidden_size)
+        new_weight = torch.empty(new_shape, device=weight.device, dtype=weight.dtype)
+        new_weight.narrow(vocab_dim, 0, num_tokens_to_copy).copy_(weight.narrow(vocab_dim, 0, num_tokens_to_copy))
+        if bias is not None:
+            new_bias = torch.empty(new_num_tokens, device=bias.device, dtype=bias.dtype)
+            new_bias[:num_tokens_to_copy] = bias[:num_tokens_to_copy]
+
+        block_size = max(_RESIZE_INIT_BLOCK_NUMEL // hidden_size, 1)
+        for start in range(num_tokens_to_copy, new_num_tokens if weight.device.type != "meta" else 0, block_size):
+            end = min(start + block_size, new_num_tokens)
+            # A layer of the same type with the tokens of the block, to initialize them like the model does
+            if isinstance(module, nn.Embedding):
+                block = nn.Embedding(end - start, hidden_size, device=weight.device, dtype=weight.dtype)
+            elif transposed:
+                block = nn.Linear(end - start, hidden_size, bias=False, device=weight.device, dtype=weight.dtype)
+            else:
+                block = nn.Linear(
+                    hidden_size, end - start, bias=bias is not None, device=weight.device, dtype=weight.dtype
+                )
+            self._init_weights(block)
+            new_weight.narrow(vocab_dim, start, end - start).copy_(block.weight)
+            if bias is not None:
+                new_bias[start:end] = block.bias
+            del block
+
+        weight.data = new_weight
+        if bias is not None:
+            bias.data = new_bias
+
+        if isinstance(module, nn.Embedding):
+            module.num_embeddings = new_num_tokens
+            if module.padding_idx is not None and module.padding_idx >= new_num_tokens:
+                module.padding_idx = None
+        elif transposed:
+            module.in_features = new_num_tokens
+        else:
+            module.out_features = new_num_tokens
+
     def resize_position_embeddings(self, new_num_position_embeddings: int):
         raise NotImplementedError(
             f"`resize_position_embeddings` is not implemented for {self.__class__}`. To implement it, you should "
@@ -2183,8 +2592,10 @@ class PreTrainedModel(nn.Module, ModuleUtilsMixin, GenerationMixin, PushToHubMix
         variant: Optional[str] = None,
         token: Optional[Union[str, bool]] = None,
         save_peft_format: bool = True,
+        async_save: bool = False,
+        base_checkpoint: Optional[Union[str, os.PathLike]] = None,
         **kwargs,
-    ):
+    ) -> Optional[Future]:
         """
         Save a model and its configuration file to a directory, so that it can be re-loaded using the
         [`~PreTrainedModel.from_pretrained`] class method.
@@ -2231,8 +2642,24 @@ class PreTrainedModel(nn.Module, ModuleUtilsMixin, GenerationMixin, PushToHubMix
                 For backward compatibility with PEFT library, in case adapter weights are attached to the model, all
                 keys of the state dict of adapters needs to be pre-pended with `base_model.model`. Advanced users can
                 disable this behaviours by setting `save_peft_format` to `False`.
+            async_save (`bool`, *optional*, defaults to `False`):
+                Whether or not to write the weights on a background thread. The weights are copied to the CPU (in
+                pinned memory for weights on a GPU) before returning, so the model can keep being updated, then the
+                checkpoint shards are written in parallel, followed by the index. The configuration files are written
+                before returning.
+            base_checkpoint (`str` or `os.PathLike`, *optional*):
+                Path to a local safetensors checkpoint of the same model, to save a delta checkpoint: only the weights
+                whose content differs from the ones of `base_checkpoint` are written, and the index of the checkpoint
+                maps the other weights to the files of `base_checkpoint` (with paths relative to `save_directory`).
+                The hashes of all the weights are stored in the index, so a delta checkpoint can itself be used as a
+                base checkpoint. [`~PreTrainedModel.from_pretrained`] loads delta checkpoints like any other local
+                checkpoint, as long as their base checkpoint is not moved relatively to them or deleted.
             kwargs (`Dict[str, Any]`, *optional*):
                 Additional key word arguments passed along to the [`~utils.PushToHubMixin.push_to_hub`] method.
+
+        Returns:
+            `Optional[concurrent.futures.Future]`: With `async_save=True`, a future that is done once all the weights
+            are written, and raises the errors of the write when calling its `result()` method. `None` otherwise.
         """
         use_auth_token = kwargs.pop("use_auth_token", None)
         ignore_metadata_errors = kwargs.pop("ignore_metadata_errors", False)
@@ -2271,6 +2698,11 @@ class PreTrainedModel(nn.Module, ModuleUtilsMixin, GenerationMixin, PushToHubMix
             is_main_process = kwargs.pop("save_config")
         if safe_serialization and not is_safetensors_available():
             raise ImportError("`safe_serialization` requires the `safetensors library: `pip install safetensors`.")
+        if base_checkpoint is not None and (not safe_serialization or _hf_peft_config_loaded):
+            raise ValueError(
+                "Delta checkpoints (`base_checkpoint`) can only be saved with `safe_serialization=True`, and not for "
+                "adapters."
+            )
 
         if os.path.isfile(save_directory):
             logger.error(f"Provided path ({save_directory}) should be a directory, not a file")
@@ -2418,8 +2850,33 @@ class PreTrainedModel(nn.Module, ModuleUtilsMixin, GenerationMixin, PushToHubMix
         else:
             weights_name = ADAPTER_SAFE_WEIGHTS_NAME if safe_serialization else ADAPTER_WEIGHTS_NAME
 
+        if base_checkpoint is not None:
+            base_weight_map, base_hashes = _get_checkpoint_tensor_hashes(base_checkpoint)
+            tensor_hashes = {
+                key: _tensor_hash(value) for key, value in state_dict.items() if isinstance(value, torch.Tensor)
+            }
+            # The weights that did not change are read from the files of the base checkpoint
+            base_keys = [key for key, value in tensor_hashes.items() if base_hashes.get(key) == value]
+            state_dict = {key: value for key, value in state_dict.items() if key not in base_keys}
+
         shards, index = shard_checkpoint(state_dict, max_shard_size=max_shard_size, weights_name=weights_name)
 
+        if base_checkpoint is not None:
+            # Delta checkpoints are always saved with an index, which maps each weight to its file
+            if index is None:
+                shard_file = weights_name.replace(".safetensors", "-00001-of-00001.safetensors")
+                shards = {shard_file: shards[weights_name]} if len(state_dict) > 0 else {}
+                total_size = sum(
+                    value.numel() * dtype_byte_size(value.dtype)
+                    for value in state_dict.values()
+                    if isinstance(value, torch.Tensor)
+                )
+                index = {"metadata": {"total_size": total_size}, "weight_map": dict.fromkeys(state_dict, shard_file)}
+            for key in base_keys:
+                index["weight_map"][key] = os.path.relpath(base_weight_map[key], save_directory)
+            index["metadata"]["base_checkpoint"] = os.path.relpath(base_checkpoint, save_directory)
+            index["metadata"]["tensor_hashes"] = tensor_hashes
+
         # Clean the folder from a previous save
         for filename in os.listdir(save_directory):
             full_filename = os.path.join(save_directory, filename)
@@ -2440,25 +2897,46 @@ class PreTrainedModel(nn.Module, ModuleUtilsMixin, GenerationMixin, PushToHubMix
             ):
                 os.remove(full_filename)
 
-        # Save the model
-        for shard_file, shard in shards.items():
-            if safe_serialization:
-                # At some point we will need to deal better with save_function (used for TPU and other distributed
-                # joyfulness), but for now this enough.
-                safe_save_file(shard, os.path.join(save_directory, shard_file), metadata={"format": "pt"})
-            else:
-                save_function(shard, os.path.join(save_directory, shard_file))
+        save_index_file = None
+        if index is not None:
+            save_index_file = SAFE_WEIGHTS_INDEX_NAME if safe_serialization else WEIGHTS_INDEX_NAME
+            save_index_file = os.path.join(save_directory, _add_variant(save_index_file, variant))
+
+        # Save the model, and the index as well
+        if async_save:
+            # Copy the weights now, so that the model can keep being updated while they are written
+            shards = copy_tensors_to_cpu(shards)
+            future = save_in_background(
+                _save_shards,
+                shards,
+                save_directory,
+                safe_serialization=safe_serialization,
+                save_function=save_function,
+                index=index,
+                index_file=save_index_file,
+                num_workers=min(os.cpu_count() or 1, 8),
+            )
+        else:
+            future = None
+            _save_shards(
+                shards,
+                save_directory,
+                safe_serialization=safe_serialization,
+                save_function=save_function,
+                index=index,
+                index_file=save_index_file,
+            )
 
         if index is None:
             path_to_weights = os.path.join(save_directory, weights_name)
             logger.info(f"Model weights saved in {path_to_weights}")
+        elif base_checkpoint is not None:
+            logger.info(
+                f"Saved {len(state_dict)} weights that changed since {base_checkpoint} in {len(shards)} checkpoint "
+                f"shards, the other ones are read from its files. You can find where each parameters has been saved in "
+                f"the index located at {save_index_file}."
+            )
         else:
-            save_index_file = SAFE_WEIGHTS_INDEX_NAME if safe_serialization else WEIGHTS_INDEX_NAME
-            save_index_file = os.path.join(save_directory, _add_variant(save_index_file, variant))
-            # Save the index as well
-            with open(save_index_file, "w", encoding="utf-8") as f:
-                content = json.dumps(index, indent=2, sort_keys=True) + "\n"
-                f.write(content)
             logger.info(
                 f"The model is bigger than the maximum size per checkpoint ({max_shard_size}) and is going to be "
                 f"split in {len(shards)} checkpoint shards. You can find where each parameters has been saved in the "
@@ -2466,6 +2944,10 @@ class PreTrainedModel(nn.Module, ModuleUtilsMixin, GenerationMixin, PushToHubMix
             )
 
         if push_to_hub:
+            if future is not None:
+                # The weights have to be written before being uploaded
+                future.result()
+
             # Eventually create an empty model card
             model_card = create_and_tag_model_card(
                 repo_id, self.model_tags, token=token, ignore_metadata_errors=ignore_metadata_errors
@@ -2482,6 +2964,8 @@ class PreTrainedModel(nn.Module, ModuleUtilsMixin, GenerationMixin, PushToHubMix
                 token=token,
             )
 
+        return future
+
     @wraps(PushToHubMixin.push_to_hub)
     def push_to_hub(self, *args, **kwargs):
         tags = self.model_tags if self.model_tags is not None else []
@@ -2703,7 +3187,37 @@ class PreTrainedModel(nn.Module, ModuleUtilsMixin, GenerationMixin, PushToHubMix
 
             low_cpu_mem_usage(`bool`, *optional*):
                 Tries to not use more than 1x model size in CPU memory (including peak memory) while loading the model.
-                This is an experimental feature and a subject to change at any moment.
+                The model is built on the meta device, without allocating nor initializing its weights, and only the
+                weights missing from the checkpoint are then created and initialized. When Accelerate is installed and
+                the argument is not set, a PyTorch checkpoint that contains all the weights of the model is loaded
+                this way, unless the `__init__` of the model does not support the meta device. Pass `False` to always
+                build the model with all its weights on the CPU before loading the checkpoint.
+            prefetch_shards (`int`, *optional*, defaults to 0):
+                For sharded checkpoints, the number of shards read and deserialized on background threads while the
+                weights of the current one are loaded in the model. Each prefetched shard stays in CPU memory until it
+                is loaded, so the peak memory usage grows by up to `prefetch_shards` shards. With the default of 0, the
+                shards are read one after the other.
+            mmap_weights (`bool`, *optional*, defaults to `False`):
+                Whether or not to keep the weights of safetensors checkpoints in the memory mapped checkpoint files
+                instead of copying them, when they already have the right dtype. The weights are then only read from
+                the disk when they are first used, and their memory is shared between the processes loading the same
+                files. Modifying the weights does not change the files. This loads the model on the CPU and implies
+                `low_cpu_mem_usage=True`.
+            lazy_loading (`bool`, *optional*, defaults to `False`):
+                Whether or not to only load the weights of the layers of the model (the modules of its
+                `nn.ModuleList`s) the first time they are used, which makes `from_pretrained` return much faster. The
+                other weights are loaded right away, and the weights of the next layers are read in the background
+                while a layer runs. This requires a safetensors checkpoint, loads the model on the CPU and implies
+                `low_cpu_mem_usage=True`. The model should not be moved or converted to another dtype before all its
+                layers have run once.
+            shared_memory_loading (`bool`, *optional*, defaults to `False`):
+                Whether or not to share the weights between the processes of the host loading the same checkpoint
+                with this option. The first of them reads the checkpoint and writes its weights, converted to the
+                dtype of the model, in shared memory (in `/dev/shm`), while the other ones wait for it, and all of
+                them then memory map these files without copying them. They are removed when this first process
+                exits. When the weights can't be shared (not on Linux, or after
+                `TRANSFORMERS_SHARED_MEMORY_LOADING_TIMEOUT` seconds), the checkpoint is loaded as usual. This loads
+                the model on the CPU and implies `low_cpu_mem_usage=True`.
             torch_dtype (`str` or `torch.dtype`, *optional*):
                 Override the default `torch.dtype` and load the model under a specific `dtype`. The different options
                 are:
@@ -2833,6 +3347,10 @@ class PreTrainedModel(nn.Module, ModuleUtilsMixin, GenerationMixin, PushToHubMix
         _fast_init = kwargs.pop("_fast_init", True)
         torch_dtype = kwargs.pop("torch_dtype", None)
         low_cpu_mem_usage = kwargs.pop("low_cpu_mem_usage", None)
+        prefetch_shards = kwargs.pop("prefetch_shards", 0)
+        mmap_weights = kwargs.pop("mmap_weights", False)
+        lazy_loading = kwargs.pop("lazy_loading", False)
+        shared_memory_loading = kwargs.pop("shared_memory_loading", False)
         device_map = kwargs.pop("device_map", None)
         max_memory = kwargs.pop("max_memory", None)
         offload_folder = kwargs.pop("offload_folder", None)
@@ -2941,6 +3459,26 @@ class PreTrainedModel(nn.Module, ModuleUtilsMixin, GenerationMixin, PushToHubMix
             elif not low_cpu_mem_usage:
                 raise ValueError("Passing along a `device_map` requires `low_cpu_mem_usage=True`")
 
+        if mmap_weights or lazy_loading or shared_memory_loading:
+            option = "mmap_weights" if mmap_weights else "lazy_loading" if lazy_loading else "shared_memory_loading"
+            if device_map is not None or load_in_8bit or load_in_4bit or quantization_config is not None:
+                raise ValueError(
+                    f"`{option}=True` keeps the weights on the CPU, it is not compatible with a `device_map` or with "
+                    "quantization."
+                )
+            if lazy_loading and (from_tf or from_flax or ignore_mismatched_sizes):
+                raise ValueError(
+                    "`lazy_loading=True` is not compatible with `from_tf`, `from_flax` or `ignore_mismatched_sizes`."
+                )
+            if shared_memory_loading and (lazy_loading or from_tf or from_flax):
+                raise ValueError(
+                    "`shared_memory_loading=True` is not compatible with `lazy_loading`, `from_tf` or `from_flax`."
+                )
+            if low_cpu_mem_usage is None:
+                low_cpu_mem_usage = True
+            elif not low_cpu_mem_usage:
+                raise ValueError(f"Passing `{option}=True` requires `low_cpu_mem_usage=True`")
+
         if low_cpu_mem_usage:
             if is_deepspeed_zero3_enabled():
                 raise ValueError(
@@ -3304,11 +3842,28 @@ class PreTrainedModel(nn.Module, ModuleUtilsMixin, GenerationMixin, PushToHubMix
 
         from_pt = not (from_tf | from_flax)
 
+        # The model is first built on the meta device, and only built again with all its weights on the CPU if its
+        # `__init__` does not support the meta device or if some of its weights are missing from the checkpoint.
+        build_on_meta_by_default = (
+            low_cpu_mem_usage is None
+            and from_pt
+            and _fast_init
+            and state_dict is None
+            and not ignore_mismatched_sizes
+            and is_accelerate_available()
+            and not is_deepspeed_zero3_enabled()
+        )
+        if build_on_meta_by_default:
+            low_cpu_mem_usage = True
+
         # load pt weights early so that we know which dtype to init the model under
         if from_pt:
             if not is_sharded and state_dict is None:
-                # Time to load the checkpoint
-                state_dict = load_state_dict(resolved_archive_file)
+                # Time to load the checkpoint (only its keys and dtype are used before loading it again when
+                # `low_cpu_mem_usage=True`, so no need to copy it)
+                state_dict = load_state_dict(
+                    resolved_archive_file, mmap_weights=mmap_weights or lazy_loading or bool(low_cpu_mem_usage)
+                )
 
             # set dtype to instantiate the model under:
             # 1. If torch_dtype is not None, we use that dtype
@@ -3351,7 +3906,9 @@ class PreTrainedModel(nn.Module, ModuleUtilsMixin, GenerationMixin, PushToHubMix
                 loaded_state_dict_keys = sharded_metadata["all_checkpoint_keys"]
             else:
                 loaded_state_dict_keys = list(state_dict.keys())
-            if low_cpu_mem_usage or (use_keep_in_fp32_modules and is_accelerate_available()):
+            if (low_cpu_mem_usage and not build_on_meta_by_default) or (
+                use_keep_in_fp32_modules and is_accelerate_available()
+            ):
                 # In case some weights need to be kept in float32 and accelerate is not installed,
                 # we later on want to take the path where state_dict is not None, that is the one
                 # that do not require accelerate.
@@ -3367,17 +3924,33 @@ class PreTrainedModel(nn.Module, ModuleUtilsMixin, GenerationMixin, PushToHubMix
 
             logger.info("Detected DeepSpeed ZeRO-3: activating zero.init() for this model")
             init_contexts = [deepspeed.zero.Init(config_dict_or_path=deepspeed_config())] + init_contexts
-        elif low_cpu_mem_usage:
-            init_contexts.append(init_empty_weights())
+        elif low_cpu_mem_usage and not build_on_meta_by_default:
+            init_contexts.append(_init_empty_weights())
 
         config = copy.deepcopy(config)  # We do not want to modify the config inplace in from_pretrained.
         config = cls._autoset_attn_implementation(
             config, use_flash_attention_2=use_flash_attention_2, torch_dtype=torch_dtype, device_map=device_map
         )
 
-        with ContextManagers(init_contexts):
-            # Let's make sure we don't run the init function of buffer modules
-            model = cls(config, *model_args, **model_kwargs)
+        model = None
+        if build_on_meta_by_default:
+            try:
+                with ContextManagers([no_init_weights(_enable=_fast_init), _init_empty_weights()]):
+                    model = cls(copy.deepcopy(config), *model_args, **model_kwargs)
+            except Exception as e:
+                logger.info(f"{cls.__name__} cannot be built on the meta device ({e}), building it on the CPU.")
+            if model is not None and not _checkpoint_covers_model(model, loaded_state_dict_keys):
+                logger.info(f"Some weights of {cls.__name__} are not in the checkpoint, building it on the CPU.")
+                model = None
+            if model is None:
+                low_cpu_mem_usage = None
+            else:
+                state_dict = None
+
+        if model is None:
+            with ContextManagers(init_contexts):
+                # Let's make sure we don't run the init function of buffer modules
+                model = cls(config, *model_args, **model_kwargs)
 
         # make sure we use the model's config since the __init__ call might have copied it
         config = model.config
@@ -3520,6 +4093,10 @@ class PreTrainedModel(nn.Module, ModuleUtilsMixin, GenerationMixin, PushToHubMix
                 dtype=torch_dtype,
                 hf_quantizer=hf_quantizer,
                 keep_in_fp32_modules=keep_in_fp32_modules,
+                prefetch_shards=prefetch_shards,
+                mmap_weights=mmap_weights,
+                lazy_loading=lazy_loading,
+                shared_memory_loading=shared_memory_loading,
             )
 
         # make sure token embedding weights are still tied if needed
@@ -3605,6 +4182,10 @@ class PreTrainedModel(nn.Module, ModuleUtilsMixin, GenerationMixin, PushToHubMix
         dtype=None,
         hf_quantizer=None,
         keep_in_fp32_modules=None,
+        prefetch_shards=0,
+        mmap_weights=False,
+        lazy_loading=False,
+        shared_memory_loading=False,
     ):
         is_safetensors = False
 
@@ -3675,7 +4256,7 @@ class PreTrainedModel(nn.Module, ModuleUtilsMixin, GenerationMixin, PushToHubMix
         unexpected_keys = sorted(unexpected_keys - model_buffers)
 
         model.tie_weights()
-        if device_map is None and not is_fsdp_enabled() and not is_deepspeed_zero3_enabled():
+        if device_map is None and not low_cpu_mem_usage and not is_fsdp_enabled() and not is_deepspeed_zero3_enabled():
             ptrs = collections.defaultdict(list)
             for name, tensor in model.state_dict().items():
                 id_tensor = id_tensor_storage(tensor)
@@ -3684,7 +4265,7 @@ class PreTrainedModel(nn.Module, ModuleUtilsMixin, GenerationMixin, PushToHubMix
             # These are all the pointers of shared tensors.
             tied_params = [names for _, names in ptrs.items() if len(names) > 1]
         else:
-            # id function doesn't work for meta tensor so we need this function
+            # id function doesn't work for meta tensor (they all share the same storage) so we need this function
             tied_params = find_tied_parameters(model)
 
         for group in tied_params:
@@ -3709,6 +4290,10 @@ class PreTrainedModel(nn.Module, ModuleUtilsMixin, GenerationMixin, PushToHubMix
         # retrieve weights on meta device and put them back on CPU.
         # This is not ideal in terms of memory, but if we don't do that not, we can't initialize them in the next step
         if low_cpu_mem_usage:
+            # Tied parameters missing from the checkpoint are materialized once and shared before being initialized,
+            # `_init_weights` may only initialize one of them.
+            tied_groups = {name: group for group in tied_params for name in group}
+            materialized_keys = set()
             for key in missing_keys:
                 if key in list(model_state_dict.keys()):
                     key = key
@@ -3716,6 +4301,8 @@ class PreTrainedModel(nn.Module, ModuleUtilsMixin, GenerationMixin, PushToHubMix
                     key = f"{prefix}.{key}"
                 elif key.startswith(prefix) and ".".join(key.split(".")[1:]) in list(model_state_dict.keys()):
                     key = ".".join(key.split(".")[1:])
+                if key in materialized_keys:
+                    continue
                 param = model_state_dict[key]
 
                 # upcast in fp32 if any
@@ -3730,7 +4317,7 @@ class PreTrainedModel(nn.Module, ModuleUtilsMixin, GenerationMixin, PushToHubMix
                     target_dtype = torch.float32
 
                 if param.device == torch.device("meta"):
-                    value = torch.empty(*param.size(), dtype=target_dtype)
+                    value = torch.empty(param.size(), dtype=target_dtype)
                     if (
                         hf_quantizer is None
                         or getattr(hf_quantizer, "requires_parameters_quantization", False)
@@ -3739,6 +4326,11 @@ class PreTrainedModel(nn.Module, ModuleUtilsMixin, GenerationMixin, PushToHubMix
                         )
                     ):
                         set_module_tensor_to_device(model, key, "cpu", value)
+                        for tied_key in tied_groups.get(key, []):
+                            if tied_key != key:
+                                module_name, _, param_name = tied_key.rpartition(".")
+                                setattr(model.get_submodule(module_name), param_name, model.get_parameter(key))
+                                materialized_keys.add(tied_key)
                     else:
                         hf_quantizer.create_quantized_param(model, value, key, "cpu", state_dict)
 
@@ -3900,14 +4492,57 @@ class PreTrainedModel(nn.Module, ModuleUtilsMixin, GenerationMixin, PushToHubMix
             else:
                 disk_only_shard_files = []
 
-            if len(resolved_archive_file) > 1:
-                resolved_archive_file = logging.tqdm(resolved_archive_file, desc="Loading checkpoint shards")
-            for shard_file in resolved_archive_file:
-                # Skip the load for shards that only contain disk-offloaded weights when using safetensors for the offload.
-                if shard_file in disk_only_shard_files:
-                    continue
-                state_dict = load_state_dict(shard_file)
+            if lazy_loading:
+                if not all(f.endswith(".safetensors") for f in resolved_archive_file):
+                    raise ValueError("`lazy_loading=True` requires a checkpoint in the safetensors format.")
+                if sharded_metadata is None:
+                    weight_map = {key: resolved_archive_file[0] for key in original_loaded_keys}
+                else:
+                    weight_map = {key: os.path.join(folder, f) for key, f in sharded_metadata["weight_map"].items()}
+                checkpoint_keys = {_fix_key(key): (weight_map[key], key) for key in original_loaded_keys}
+                _LazyWeightsLoader(
+                    model_to_load,
+                    checkpoint_keys,
+                    loaded_keys,
+                    start_prefix,
+                    expected_keys,
+                    dtype=dtype,
+                    keep_in_fp32_modules=keep_in_fp32_modules,
+                )
+                resolved_archive_file = []
 
+            # Skip the load for shards that only contain disk-offloaded weights when using safetensors for the offload.
+            shard_files = [f for f in resolved_archive_file if f not in disk_only_shard_files]
+            # The progress bar is updated by hand since wrapping the iterator would keep the last state dict alive
+            progress_bar = logging.tqdm(
+                total=len(shard_files), desc="Loading checkpoint shards", disable=len(resolved_archive_file) <= 1
+            )
+            delta_shard_keys = None
+            if sharded_metadata is not None and "base_checkpoint" in sharded_metadata:
+                # The files of the base of a delta checkpoint can contain outdated values of the weights saved in the
+                # delta
+                delta_shard_keys = collections.defaultdict(set)
+                for key, shard_file in sharded_metadata["weight_map"].items():
+                    delta_shard_keys[shard_file].add(key)
+            files_to_load = shard_files
+            if shared_memory_loading and len(shard_files) > 0:
+                shared_files = get_shared_memory_checkpoint_files(
+                    shard_files,
+                    dtype=dtype if dtype is not None else torch.get_default_dtype(),
+                    keep_in_fp32_modules=keep_in_fp32_modules,
+                )
+                if shared_files is not None:
+                    files_to_load = shared_files
+            state_dicts = load_state_dicts(
+                files_to_load,
+                prefetch_shards=prefetch_shards,
+                mmap_weights=mmap_weights or files_to_load is not shard_files,
+            )
+            for shard_file, state_dict in zip(shard_files, state_dicts):
+                if delta_shard_keys is not None:
+                    state_dict = {
+                        key: value for key, value in state_dict.items() if key in delta_shard_keys[shard_file]
+                    }
                 # Mistmatched keys contains tuples key/shape1/shape2 of weights in the checkpoint that have a shape not
                 # matching the weights in the model.
                 mismatched_keys += _find_mismatched_keys(
@@ -3924,7 +4559,7 @@ class PreTrainedModel(nn.Module, ModuleUtilsMixin, GenerationMixin, PushToHubMix
                             if param.device == torch.device("meta"):
                                 if hf_quantizer is None:
                                     set_module_tensor_to_device(
-                                        model_to_load, key, "cpu", torch.empty(*param.size(), dtype=dtype)
+                                        model_to_load, key, "cpu", torch.empty(param.size(), dtype=dtype)
                                     )
                                 else:
                                     hf_quantizer.create_quantized_param(model, param, key, "cpu", state_dict)
@@ -3950,9 +4585,12 @@ class PreTrainedModel(nn.Module, ModuleUtilsMixin, GenerationMixin, PushToHubMix
                 else:
                     error_msgs += _load_state_dict_into_model(model_to_load, state_dict, start_prefix)
 
-                # force memory release
+                # force memory release before loading the next shard
                 del state_dict
-                gc.collect()
+                if len(shard_files) > 1:
+                    gc.collect()
+                progress_bar.update(1)
+            progress_bar.close()
 
             if offload_index is not None and len(offload_index) > 0:
                 if model != model_to_load:
@@ -3974,6 +4612,17 @@ class PreTrainedModel(nn.Module, ModuleUtilsMixin, GenerationMixin, PushToHubMix
                 load_offloaded_weights(model_to_load, state_dict_index, state_dict_folder)
                 shutil.rmtree(state_dict_folder)
 
+        if low_cpu_mem_usage and device_map is None and hf_quantizer is None:
+            # The weights on the meta device were replaced by the loaded ones instead of being filled, so share the
+            # loaded weight again between all the parameters it was shared with.
+            for group in tied_params:
+                params = [model.get_parameter(name) for name in group]
+                loaded_param = next((param for param in params if param.device != torch.device("meta")), None)
+                for name, param in zip(group, params):
+                    if loaded_param is not None and param is not loaded_param:
+                        module_name, _, param_name = name.rpartition(".")
+                        setattr(model.get_submodule(module_name), param_name, loaded_param)
+
         if len(error_msgs) > 0:
             error_msg = "\n\t".join(error_msgs)
             if "size mismatch" in error_msg:
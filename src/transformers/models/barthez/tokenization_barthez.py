@@ -257,9 +257,10 @@ class BarthezTokenizer(PreTrainedTokenizer):
         current_sub_tokens = []
         out_string = ""
         prev_is_special = False
+        all_special_tokens = set(self.all_special_tokens)
         for token in tokens:
             # make sure that special tokens are not decoded using sentencepiece model
-            if token in self.all_special_tokens:
+            if token in all_special_tokens:
                 if not prev_is_special:
                     out_string += " "
                 out_string += self.sp_model.decode(current_sub_tokens) + token
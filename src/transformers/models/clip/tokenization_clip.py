@@ -22,7 +22,18 @@ from typing import List, Optional, Tuple
 
 import regex as re
 
-from ...tokenization_utils import AddedToken, PreTrainedTokenizer, _is_control, _is_punctuation, _is_whitespace
+from ...tokenization_utils import (
+    _CHINESE_CHARS_PATTERN,
+    _CLEAN_TEXT_TABLE,
+    _PUNCTUATION_SPLIT_TABLE,
+    _STRIP_ACCENTS_TABLE,
+    AddedToken,
+    BytePairEncoder,
+    PreTrainedTokenizer,
+    _is_control,  # noqa: F401
+    _is_punctuation,
+    _is_whitespace,  # noqa: F401
+)
 from ...utils import logging
 
 
@@ -77,20 +88,6 @@ def bytes_to_unicode():
     return dict(zip(bs, cs))
 
 
-def get_pairs(word):
-    """
-    Return set of symbol pairs in a word.
-
-    Word is represented as tuple of symbols (symbols being variable-length strings).
-    """
-    pairs = set()
-    prev_char = word[0]
-    for char in word[1:]:
-        pairs.add((prev_char, char))
-        prev_char = char
-    return pairs
-
-
 def whitespace_clean(text):
     text = re.sub(r"\s+", " ", text)
     text = text.strip()
@@ -171,6 +168,23 @@ class BasicTokenizer(object):
         # prevents treating the same character with different unicode codepoints as different characters
         unicode_normalized_text = unicodedata.normalize("NFC", text)
         orig_tokens = whitespace_tokenize(unicode_normalized_text)
+        if never_split.isdisjoint(orig_tokens):
+            # No token has to be kept as is, before or after normalization: the whole text is lower cased, stripped
+            # and split at once, which gives the same tokens since none of these steps looks across the spaces between
+            # them.
+            text = " ".join(orig_tokens)
+            if self.do_lower_case:
+                text = text.lower()
+                if self.strip_accents is not False:
+                    text = self._run_strip_accents(text)
+            elif self.strip_accents:
+                text = self._run_strip_accents(text)
+            normalized_tokens = text.split()
+            if never_split.isdisjoint(normalized_tokens):
+                if self.do_split_on_punc:
+                    return text.translate(_PUNCTUATION_SPLIT_TABLE).split()
+                return normalized_tokens
+
         split_tokens = []
         for token in orig_tokens:
             if token not in never_split:
@@ -187,19 +201,17 @@ class BasicTokenizer(object):
 
     def _run_strip_accents(self, text):
         """Strips accents from a piece of text."""
-        text = unicodedata.normalize("NFD", text)
-        output = []
-        for char in text:
-            cat = unicodedata.category(char)
-            if cat == "Mn":
-                continue
-            output.append(char)
-        return "".join(output)
+        if text.isascii():
+            return text
+        return unicodedata.normalize("NFD", text).translate(_STRIP_ACCENTS_TABLE)
 
     def _run_split_on_punc(self, text, never_split=None):
         """Splits punctuation on a piece of text."""
         if not self.do_split_on_punc or (never_split is not None and text in never_split):
             return [text]
+        if " " not in text:
+            # The only spaces are then the ones added around the punctuation characters
+            return [piece for piece in text.translate(_PUNCTUATION_SPLIT_TABLE).split(" ") if piece]
         chars = list(text)
         i = 0
         start_new_word = True
@@ -220,16 +232,7 @@ class BasicTokenizer(object):
 
     def _tokenize_chinese_chars(self, text):
         """Adds whitespace around any CJK character."""
-        output = []
-        for char in text:
-            cp = ord(char)
-            if self._is_chinese_char(cp):
-                output.append(" ")
-                output.append(char)
-                output.append(" ")
-            else:
-                output.append(char)
-        return "".join(output)
+        return _CHINESE_CHARS_PATTERN.sub(r" \g<0> ", text)
 
     def _is_chinese_char(self, cp):
         """Checks whether CP is the codepoint of a CJK character."""
@@ -257,16 +260,7 @@ class BasicTokenizer(object):
 
     def _clean_text(self, text):
         """Performs invalid character removal and whitespace cleanup on text."""
-        output = []
-        for char in text:
-            cp = ord(char)
-            if cp == 0 or cp == 0xFFFD or _is_control(char):
-                continue
-            if _is_whitespace(char):
-                output.append(" ")
-            else:
-                output.append(char)
-        return "".join(output)
+        return text.translate(_CLEAN_TEXT_TABLE)
 
 
 class CLIPTokenizer(PreTrainedTokenizer):
@@ -333,7 +327,9 @@ class CLIPTokenizer(PreTrainedTokenizer):
             bpe_merges = merges_handle.read().strip().split("\n")[1 : 49152 - 256 - 2 + 1]
         bpe_merges = [tuple(merge.split()) for merge in bpe_merges]
         self.bpe_ranks = dict(zip(bpe_merges, range(len(bpe_merges))))
-        self.cache = {"<|startoftext|>": "<|startoftext|>", "<|endoftext|>": "<|endoftext|>"}
+        self.byte_pair_encoder = BytePairEncoder(
+            self.bpe_ranks, end_of_word_suffix="</w>", never_split=["<|startoftext|>", "<|endoftext|>"]
+        )
 
         self.pat = re.compile(
             r"""<\|startoftext\|>|<\|endoftext\|>|'s|'t|'re|'ve|'m|'ll|'d|[\p{L}]+|[\p{N}]|[^\s\p{L}\p{N}]+""",
@@ -435,46 +431,7 @@ class CLIPTokenizer(PreTrainedTokenizer):
         return len(bos_token + token_ids_0 + eos_token + eos_token + token_ids_1 + eos_token) * [0]
 
     def bpe(self, token):
-        if token in self.cache:
-            return self.cache[token]
-        word = tuple(token[:-1]) + (token[-1] + "</w>",)
-        pairs = get_pairs(word)
-
-        if not pairs:
-            return token + "</w>"
-
-        while True:
-            bigram = min(pairs, key=lambda pair: self.bpe_ranks.get(pair, float("inf")))
-            if bigram not in self.bpe_ranks:
-                break
-            first, second = bigram
-            new_word = []
-            i = 0
-            while i < len(word):
-                try:
-                    j = word.index(first, i)
-                except ValueError:
-                    new_word.extend(word[i:])
-                    break
-                else:
-                    new_word.extend(word[i:j])
-                    i = j
-
-                if word[i] == first and i < len(word) - 1 and word[i + 1] == second:
-                    new_word.append(first + second)
-                    i += 2
-                else:
-                    new_word.append(word[i])
-                    i += 1
-            new_word = tuple(new_word)
-            word = new_word
-            if len(word) == 1:
-                break
-            else:
-                pairs = get_pairs(word)
-        word = " ".join(word)
-        self.cache[token] = word
-        return word
+        return self.byte_pair_encoder(token)
 
     def _tokenize(self, text):
         """Tokenize a string."""
@@ -327,9 +327,10 @@ class CodeLlamaTokenizer(PreTrainedTokenizer):
 
         current_sub_tokens = []
         out_string = ""
+        all_special_tokens = set(self.all_special_tokens)
         for _, token in enumerate(tokens):
             # make sure that special tokens are not decoded using sentencepiece model
-            if token in self.all_special_tokens:
+            if token in all_special_tokens:
                 out_string += self.sp_model.decode(current_sub_tokens) + token
                 current_sub_tokens = []
             else:
@@ -18,7 +18,17 @@ import os
 import unicodedata
 from typing import List, Optional, Tuple
 
-from ...tokenization_utils import PreTrainedTokenizer, _is_control, _is_punctuation, _is_whitespace
+from ...tokenization_utils import (
+    _CHINESE_CHARS_PATTERN,
+    _CLEAN_TEXT_TABLE,
+    _PUNCTUATION_SPLIT_TABLE,
+    _STRIP_ACCENTS_TABLE,
+    PreTrainedTokenizer,
+    Trie,
+    _is_control,  # noqa: F401
+    _is_punctuation,
+    _is_whitespace,  # noqa: F401
+)
 from ...utils import logging
 
 
@@ -373,6 +383,23 @@ class BasicTokenizer(object):
         # prevents treating the same character with different unicode codepoints as different characters
         unicode_normalized_text = unicodedata.normalize("NFC", text)
         orig_tokens = whitespace_tokenize(unicode_normalized_text)
+        if never_split.isdisjoint(orig_tokens):
+            # No token has to be kept as is, before or after normalization: the whole text is lower cased, stripped
+            # and split at once, which gives the same tokens since none of these steps looks across the spaces between
+            # them.
+            text = " ".join(orig_tokens)
+            if self.do_lower_case:
+                text = text.lower()
+                if self.strip_accents is not False:
+                    text = self._run_strip_accents(text)
+            elif self.strip_accents:
+                text = self._run_strip_accents(text)
+            normalized_tokens = text.split()
+            if never_split.isdisjoint(normalized_tokens):
+                if self.do_split_on_punc:
+                    return text.translate(_PUNCTUATION_SPLIT_TABLE).split()
+                return normalized_tokens
+
         split_tokens = []
         for token in orig_tokens:
             if token not in never_split:
@@ -389,19 +416,17 @@ class BasicTokenizer(object):
 
     def _run_strip_accents(self, text):
         """Strips accents from a piece of text."""
-        text = unicodedata.normalize("NFD", text)
-        output = []
-        for char in text:
-            cat = unicodedata.category(char)
-            if cat == "Mn":
-                continue
-            output.append(char)
-        return "".join(output)
+        if text.isascii():
+            return text
+        return unicodedata.normalize("NFD", text).translate(_STRIP_ACCENTS_TABLE)
 
     def _run_split_on_punc(self, text, never_split=None):
         """Splits punctuation on a piece of text."""
         if not self.do_split_on_punc or (never_split is not None and text in never_split):
             return [text]
+        if " " not in text:
+            # The only spaces are then the ones added around the punctuation characters
+            return [piece for piece in text.translate(_PUNCTUATION_SPLIT_TABLE).split(" ") if piece]
         chars = list(text)
         i = 0
         start_new_word = True
@@ -422,16 +447,7 @@ class BasicTokenizer(object):
 
     def _tokenize_chinese_chars(self, text):
         """Adds whitespace around any CJK character."""
-        output = []
-        for char in text:
-            cp = ord(char)
-            if self._is_chinese_char(cp):
-                output.append(" ")
-                output.append(char)
-                output.append(" ")
-            else:
-                output.append(char)
-        return "".join(output)
+        return _CHINESE_CHARS_PATTERN.sub(r" \g<0> ", text)
 
     def _is_chinese_char(self, cp):
         """Checks whether CP is the codepoint of a CJK character."""
@@ -459,16 +475,7 @@ class BasicTokenizer(object):
 
     def _clean_text(self, text):
         """Performs invalid character removal and whitespace cleanup on text."""
-        output = []
-        for char in text:
-            cp = ord(char)
-            if cp == 0 or cp == 0xFFFD or _is_control(char):
-                continue
-            if _is_whitespace(char):
-                output.append(" ")
-            else:
-                output.append(char)
-        return "".join(output)
+        return text.translate(_CLEAN_TEXT_TABLE)
 
 
 # Copied from transformers.models.bert.tokenization_bert.WordpieceTokenizer
@@ -479,6 +486,29 @@ class WordpieceTokenizer(object):
         self.vocab = vocab
         self.unk_token = unk_token
         self.max_input_chars_per_word = max_input_chars_per_word
+        self._tries = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # The tries are built again from the vocabulary when needed
+        state["_tries"] = None
+        return state
+
+    def _get_tries(self):
+        """
+        Returns the prefix tries of the vocabulary: one with all the tokens, for the start of the words, and one with the
+        tokens starting with `##`, without this prefix, for the rest of the words. They are built again if the vocabulary
+        changes.
+        """
+        tries = getattr(self, "_tries", None)
+        if tries is None or tries[0] is not self.vocab or tries[1] != len(self.vocab):
+            start_trie, continuation_trie = Trie(), Trie()
+            for token in self.vocab:
+                start_trie.add(token)
+                if token.startswith("##"):
+                    continuation_trie.add(token[2:])
+            tries = self._tries = (self.vocab, len(self.vocab), start_trie.data, continuation_trie.data)
+        return tries[2:]
 
     def tokenize(self, text):
         """
@@ -496,33 +526,36 @@ class WordpieceTokenizer(object):
         """
 
         output_tokens = []
+        tries = None
         for token in whitespace_tokenize(text):
-            chars = list(token)
-            if len(chars) > self.max_input_chars_per_word:
+            if len(token) > self.max_input_chars_per_word:
                 output_tokens.append(self.unk_token)
                 continue
+            if token in self.vocab:
+                output_tokens.append(token)
+                continue
 
-            is_bad = False
+            if tries is None:
+                tries = self._get_tries()
             start = 0
             sub_tokens = []
-            while start < len(chars):
-                end = len(chars)
-                cur_substr = None
-                while start < end:
-                    substr = "".join(chars[start:end])
-                    if start > 0:
-                        substr = "##" + substr
-                    if substr in self.vocab:
-                        cur_substr = substr
+            while start < len(token):
+                # Walks down the trie to find the longest piece of the vocabulary starting at `start`
+                node = tries[start > 0]
+                end = None
+                for i in range(start, len(token)):
+                    node = node.get(token[i])
+                    if node is None:
                         break
-                    end -= 1
-                if cur_substr is None:
-                    is_bad = True
+                    if "" in node:
+                        end = i + 1
+                if end is None:
+                    sub_tokens = None
                     break
-                sub_tokens.append(cur_substr)
+                sub_tokens.append(token[start:end] if start == 0 else "##" + token[start:end])
                 start = end
 
-            if is_bad:
+            if sub_tokens is None:
                 output_tokens.append(self.unk_token)
             else:
                 output_tokens.extend(sub_tokens)
@@ -273,9 +273,10 @@ class MarianTokenizer(PreTrainedTokenizer):
         sp_model = self.spm_source if self._decode_use_source_tokenizer else self.spm_target
         current_sub_tokens = []
         out_string = ""
+        all_special_tokens = set(self.all_special_tokens)
         for token in tokens:
             # make sure that special tokens are not decoded using sentencepiece model
-            if token in self.all_special_tokens:
+            if token in all_special_tokens:
                 out_string += sp_model.decode_pieces(current_sub_tokens) + token + " "
                 current_sub_tokens = []
             else:
@@ -202,9 +202,10 @@ class Speech2TextTokenizer(PreTrainedTokenizer):
         """Converts a sequence of tokens (strings for sub-words) in a single string."""
         current_sub_tokens = []
         out_string = ""
+        all_special_tokens = set(self.all_special_tokens)
         for token in tokens:
             # make sure that special tokens are not decoded using sentencepiece model
-            if token in self.all_special_tokens:
+            if token in all_special_tokens:
                 decoded = self.sp_model.decode(current_sub_tokens)
                 out_string += (decoded.upper() if self.do_upper_case else decoded) + token + " "
                 current_sub_tokens = []
@@ -61,7 +61,7 @@ from .base import (
 from .conversational import Conversation, ConversationalPipeline
 from .depth_estimation import DepthEstimationPipeline
 from .document_question_answering import DocumentQuestionAnsweringPipeline
-from .feature_extraction import FeatureExtractionPipeline
+from .feature_extraction import FeatureExtractionPipeline, PoolingStrategy
 from .fill_mask import FillMaskPipeline
 from .image_classification import ImageClassificationPipeline
 from .image_feature_extraction import ImageFeatureExtractionPipeline
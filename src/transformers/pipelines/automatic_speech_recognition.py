@@ -11,8 +11,9 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import os
 from collections import defaultdict
-from typing import TYPE_CHECKING, Dict, Optional, Union
+from typing import TYPE_CHECKING, Dict, Iterable, Optional, Tuple, Union
 
 import numpy as np
 import requests
@@ -37,6 +38,11 @@ if is_torch_available():
     from ..models.auto.modeling_auto import MODEL_FOR_SPEECH_SEQ_2_SEQ_MAPPING_NAMES
 
 
+# Number of already emitted tokens used to decode the following ones when streaming
+STREAM_CONTEXT_LENGTH = 8
+MAX_CTC_CONTEXT_LENGTH = 256
+
+
 def rescale_stride(stride, ratio):
     """
     Rescales the stride values from audio space to tokens/logits space.
@@ -79,23 +85,68 @@ def chunk_iter(inputs, feature_extractor, chunk_len, stride_left, stride_right,
             break
 
 
+def stream_chunk_iter(frames, chunk_len, stride_left, stride_right, stream_chunk_len=None):
+    """
+    Incremental counterpart of `chunk_iter`: consumes an iterator of 1D audio frames and yields the same overlapping
+    windows as soon as enough samples are buffered. Only the samples of the current window are kept in memory, so the
+    stream can be arbitrarily long. If `stream_chunk_len` is set, a `partial` window covering everything buffered so
+    far is also yielded every `stream_chunk_len` new samples, to get low latency previews before a window is full.
+    """
+    if chunk_len <= stride_left + stride_right:
+        raise ValueError(
+            f"Stride needs to be strictly smaller than chunk_len: ({stride_left}, {stride_right}) vs {chunk_len}"
+        )
+    buffer = np.zeros((0,), dtype=np.float32)
+    _stride_left = 0
+    new_samples = 0
+    for frame in frames:
+        frame = np.asarray(frame)
+        if len(frame.shape) != 1:
+            raise ValueError("We expect single channel audio frames for AutomaticSpeechRecognitionPipeline.stream")
+        buffer = np.concatenate([buffer, frame])
+        new_samples += frame.shape[0]
+        while buffer.shape[0] >= chunk_len:
+            stride = (chunk_len, _stride_left, stride_right)
+            yield {"raw": buffer[:chunk_len], "stride": stride, "is_last": False, "partial": False}
+            _stride_left = stride_left
+            buffer = buffer[chunk_len - stride_left - stride_right :].copy()
+            new_samples = 0
+        if stream_chunk_len is not None and new_samples >= stream_chunk_len and buffer.shape[0] > _stride_left:
+            stride = (buffer.shape[0], _stride_left, 0)
+            yield {"raw": buffer, "stride": stride, "is_last": False, "partial": True}
+            new_samples = 0
+    # Last window, the right stride of the previous window has not been committed yet
+    if buffer.shape[0] > _stride_left:
+        stride = (buffer.shape[0], _stride_left, 0)
+        yield {"raw": buffer, "stride": stride, "is_last": True, "partial": False}
+
+
 def _fast_find_longest_common_sequence(sequence_left, sequence_right):
+    sequence_left = np.asarray(sequence_left)
+    sequence_right = np.asarray(sequence_right)
     seq_len_left = len(sequence_left)
     seq_len_right = len(sequence_right)
-    counter = [[0] * (seq_len_right + 1) for _ in range(seq_len_left + 1)]
-    longest = 0
-    for i in range(seq_len_left):
-        for j in range(seq_len_right):
-            if sequence_left[i] == sequence_right[j]:
-                previous_counter = counter[i][j] + 1
-                counter[i + 1][j + 1] = previous_counter
-                if previous_counter > longest:
-                    longest = previous_counter
-
-    counter = np.array(counter)
+    if seq_len_left == 0 or seq_len_right == 0:
+        return -1, -1, 0
+
+    # Shear the matching matrix so that every diagonal becomes a column: `sheared[i, seq_len_left - 1 - i + j]` is
+    # `sequence_left[i] == sequence_right[j]`
+    matches = sequence_left[:, None] == sequence_right[None, :]
+    rows = np.arange(seq_len_left)[:, None]
+    columns = seq_len_left - 1 - rows + np.arange(seq_len_right)[None, :]
+    sheared = np.zeros((seq_len_left, seq_len_left + seq_len_right - 1), dtype=np.int64)
+    sheared[rows, columns] = matches
+
+    # Length of the run of matches ending at each position of each diagonal
+    cumulative = np.cumsum(sheared, axis=0)
+    last_reset = np.maximum.accumulate(np.where(sheared == 0, cumulative, 0), axis=0)
+    counter = (cumulative - last_reset)[rows, columns]
+
+    longest = counter.max()
+    if longest == 0:
+        return -1, -1, 0
     # we return the idx of the first element of the longest common sequence in the left sequence
-    index_left = np.argwhere(counter == longest)[-1][0] - longest if longest != 0 else -1
-    index_right = np.argwhere(counter == longest)[-1][1] - longest if longest != 0 else -1
+    index_left, index_right = np.argwhere(counter == longest)[-1] + 1 - longest
     return index_left, index_right, longest
 
 
@@ -109,21 +160,68 @@ def _find_longest_common_sequence(sequences, tokenizer):
     sequence = [tok_id for tok_id in sequences[0][0].tolist() if tok_id not in tokenizer.all_special_ids]
     for new_seq in sequences[1:]:
         new_sequence = [tok_id for tok_id in new_seq[0].tolist() if tok_id not in tokenizer.all_special_ids]
-
-        index = 0
-        max_ = 0.0
-        for i in range(1, len(new_sequence) + 1):
-            # epsilon to favor long perfect matches
-            eps = i / 10000.0
-            matches = np.sum(np.array(sequence[-i:]) == np.array(new_sequence[:i]))
-            matching = matches / i + eps
-            if matches > 1 and matching > max_:
-                index = i
-                max_ = matching
+        index = _find_overlap_length(sequence, new_sequence)
         sequence.extend(new_sequence[index:])
     return np.array(sequence)
 
 
+def _find_overlap_length(sequence, new_sequence):
+    """
+    Returns the number of leading tokens of `new_sequence` that repeat the end of `sequence`, i.e. the index at which
+    `new_sequence` should be appended to `sequence`. Every window `i` compares `sequence[-i:]` with `new_sequence[:i]`.
+    """
+    # Windows longer than `sequence` cannot be compared element-wise
+    max_length = min(len(sequence), len(new_sequence))
+    if max_length == 0:
+        return 0
+    # `reversed_matches[r, c]` compares the r-th token from the end of `sequence` with `new_sequence[c]`, so the matches
+    # of window `i` are on the anti-diagonal `r + c = i - 1`
+    reversed_matches = np.asarray(sequence[-max_length:])[::-1, None] == np.asarray(new_sequence[:max_length])[None, :]
+    anti_diagonals = np.add.outer(np.arange(max_length), np.arange(max_length))
+    matches = np.bincount(anti_diagonals.ravel(), weights=reversed_matches.ravel(), minlength=2 * max_length - 1)
+    matches = matches[:max_length]
+
+    lengths = np.arange(1, max_length + 1)
+    # epsilon to favor long perfect matches
+    matching = matches / lengths + lengths / 10000.0
+    matching[matches <= 1] = -1
+    index = np.argmax(matching)
+    return int(lengths[index]) if matching[index] > 0 else 0
+
+
+def _ctc_decoding_context(token_ids, pad_token_id, delimiter_id):
+    """
+    Returns the shortest tail of `token_ids` that decodes the boundary with future ids like the full sequence would:
+    everything from the last character token, with consecutive duplicates removed since CTC decoding groups them.
+    """
+    start = 0
+    for idx in range(len(token_ids) - 1, -1, -1):
+        if token_ids[idx] not in (pad_token_id, delimiter_id):
+            start = idx
+            break
+    context = [
+        token_id
+        for idx, token_id in enumerate(token_ids[start:])
+        if idx == 0 or token_id != token_ids[start + idx - 1]
+    ]
+    return context[-MAX_CTC_CONTEXT_LENGTH:]
+
+
+def _decode_continuation(tokenizer, context, token_ids, **decode_kwargs):
+    """
+    Decodes `token_ids` as the continuation of the already emitted `context` ids, so that merges happening at the
+    boundary (CTC grouping, spaces of BPE tokens) are the same as when decoding everything at once.
+    """
+    if len(token_ids) == 0:
+        return ""
+    previous = tokenizer.decode(context, **decode_kwargs)
+    text = tokenizer.decode(list(context) + list(token_ids), **decode_kwargs)
+    if not text.startswith(previous):
+        # The boundary changed already emitted text, only emit what differs
+        previous = os.path.commonprefix([previous, text])
+    return text[len(previous) :]
+
+
 class AutomaticSpeechRecognitionPipeline(ChunkPipeline):
     """
     Pipeline that aims at extracting spoken text contained within some audio.
@@ -178,6 +276,11 @@ class AutomaticSpeechRecognitionPipeline(ChunkPipeline):
 
             </Tip>
 
+        schedule_chunks (`bool`, *optional*, defaults to `False`):
+            Only used with `chunk_length_s > 0` and `batch_size > 1` on a list, a dataset or a generator of inputs.
+            Whether to batch together the chunks of the same length across all inputs, instead of batching the chunks
+            in order. This fills batches even for short inputs, and avoids padding the full chunks to the length of
+            the last chunk of each input. The outputs are returned in the order of the inputs in both cases.
         framework (`str`, *optional*):
             The framework to use, either `"pt"` for PyTorch or `"tf"` for TensorFlow. The specified framework must be
             installed. If no framework is specified, will default to the one currently installed. If no framework is
@@ -284,6 +387,123 @@ class AutomaticSpeechRecognitionPipeline(ChunkPipeline):
         """
         return super().__call__(inputs, **kwargs)
 
+    def stream(
+        self,
+        frames: Iterable[np.ndarray],
+        chunk_length_s: float,
+        stride_length_s: Optional[Union[float, Tuple[float, float]]] = None,
+        stream_chunk_s: Optional[float] = None,
+        **kwargs,
+    ):
+        """
+        Transcribe live audio incrementally. Frames are buffered into overlapping windows of `chunk_length_s` seconds
+        which are sent to the model as soon as they are complete, and the hypotheses of consecutive windows are merged
+        on the fly. Only the current window and the not yet stable tokens are kept in memory, so the stream can be
+        arbitrarily long.
+
+        Args:
+            frames (`Iterable[np.ndarray]`):
+                An iterator of single channel audio frames of arbitrary length, sampled at the feature extractor's
+                `sampling_rate`. This can for instance be the output of [`ffmpeg_microphone`] converted with
+                `np.frombuffer`.
+            chunk_length_s (`float`):
+                The length of each window sent to the model, including the strides.
+            stride_length_s (`float` or `(float, float)`, *optional*, defaults to `chunk_length_s / 6`):
+                The length of the overlap on the left and right of each window. Text predicted in the right stride is
+                only reported as unstable until the next window confirms it.
+            stream_chunk_s (`float`, *optional*):
+                If set, the model is also run on the incomplete window every `stream_chunk_s` seconds of new audio, to
+                report unstable text with a lower latency than `chunk_length_s`.
+            generate_kwargs (`dict`, *optional*):
+                The dictionary of ad-hoc parametrization of `generate_config` to be used for the generation call.
+            max_new_tokens (`int`, *optional*):
+                The maximum numbers of tokens to generate, ignoring the number of tokens in the prompt.
+
+        Return:
+            A generator of dictionaries with the following keys:
+                - **stable_text** (`str`): The text that became final since the previous item. The full transcription
+                  is the concatenation of all the `stable_text` values.
+                - **unstable_text** (`str`): The current hypothesis for the audio following the stable text, that
+                  might still be revised by the next windows.
+                - **is_last** (`bool`): Whether this is the last item of the stream, in which case all the text is
+                  stable.
+        """
+        if self.type == "ctc_with_lm":
+            raise ValueError("Streaming is not supported with a language model decoder, use a plain CTC decoding.")
+        if self.framework != "pt":
+            raise ValueError("Streaming is only supported with PyTorch models.")
+        unexpected = set(kwargs) - {"generate_kwargs", "max_new_tokens"}
+        if unexpected:
+            raise ValueError(f"Unsupported arguments for `stream`: {sorted(unexpected)}")
+
+        _, forward_params, _ = self._sanitize_parameters(**kwargs)
+        forward_params = {**self._forward_params, **forward_params}
+        if forward_params.get("return_timestamps"):
+            raise ValueError("`return_timestamps` is not supported when streaming.")
+
+        chunk_len, stride_left, stride_right = self._get_chunk_lengths(chunk_length_s, stride_length_s)
+        stream_chunk_len = None
+        if stream_chunk_s is not None:
+            stream_chunk_len = int(round(stream_chunk_s * self.feature_extractor.sampling_rate))
+
+        if self.type == "ctc":
+            decode_kwargs = {"skip_special_tokens": False}
+            pad_token_id = self.tokenizer.pad_token_id
+            delimiter = getattr(self.tokenizer, "word_delimiter_token", None)
+            delimiter_id = self.tokenizer.convert_tokens_to_ids(delimiter) if delimiter is not None else None
+        else:
+            decode_kwargs = {"skip_special_tokens": True}
+            special_ids = set(self.tokenizer.all_special_ids)
+        # Fraction of a window that is read again by the next one
+        overlap_ratio = (stride_left + stride_right) / chunk_len
+
+        # Already emitted token ids, only kept to decode the boundary with the new ones
+        context = []
+        # Merged seq2seq tokens that the next window can still overlap with
+        pending = []
+        for window in stream_chunk_iter(frames, chunk_len, stride_left, stride_right, stream_chunk_len):
+            processed = self.feature_extractor(
+                window["raw"], sampling_rate=self.feature_extractor.sampling_rate, return_tensors="pt"
+            )
+            if self.torch_dtype is not None:
+                processed = processed.to(dtype=self.torch_dtype)
+            model_inputs = {"is_last": window["is_last"], "stride": window["stride"], **processed}
+            model_outputs = self.forward(model_inputs, **forward_params)
+            tokens = model_outputs["tokens"].numpy()[0].tolist()
+
+            if self.type == "ctc":
+                total_n, left, right = model_outputs["stride"]
+                if window["partial"]:
+                    stable, unstable = [], tokens[left:total_n]
+                else:
+                    stable, unstable = tokens[left : total_n - right], tokens[total_n - right : total_n]
+                stable_text = _decode_continuation(self.tokenizer, context, stable, **decode_kwargs)
+                context = _ctc_decoding_context(context + stable, pad_token_id, delimiter_id)
+            else:
+                sequence = [tok_id for tok_id in tokens if tok_id not in special_ids]
+                merged = pending + sequence[_find_overlap_length(pending, sequence) :]
+                if window["partial"]:
+                    stable, unstable = [], merged
+                elif window["is_last"]:
+                    stable, unstable = merged, []
+                else:
+                    # Keep twice the expected overlap to leave some room to the matching
+                    n_pending = min(len(merged), int(np.ceil(2 * overlap_ratio * len(sequence))))
+                    stable, unstable = merged[: len(merged) - n_pending], merged[len(merged) - n_pending :]
+                    pending = unstable
+                stable_text = _decode_continuation(self.tokenizer, context, stable, **decode_kwargs)
+                context = (context + stable)[-STREAM_CONTEXT_LENGTH:]
+            unstable_text = _decode_continuation(self.tokenizer, context, unstable, **decode_kwargs)
+
+            if window["is_last"]:
+                yield {"stable_text": stable_text + unstable_text, "unstable_text": "", "is_last": True}
+                return
+            yield {"stable_text": stable_text, "unstable_text": unstable_text, "is_last": False}
+
+        # The stream ended without any new audio after the last full window
+        unstable_text = _decode_continuation(self.tokenizer, context, pending, **decode_kwargs)
+        yield {"stable_text": unstable_text, "unstable_text": "", "is_last": True}
+
     def _sanitize_parameters(
         self,
         chunk_length_s=None,
@@ -348,6 +568,29 @@ class AutomaticSpeechRecognitionPipeline(ChunkPipeline):
 
         return preprocess_params, forward_params, postprocess_params
 
+    def _get_chunk_lengths(self, chunk_length_s, stride_length_s=None):
+        """
+        Converts `chunk_length_s` and `stride_length_s` into a number of samples, aligned on the model's
+        `inputs_to_logits_ratio` when it exists.
+        """
+        if stride_length_s is None:
+            stride_length_s = chunk_length_s / 6
+
+        if isinstance(stride_length_s, (int, float)):
+            stride_length_s = [stride_length_s, stride_length_s]
+
+        # XXX: Carefuly, this variable will not exist in `seq2seq` setting.
+        # Currently chunking is not possible at this level for `seq2seq` so
+        # it's ok.
+        align_to = getattr(self.model.config, "inputs_to_logits_ratio", 1)
+        chunk_len = int(round(chunk_length_s * self.feature_extractor.sampling_rate / align_to) * align_to)
+        stride_left = int(round(stride_length_s[0] * self.feature_extractor.sampling_rate / align_to) * align_to)
+        stride_right = int(round(stride_length_s[1] * self.feature_extractor.sampling_rate / align_to) * align_to)
+
+        if chunk_len < stride_left + stride_right:
+            raise ValueError("Chunk length must be superior to stride length")
+        return chunk_len, stride_left, stride_right
+
     def preprocess(self, inputs, chunk_length_s=0, stride_length_s=None):
         if isinstance(inputs, str):
             if inputs.startswith("http://") or inputs.startswith("https://"):
@@ -412,23 +655,7 @@ class AutomaticSpeechRecognitionPipeline(ChunkPipeline):
             raise ValueError("We expect a single channel audio input for AutomaticSpeechRecognitionPipeline")
 
         if chunk_length_s:
-            if stride_length_s is None:
-                stride_length_s = chunk_length_s / 6
-
-            if isinstance(stride_length_s, (int, float)):
-                stride_length_s = [stride_length_s, stride_length_s]
-
-            # XXX: Carefuly, this variable will not exist in `seq2seq` setting.
-            # Currently chunking is not possible at this level for `seq2seq` so
-            # it's ok.
-            align_to = getattr(self.model.config, "inputs_to_logits_ratio", 1)
-            chunk_len = int(round(chunk_length_s * self.feature_extractor.sampling_rate / align_to) * align_to)
-            stride_left = int(round(stride_length_s[0] * self.feature_extractor.sampling_rate / align_to) * align_to)
-            stride_right = int(round(stride_length_s[1] * self.feature_extractor.sampling_rate / align_to) * align_to)
-
-            if chunk_len < stride_left + stride_right:
-                raise ValueError("Chunk length must be superior to stride length")
-
+            chunk_len, stride_left, stride_right = self._get_chunk_lengths(chunk_length_s, stride_length_s)
             for item in chunk_iter(
                 inputs, self.feature_extractor, chunk_len, stride_left, stride_right, self.torch_dtype
             ):
@@ -708,6 +708,7 @@ def build_pipeline_init_args(
     has_feature_extractor: bool = False,
     has_image_processor: bool = False,
     supports_binary_output: bool = True,
+    supports_image_prefetching: bool = False,
 ) -> str:
     docstring = r"""
     Arguments:
@@ -761,6 +762,14 @@ def build_pipeline_init_args(
         binary_output (`bool`, *optional*, defaults to `False`):
             Flag indicating if the output the pipeline should happen in a serialized format (i.e., pickle) or as
             the raw output data e.g. text."""
+    if supports_image_prefetching:
+        docstring += r"""
+        prefetch_images (`bool` or [`~image_utils.ImagePrefetcher`], *optional*, defaults to `False`):
+            Whether or not to load and decode the next images in a pool of threads while the model runs, when the
+            pipeline is called on a list, a generator or a dataset. The images are decoded as they would be without
+            prefetching. Pass an [`~image_utils.ImagePrefetcher`] to control the number of threads, the in-memory cache
+            of decoded images or the reduced size decoding of JPEG images (e.g. with
+            [`~image_utils.ImagePrefetcher.from_image_processor`]), which changes the pixels given to the model."""
     return docstring
 
 
@@ -772,9 +781,11 @@ PIPELINE_INIT_ARGS = build_pipeline_init_args(
 if is_torch_available():
     from transformers.pipelines.pt_utils import (
         PipelineChunkIterator,
+        PipelineChunkScheduler,
         PipelineDataset,
         PipelineIterator,
         PipelinePackIterator,
+        PipelineScheduledPackIterator,
     )
 
 
@@ -797,6 +808,8 @@ class Pipeline(_ScikitCompat):
     """
 
     default_input_names = None
+    # Set by the pipelines working on images, to load them ahead in `get_iterator`
+    image_prefetcher = None
 
     def __init__(
         self,
@@ -1108,6 +1121,9 @@ class Pipeline(_ScikitCompat):
     def get_iterator(
         self, inputs, num_workers: int, batch_size: int, preprocess_params, forward_params, postprocess_params
     ):
+        if self.image_prefetcher is not None:
+            # The next images are loaded in the background while the model runs on the current ones
+            inputs = self.image_prefetcher(inputs)
         if isinstance(inputs, collections.abc.Sized):
             dataset = PipelineDataset(inputs, self.preprocess, preprocess_params)
         else:
@@ -1212,6 +1228,11 @@ class Pipeline(_ScikitCompat):
 
 
 class ChunkPipeline(Pipeline):
+    def __init__(self, *args, schedule_chunks: bool = False, **kwargs):
+        # Whether to batch together chunks of the same shape coming from different inputs, see `PipelineChunkScheduler`
+        self.schedule_chunks = schedule_chunks
+        super().__init__(*args, **kwargs)
+
     def run_single(self, inputs, preprocess_params, forward_params, postprocess_params):
         all_outputs = []
         for model_inputs in self.preprocess(inputs, **preprocess_params):
@@ -1223,6 +1244,8 @@ class ChunkPipeline(Pipeline):
     def get_iterator(
         self, inputs, num_workers: int, batch_size: int, preprocess_params, forward_params, postprocess_params
     ):
+        if self.image_prefetcher is not None:
+            inputs = self.image_prefetcher(inputs)
         if "TOKENIZERS_PARALLELISM" not in os.environ:
             logger.info("Disabling tokenizer parallelism, we're using DataLoader multithreading already")
             os.environ["TOKENIZERS_PARALLELISM"] = "false"
@@ -1233,12 +1256,21 @@ class ChunkPipeline(Pipeline):
             )
             num_workers = 1
         dataset = PipelineChunkIterator(inputs, self.preprocess, preprocess_params)
+        if self.schedule_chunks:
+            dataset = PipelineChunkScheduler(dataset, batch_size)
 
         # TODO hack by collating feature_extractor and image_processor
         feature_extractor = self.feature_extractor if self.feature_extractor is not None else self.image_processor
         collate_fn = no_collate_fn if batch_size == 1 else pad_collate_fn(self.tokenizer, feature_extractor)
         dataloader = DataLoader(dataset, num_workers=num_workers, batch_size=batch_size, collate_fn=collate_fn)
-        model_iterator = PipelinePackIterator(dataloader, self.forward, forward_params, loader_batch_size=batch_size)
+        if self.schedule_chunks:
+            model_iterator = PipelineScheduledPackIterator(
+                dataloader, self.forward, forward_params, loader_batch_size=batch_size
+            )
+        else:
+            model_iterator = PipelinePackIterator(
+                dataloader, self.forward, forward_params, loader_batch_size=batch_size
+            )
         final_iterator = PipelineIterator(model_iterator, self.postprocess, postprocess_params)
         return final_iterator
 
@@ -1,16 +1,43 @@
-from typing import Dict
+import os
+from typing import Dict, Optional, Union
 
-from ..utils import add_end_docstrings
+import numpy as np
+
+from ..utils import ExplicitEnum, add_end_docstrings, is_tf_available, is_torch_available
 from .base import GenericTensor, Pipeline, build_pipeline_init_args
 
 
+if is_tf_available():
+    import tensorflow as tf
+
+if is_torch_available():
+    import torch
+
+
+class PoolingStrategy(ExplicitEnum):
+    NONE = "none"
+    CLS = "cls"
+    MEAN = "mean"
+    LAST = "last"
+
+
 @add_end_docstrings(
     build_pipeline_init_args(has_tokenizer=True, supports_binary_output=False),
     r"""
         tokenize_kwargs (`dict`, *optional*):
                 Additional dictionary of keyword arguments passed along to the tokenizer.
-        return_tensors (`bool`, *optional*):
-            If `True`, returns a tensor according to the specified framework, otherwise returns a list.""",
+        return_tensors (`bool` or `str`, *optional*):
+            If `True`, returns a tensor according to the specified framework, if `"np"`, returns a contiguous NumPy
+            array (a single array of shape `[num_inputs, hidden_dimension]` for a list of inputs if `pooling` is set),
+            otherwise returns a list.
+        pooling (`str`, *optional*, defaults to `"none"`):
+            How to pool the hidden states of the tokens into a single embedding, computed on the model device. Accepts
+            four different values:
+
+            - `"none"`: Does not pool, the hidden states of all the tokens are returned.
+            - `"cls"`: Returns the hidden states of the first token, ignoring padding.
+            - `"mean"`: Returns the mean of the hidden states of the tokens, ignoring padding.
+            - `"last"`: Returns the hidden states of the last token, ignoring padding.""",
 )
 class FeatureExtractionPipeline(Pipeline):
     """
@@ -26,6 +53,9 @@ class FeatureExtractionPipeline(Pipeline):
     >>> result = extractor("This is a simple test.", return_tensors=True)
     >>> result.shape  # This is a tensor of shape [1, sequence_lenth, hidden_dimension] representing the input string.
     torch.Size([1, 8, 768])
+    >>> result = extractor("This is a simple test.", return_tensors="np", pooling="mean")
+    >>> result.shape  # This is an array of shape [1, hidden_dimension] representing the input string.
+    (1, 768)
     ```
 
     Learn more about the basics of using a pipeline in the [pipeline tutorial](../pipeline_tutorial)
@@ -37,7 +67,7 @@ class FeatureExtractionPipeline(Pipeline):
     [huggingface.co/models](https://huggingface.co/models).
     """
 
-    def _sanitize_parameters(self, truncation=None, tokenize_kwargs=None, return_tensors=None, **kwargs):
+    def _sanitize_parameters(self, truncation=None, tokenize_kwargs=None, return_tensors=None, pooling=None, **kwargs):
         if tokenize_kwargs is None:
             tokenize_kwargs = {}
 
@@ -50,37 +80,147 @@ class FeatureExtractionPipeline(Pipeline):
 
         preprocess_params = tokenize_kwargs
 
+        forward_params = {}
+        if pooling is not None:
+            if isinstance(pooling, str):
+                pooling = PoolingStrategy[pooling.upper()]
+            forward_params["pooling"] = pooling
+
         postprocess_params = {}
         if return_tensors is not None:
+            if isinstance(return_tensors, str) and return_tensors != "np":
+                raise ValueError(f"`return_tensors` should be a `bool` or `'np'`, got {return_tensors!r}")
             postprocess_params["return_tensors"] = return_tensors
 
-        return preprocess_params, {}, postprocess_params
+        return preprocess_params, forward_params, postprocess_params
 
     def preprocess(self, inputs, **tokenize_kwargs) -> Dict[str, GenericTensor]:
         model_inputs = self.tokenizer(inputs, return_tensors=self.framework, **tokenize_kwargs)
         return model_inputs
 
-    def _forward(self, model_inputs):
+    def _forward(self, model_inputs, pooling=PoolingStrategy.NONE):
         model_outputs = self.model(**model_inputs)
-        return model_outputs
+        if pooling == PoolingStrategy.NONE:
+            return model_outputs
+        # Pool before leaving the device so that only one vector per input is transferred
+        attention_mask = model_inputs.get("attention_mask", None)
+        return {"embeddings": self._pool(model_outputs[0], attention_mask, pooling)}
+
+    def _pool(self, hidden_states, attention_mask, pooling):
+        if self.framework == "pt":
+            if attention_mask is None:
+                attention_mask = torch.ones(hidden_states.shape[:2], dtype=torch.long, device=hidden_states.device)
+            batch_index = torch.arange(hidden_states.shape[0], device=hidden_states.device)
+            # Indices of the first and last attended tokens, for both left and right padding
+            if pooling == PoolingStrategy.CLS:
+                return hidden_states[batch_index, attention_mask.float().argmax(dim=-1)]
+            elif pooling == PoolingStrategy.MEAN:
+                mask = attention_mask.unsqueeze(-1).to(hidden_states.dtype)
+                return (hidden_states * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1)
+            elif pooling == PoolingStrategy.LAST:
+                last_index = attention_mask.shape[1] - 1 - attention_mask.flip(-1).float().argmax(dim=-1)
+                return hidden_states[batch_index, last_index]
+        elif self.framework == "tf":
+            if attention_mask is None:
+                attention_mask = tf.ones(tf.shape(hidden_states)[:2], dtype=tf.int32)
+            if pooling == PoolingStrategy.CLS:
+                first_index = tf.argmax(attention_mask, axis=-1, output_type=tf.int32)
+                return tf.gather(hidden_states, first_index, axis=1, batch_dims=1)
+            elif pooling == PoolingStrategy.MEAN:
+                mask = tf.cast(attention_mask, hidden_states.dtype)[:, :, None]
+                return tf.reduce_sum(hidden_states * mask, axis=1) / tf.maximum(tf.reduce_sum(mask, axis=1), 1)
+            elif pooling == PoolingStrategy.LAST:
+                last_index = (
+                    tf.shape(attention_mask)[1] - 1 - tf.argmax(attention_mask[:, ::-1], axis=-1, output_type=tf.int32)
+                )
+                return tf.gather(hidden_states, last_index, axis=1, batch_dims=1)
+        raise ValueError(f"Unrecognized pooling strategy {pooling}")
 
     def postprocess(self, model_outputs, return_tensors=False):
         # [0] is the first available tensor, logits or last_hidden_state.
+        features = model_outputs["embeddings"] if "embeddings" in model_outputs else model_outputs[0]
+        if return_tensors == "np":
+            if self.framework == "pt":
+                if features.dtype == torch.bfloat16:
+                    # NumPy has no bfloat16
+                    features = features.float()
+                features = features.numpy()
+            elif self.framework == "tf":
+                features = features.numpy()
+            return np.ascontiguousarray(features)
         if return_tensors:
-            return model_outputs[0]
+            return features
         if self.framework == "pt":
-            return model_outputs[0].tolist()
+            return features.tolist()
         elif self.framework == "tf":
-            return model_outputs[0].numpy().tolist()
+            return features.numpy().tolist()
 
-    def __call__(self, *args, **kwargs):
+    def __call__(self, *args, output_file: Optional[Union[str, os.PathLike]] = None, **kwargs):
         """
         Extract the features of the input(s).
 
         Args:
             args (`str` or `List[str]`): One or several texts (or one list of texts) to get the features of.
+            output_file (`str` or `os.PathLike`, *optional*):
+                If set, the pooled embeddings are written to this `.npy` file as they are computed instead of being
+                kept in memory, and a read-only memory-mapped array of shape `[num_inputs, hidden_dimension]` is
+                returned. Requires a `pooling` other than `"none"` and inputs with a known length (a list or a
+                dataset).
 
         Return:
-            A nested list of `float`: The features computed by the model.
+            A nested list of `float`: The features computed by the model. With `return_tensors="np"` and a `pooling`
+            strategy, the features of a list of inputs are returned as a single array of shape `[num_inputs,
+            hidden_dimension]`.
         """
-        return super().__call__(*args, **kwargs)
+        if output_file is not None:
+            return self._extract_to_file(output_file, *args, **kwargs)
+        outputs = super().__call__(*args, **kwargs)
+        inputs = args[0] if args else kwargs.get("inputs", None)
+        pooling, return_tensors = self._get_call_parameters(kwargs)
+        if (
+            isinstance(inputs, list)
+            and len(outputs) > 0
+            and return_tensors == "np"
+            and pooling != PoolingStrategy.NONE
+        ):
+            # Each output is a `[1, hidden_dimension]` array
+            return np.concatenate(outputs)
+        return outputs
+
+    def _get_call_parameters(self, kwargs):
+        """Returns the `pooling` and `return_tensors` used by a call, given its keyword arguments."""
+        _, forward_params, postprocess_params = self._sanitize_parameters(
+            pooling=kwargs.get("pooling", None), return_tensors=kwargs.get("return_tensors", None)
+        )
+        pooling = forward_params.get("pooling", self._forward_params.get("pooling", PoolingStrategy.NONE))
+        return_tensors = postprocess_params.get(
+            "return_tensors", self._postprocess_params.get("return_tensors", False)
+        )
+        return pooling, return_tensors
+
+    def _extract_to_file(self, output_file, inputs, *args, **kwargs):
+        pooling, _ = self._get_call_parameters(kwargs)
+        if pooling == PoolingStrategy.NONE:
+            raise ValueError("Writing the features to `output_file` requires a `pooling` strategy other than 'none'")
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        if not hasattr(inputs, "__len__") or len(inputs) == 0:
+            raise ValueError("Writing the features to `output_file` requires a non-empty list or dataset of inputs")
+        num_inputs = len(inputs)
+        kwargs["return_tensors"] = "np"
+
+        # Generators are consumed lazily by `Pipeline.__call__`, so only one batch is held in memory at a time
+        outputs = super().__call__((item for item in inputs), *args, **kwargs)
+        embeddings = None
+        index = -1
+        for index, output in enumerate(outputs):
+            if embeddings is None:
+                embeddings = np.lib.format.open_memmap(
+                    output_file, mode="w+", dtype=output.dtype, shape=(num_inputs, output.shape[-1])
+                )
+            embeddings[index] = output[0]
+        if index + 1 != num_inputs:
+            raise ValueError(f"Expected {num_inputs} features, got {index + 1}")
+        embeddings.flush()
+        del embeddings
+        return np.load(output_file, mmap_mode="r")
@@ -17,7 +17,7 @@ from .base import Pipeline, build_pipeline_init_args
 if is_vision_available():
     from PIL import Image
 
-    from ..image_utils import load_image
+    from ..image_utils import ImagePrefetcher, load_image
 
 if is_tf_available():
     from ..models.auto.modeling_tf_auto import TF_MODEL_FOR_IMAGE_CLASSIFICATION_MAPPING_NAMES
@@ -48,7 +48,7 @@ class ClassificationFunction(ExplicitEnum):
 
 
 @add_end_docstrings(
-    build_pipeline_init_args(has_image_processor=True),
+    build_pipeline_init_args(has_image_processor=True, supports_image_prefetching=True),
     r"""
         function_to_apply (`str`, *optional*, defaults to `"default"`):
             The function to apply to the model outputs in order to retrieve the scores. Accepts four different values:
@@ -85,7 +85,7 @@ class ImageClassificationPipeline(Pipeline):
 
     function_to_apply: ClassificationFunction = ClassificationFunction.NONE
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, prefetch_images: Union[bool, "ImagePrefetcher"] = False, **kwargs):
         super().__init__(*args, **kwargs)
         requires_backends(self, "vision")
         self.check_model_type(
@@ -93,6 +93,9 @@ class ImageClassificationPipeline(Pipeline):
             if self.framework == "tf"
             else MODEL_FOR_IMAGE_CLASSIFICATION_MAPPING_NAMES
         )
+        if prefetch_images is True:
+            prefetch_images = ImagePrefetcher()
+        self.image_prefetcher = prefetch_images or None
 
     def _sanitize_parameters(self, top_k=None, function_to_apply=None, timeout=None):
         preprocess_params = {}
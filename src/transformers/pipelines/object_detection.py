@@ -5,7 +5,7 @@ from .base import Pipeline, build_pipeline_init_args
 
 
 if is_vision_available():
-    from ..image_utils import load_image
+    from ..image_utils import ImagePrefetcher, load_image
 
 
 if is_torch_available():
@@ -23,7 +23,7 @@ Prediction = Dict[str, Any]
 Predictions = List[Prediction]
 
 
-@add_end_docstrings(build_pipeline_init_args(has_image_processor=True))
+@add_end_docstrings(build_pipeline_init_args(has_image_processor=True, supports_image_prefetching=True))
 class ObjectDetectionPipeline(Pipeline):
     """
     Object detection pipeline using any `AutoModelForObjectDetection`. This pipeline predicts bounding boxes of objects
@@ -49,7 +49,7 @@ class ObjectDetectionPipeline(Pipeline):
     See the list of available models on [huggingface.co/models](https://huggingface.co/models?filter=object-detection).
     """
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, prefetch_images: Union[bool, "ImagePrefetcher"] = False, **kwargs):
         super().__init__(*args, **kwargs)
 
         if self.framework == "tf":
@@ -59,6 +59,12 @@ class ObjectDetectionPipeline(Pipeline):
         mapping = MODEL_FOR_OBJECT_DETECTION_MAPPING_NAMES.copy()
         mapping.update(MODEL_FOR_TOKEN_CLASSIFICATION_MAPPING_NAMES)
         self.check_model_type(mapping)
+        if prefetch_images is True:
+            prefetch_images = ImagePrefetcher()
+        elif prefetch_images and prefetch_images.draft_size is not None:
+            # The boxes are scaled to the size of the decoded image, which is not the size of the original image
+            raise ValueError(f"{self.__class__.__name__} does not support decoding the images at a reduced size.")
+        self.image_prefetcher = prefetch_images or None
 
     def _sanitize_parameters(self, **kwargs):
         preprocess_params = {}
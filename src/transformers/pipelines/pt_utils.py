@@ -293,6 +293,135 @@ class PipelinePackIterator(PipelineIterator):
         return accumulator
 
 
+def _chunk_signature(item):
+    """
+    Shapes of all the tensors of a preprocessed chunk, chunks with the same signature can be batched without padding.
+    """
+    return tuple(
+        sorted(
+            (key, tuple(value.shape)) for key, value in item.items() if isinstance(value, (torch.Tensor, np.ndarray))
+        )
+    )
+
+
+class PipelineChunkScheduler(IterableDataset):
+    def __init__(self, loader, batch_size, max_buffered_chunks=None):
+        """
+        Reorders the chunks flattened by `PipelineChunkIterator` so that every group of `batch_size` consecutive
+        chunks share the same shapes whenever possible, mixing chunks coming from many inputs. This avoids both small
+        batches for short inputs and padding the full chunks to the length of the last (shorter) chunk of an input.
+        Every chunk is tagged with its `(input_index, chunk_index)` under the `"chunk_index"` key, so that
+        `PipelineScheduledPackIterator` can restore the original order.
+
+                Arguments:
+                    loader (`PipelineChunkIterator` or any iterator):
+                        The flattened chunks, they need to contain an `is_last` key marking the last chunk of an input.
+                    batch_size (`int`):
+                        The batch size the chunks are going to be batched with.
+                    max_buffered_chunks (`int`, *optional*, defaults to `8 * batch_size`):
+                        The maximum number of chunks waiting for a batch of the same shape. When it is reached, the
+                        chunks are batched with the closest shapes instead.
+        """
+        self.loader = loader
+        self.batch_size = batch_size
+        if max_buffered_chunks is None:
+            max_buffered_chunks = 8 * batch_size
+        # There always needs to be a full batch to flush
+        self.max_buffered_chunks = max(max_buffered_chunks, batch_size)
+
+    def __iter__(self):
+        buckets = {}
+        n_buffered = 0
+        input_index = 0
+        chunk_index = 0
+        for item in self.loader:
+            item["chunk_index"] = (input_index, chunk_index)
+            if item["is_last"]:
+                input_index += 1
+                chunk_index = 0
+            else:
+                chunk_index += 1
+
+            signature = _chunk_signature(item)
+            bucket = buckets.setdefault(signature, [])
+            bucket.append(item)
+            n_buffered += 1
+            if len(bucket) == self.batch_size:
+                del buckets[signature]
+                n_buffered -= self.batch_size
+                yield from bucket
+            elif n_buffered >= self.max_buffered_chunks:
+                # Too many chunks waiting, batch together the ones with the closest shapes
+                buffered = [item for signature in sorted(buckets) for item in buckets[signature]]
+                buckets = {}
+                for item in buffered[self.batch_size :]:
+                    buckets.setdefault(_chunk_signature(item), []).append(item)
+                n_buffered -= self.batch_size
+                yield from buffered[: self.batch_size]
+
+        for signature in sorted(buckets):
+            yield from buckets[signature]
+
+
+class PipelineScheduledPackIterator(PipelineIterator):
+    """
+    Counterpart of `PipelinePackIterator` for chunks reordered by `PipelineChunkScheduler`. It runs `infer` on the
+    (batches of) chunks, puts the outputs back in their original order using their `"chunk_index"` and yields the
+    list of outputs of every input, in the order of the inputs, as soon as all its chunks have been processed.
+
+        Arguments:
+            loader (`torch.utils.data.DataLoader` or any iterator):
+                The iterator that will be used to apply `infer` on.
+            infer (any function):
+                The function to apply of each element of `loader`.
+            params (`dict`):
+                The parameters passed to `infer` along with every item
+            loader_batch_size (`int`, *optional*):
+                If specified, the items of `loader` are supposed to come as batch, and are loader_batched here.
+    """
+
+    def __iter__(self):
+        self.iterator = iter(self.loader)
+        self._chunks = {}
+        self._num_chunks = {}
+        self._next_input_index = 0
+        return self
+
+    def _next_item(self):
+        if self._loader_batch_index is not None and self._loader_batch_index < self.loader_batch_size:
+            return self.loader_batch_item()
+
+        item = next(self.iterator)
+        # The tags are not model inputs, they are added back to the outputs
+        chunk_index = item.pop("chunk_index")
+        processed = self.infer(item, **self.params)
+        processed["chunk_index"] = chunk_index
+        if self.loader_batch_size is not None:
+            observed_batch_size = len(chunk_index)
+            if 0 < observed_batch_size < self.loader_batch_size:
+                # could be last batch so we can't unroll as many
+                # elements.
+                self.loader_batch_size = observed_batch_size
+            self._loader_batch_data = processed
+            self._loader_batch_index = 0
+            return self.loader_batch_item()
+        return processed
+
+    def __next__(self):
+        input_index = self._next_input_index
+        while len(self._chunks.get(input_index, ())) != self._num_chunks.get(input_index, -1):
+            item = self._next_item()
+            item_input_index, chunk_index = item.pop("chunk_index")
+            if item.pop("is_last"):
+                self._num_chunks[item_input_index] = chunk_index + 1
+            self._chunks.setdefault(item_input_index, {})[chunk_index] = item
+
+        chunks = self._chunks.pop(input_index)
+        del self._num_chunks[input_index]
+        self._next_input_index += 1
+        return [chunks[i] for i in range(len(chunks))]
+
+
 class KeyDataset(Dataset):
     def __init__(self, dataset: Dataset, key: str):
         self.dataset = dataset
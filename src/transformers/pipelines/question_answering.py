@@ -1,4 +1,6 @@
+import heapq
 import inspect
+import itertools
 import types
 import warnings
 from collections.abc import Iterable
@@ -147,6 +149,92 @@ def select_starts_ends(
     return starts, ends, scores, min_null_score
 
 
+def select_spans_across_features(
+    start: np.ndarray,
+    end: np.ndarray,
+    p_mask: np.ndarray,
+    attention_mask: Optional[np.ndarray],
+    max_answer_len: int = 15,
+    top_k: Optional[int] = None,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Batched equivalent of `select_starts_ends()` for all the features of one example. The logits of every feature are
+    normalized at once, and the scores of the valid spans are computed on a `[num_features, seq_len, max_answer_len]`
+    band instead of a `[seq_len, seq_len]` outer product per feature.
+
+    Args:
+        start (`np.ndarray`): Start logits of each feature, of shape `[num_features, seq_len]`.
+        end (`np.ndarray`): End logits of each feature, of shape `[num_features, seq_len]`.
+        p_mask (`np.ndarray`): A mask with 1 for values that cannot be in the answer, of shape `[num_features, seq_len]`.
+        attention_mask (`np.ndarray`, *optional*): The attention mask generated by the tokenizer.
+        max_answer_len (`int`): Maximum size of the answer to extract from the model's output.
+        top_k (`int`, *optional*): If set, only the `top_k` best spans of each feature are sorted and returned.
+
+    Returns:
+        `Tuple`: The start token indices, end token indices and scores of the best spans of each feature, sorted by
+        decreasing score and of shape `[num_features, top_k]` (or `[num_features, seq_len * max_answer_len]`), the
+        number of valid spans of each feature and the null (empty) answer score of each feature.
+    """
+    # Ensure padded tokens & question tokens cannot belong to the set of candidate answers.
+    desired_tokens = np.asarray(p_mask) == 0
+    if attention_mask is not None:
+        desired_tokens &= np.asarray(attention_mask) != 0
+
+    # Make sure non-context indexes in the tensor cannot contribute to the softmax
+    start = np.where(desired_tokens, start, -10000.0)
+    end = np.where(desired_tokens, end, -10000.0)
+
+    # Normalize logits and spans to retrieve the answer
+    start = np.exp(start - start.max(axis=-1, keepdims=True))
+    start = start / start.sum(axis=-1, keepdims=True)
+
+    end = np.exp(end - end.max(axis=-1, keepdims=True))
+    end = end / end.sum(axis=-1, keepdims=True)
+
+    null_scores = start[:, 0] * end[:, 0]
+
+    # Only spans with start <= end < start + max_answer_len are scored
+    seq_len = start.shape[-1]
+    span_ends = np.arange(seq_len)[:, None] + np.arange(max_answer_len)
+    in_range = span_ends < seq_len
+    span_ends = np.minimum(span_ends, seq_len - 1)
+    scores = start[:, :, None] * end[:, span_ends]
+    valid = desired_tokens[:, :, None] & desired_tokens[:, span_ends] & in_range
+    # Mask CLS
+    valid[:, 0] = False
+
+    scores = np.where(valid, scores, -1.0).reshape(len(scores), -1)
+    num_spans = valid.reshape(len(valid), -1).sum(axis=-1)
+    if top_k is not None and top_k < scores.shape[-1]:
+        spans = np.argpartition(-scores, top_k - 1, axis=-1)[:, :top_k]
+    else:
+        spans = np.broadcast_to(np.arange(scores.shape[-1]), scores.shape)
+    scores = np.take_along_axis(scores, spans, axis=-1)
+    # Sort by decreasing score, ties are kept in order of start and end
+    order = np.lexsort((spans, -scores), axis=-1)
+    spans = np.take_along_axis(spans, order, axis=-1)
+    scores = np.take_along_axis(scores, order, axis=-1)
+    starts, lengths = np.divmod(spans, max_answer_len)
+    return starts, starts + lengths, scores, num_spans, null_scores
+
+
+def merge_spans(scores: np.ndarray, num_spans: np.ndarray) -> Iterable[Tuple[int, int]]:
+    """
+    Lazily merges the sorted spans of every feature returned by `select_spans_across_features()` with a heap, and
+    yields the `(feature_index, span_index)` of the spans by decreasing score. `num_spans` is the number of spans to
+    consider in each feature.
+    """
+    return (
+        (feature_index, span_index)
+        for _, feature_index, span_index in heapq.merge(
+            *(
+                zip(-scores[feature_index, :num], itertools.repeat(feature_index), range(num))
+                for feature_index, num in enumerate(num_spans.tolist())
+            )
+        )
+    )
+
+
 class QuestionAnsweringArgumentHandler(ArgumentHandler):
     """
     QuestionAnsweringPipeline requires the user to provide multiple arguments (i.e. question & context) to be mapped to
@@ -532,83 +620,110 @@ class QuestionAnsweringPipeline(ChunkPipeline):
         max_answer_len=15,
         align_to_words=True,
     ):
-        min_null_score = 1000000  # large and positive
-        answers = []
-        for output in model_outputs:
-            start_ = output["start"]
-            end_ = output["end"]
-            example = output["example"]
-            p_mask = output["p_mask"]
-            attention_mask = (
-                output["attention_mask"].numpy() if output.get("attention_mask", None) is not None else None
-            )
-
-            starts, ends, scores, min_null_score = select_starts_ends(
-                start_, end_, p_mask, attention_mask, min_null_score, top_k, handle_impossible_answer, max_answer_len
+        # Stack the features of the example, shorter ones are padded with tokens that cannot be in the answer
+        seq_len = max(output["start"].shape[-1] for output in model_outputs)
+        start = np.full((len(model_outputs), seq_len), -10000.0, dtype=np.asarray(model_outputs[0]["start"]).dtype)
+        end = np.full_like(start, -10000.0)
+        p_mask = np.ones((len(model_outputs), seq_len), dtype=np.int64)
+        attention_mask = np.zeros((len(model_outputs), seq_len), dtype=np.int64)
+        has_attention_mask = all(output.get("attention_mask", None) is not None for output in model_outputs)
+        for i, output in enumerate(model_outputs):
+            length = output["start"].shape[-1]
+            start[i, :length] = np.asarray(output["start"]).reshape(-1)
+            end[i, :length] = np.asarray(output["end"]).reshape(-1)
+            p_mask[i, :length] = np.asarray(output["p_mask"]).reshape(-1)
+            if has_attention_mask:
+                attention_mask[i, :length] = np.asarray(output["attention_mask"]).reshape(-1)
+
+        # The windows of long contexts overlap (`doc_stride`), so the same answer can be found in several features,
+        # only its best occurrence is kept. The `top_k` best spans of each feature are enough unless duplicates are
+        # skipped, in which case all the spans are searched.
+        for num_candidates in (top_k, None):
+            starts, ends, scores, num_spans, null_scores = select_spans_across_features(
+                start, end, p_mask, attention_mask if has_attention_mask else None, max_answer_len, num_candidates
             )
-
-            if not self.tokenizer.is_fast:
-                char_to_word = np.array(example.char_to_word_offset)
-
-                # Convert the answer (tokens) back to the original text
-                # Score: score from the model
-                # Start: Index of the first character of the answer in the context string
-                # End: Index of the character following the last character of the answer in the context string
-                # Answer: Plain text of the answer
-                for s, e, score in zip(starts, ends, scores):
-                    token_to_orig_map = output["token_to_orig_map"]
-                    answers.append(
-                        {
-                            "score": score.item(),
-                            "start": np.where(char_to_word == token_to_orig_map[s])[0][0].item(),
-                            "end": np.where(char_to_word == token_to_orig_map[e])[0][-1].item(),
-                            "answer": " ".join(example.doc_tokens[token_to_orig_map[s] : token_to_orig_map[e] + 1]),
-                        }
-                    )
-            else:
-                # Convert the answer (tokens) back to the original text
-                # Score: score from the model
-                # Start: Index of the first character of the answer in the context string
-                # End: Index of the character following the last character of the answer in the context string
-                # Answer: Plain text of the answer
-                question_first = bool(self.tokenizer.padding_side == "right")
-                enc = output["encoding"]
-
-                # Encoding was *not* padded, input_ids *might*.
-                # It doesn't make a difference unless we're padding on
-                # the left hand side, since now we have different offsets
-                # everywhere.
-                if self.tokenizer.padding_side == "left":
-                    offset = (output["input_ids"] == self.tokenizer.pad_token_id).numpy().sum()
-                else:
-                    offset = 0
-
-                # Sometimes the max probability token is in the middle of a word so:
-                # - we start by finding the right word containing the token with `token_to_word`
-                # - then we convert this word in a character span with `word_to_chars`
-                sequence_index = 1 if question_first else 0
-                for s, e, score in zip(starts, ends, scores):
-                    s = s - offset
-                    e = e - offset
-
-                    start_index, end_index = self.get_indices(enc, s, e, sequence_index, align_to_words)
-
-                    answers.append(
-                        {
-                            "score": score.item(),
-                            "start": start_index,
-                            "end": end_index,
-                            "answer": example.context_text[start_index:end_index],
-                        }
-                    )
+            num_candidates = np.minimum(num_spans, scores.shape[-1])
+            remaining_candidates = num_candidates.copy()
+            answers = []
+            answer_features = {}
+            missing_candidates = False
+            for feature_index, span_index in merge_spans(scores, num_candidates):
+                answer = self.span_to_answer_in_feature(
+                    model_outputs[feature_index],
+                    starts[feature_index, span_index].item(),
+                    ends[feature_index, span_index].item(),
+                    scores[feature_index, span_index].item(),
+                    align_to_words,
+                )
+                key = (answer["start"], answer["end"])
+                if answer_features.setdefault(key, feature_index) == feature_index:
+                    answers.append(answer)
+                if len(answers) == top_k:
+                    break
+                remaining_candidates[feature_index] -= 1
+                if (
+                    remaining_candidates[feature_index] == 0
+                    and num_candidates[feature_index] < num_spans[feature_index]
+                ):
+                    missing_candidates = True
+                    break
+            if not missing_candidates:
+                break
 
         if handle_impossible_answer:
+            min_null_score = null_scores.min().item()
             answers.append({"score": min_null_score, "start": 0, "end": 0, "answer": ""})
         answers = sorted(answers, key=lambda x: x["score"], reverse=True)[:top_k]
         if len(answers) == 1:
             return answers[0]
         return answers
 
+    def span_to_answer_in_feature(
+        self, output: Dict, s: int, e: int, score: float, align_to_words: bool = True
+    ) -> Dict[str, Union[str, int, float]]:
+        """
+        Converts the span of tokens `[s, e]` of one feature back to the original text.
+
+        Returns:
+            Dictionary like `{'score': float, 'start': int, 'end': int, 'answer': str}`, where `start` is the index of
+            the first character of the answer in the context string and `end` the index of the character following its
+            last character.
+        """
+        example = output["example"]
+        if not self.tokenizer.is_fast:
+            char_to_word = np.array(example.char_to_word_offset)
+            token_to_orig_map = output["token_to_orig_map"]
+            return {
+                "score": score,
+                "start": np.where(char_to_word == token_to_orig_map[s])[0][0].item(),
+                "end": np.where(char_to_word == token_to_orig_map[e])[0][-1].item(),
+                "answer": " ".join(example.doc_tokens[token_to_orig_map[s] : token_to_orig_map[e] + 1]),
+            }
+
+        question_first = bool(self.tokenizer.padding_side == "right")
+        enc = output["encoding"]
+
+        # Encoding was *not* padded, input_ids *might*.
+        # It doesn't make a difference unless we're padding on
+        # the left hand side, since now we have different offsets
+        # everywhere.
+        if self.tokenizer.padding_side == "left":
+            offset = (output["input_ids"] == self.tokenizer.pad_token_id).numpy().sum()
+        else:
+            offset = 0
+
+        # Sometimes the max probability token is in the middle of a word so:
+        # - we start by finding the right word containing the token with `token_to_word`
+        # - then we convert this word in a character span with `word_to_chars`
+        sequence_index = 1 if question_first else 0
+        start_index, end_index = self.get_indices(enc, s - offset, e - offset, sequence_index, align_to_words)
+        return {
+            "score": score,
+            "start": start_index,
+            "end": end_index,
+            "answer": example.context_text[start_index:end_index],
+        }
+
     def get_indices(
         self, enc: "tokenizers.Encoding", s: int, e: int, sequence_index: int, align_to_words: bool
     ) -> Tuple[int, int]:
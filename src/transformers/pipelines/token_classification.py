@@ -315,23 +315,212 @@ class TokenClassificationPipeline(ChunkPipeline):
                 input_ids = input_ids.numpy()
                 offset_mapping = offset_mapping.numpy() if offset_mapping is not None else None
 
-            pre_entities = self.gather_pre_entities(
-                sentence, input_ids, scores, offset_mapping, special_tokens_mask, aggregation_strategy
-            )
-            grouped_entities = self.aggregate(pre_entities, aggregation_strategy)
-            # Filter anything that is in self.ignore_labels
-            entities = [
-                entity
-                for entity in grouped_entities
-                if entity.get("entity", None) not in ignore_labels
-                and entity.get("entity_group", None) not in ignore_labels
-            ]
+            if self._has_default_aggregation():
+                entities = self.aggregate_arrays(
+                    sentence,
+                    input_ids,
+                    scores,
+                    offset_mapping,
+                    special_tokens_mask,
+                    aggregation_strategy,
+                    ignore_labels,
+                )
+            else:
+                # A subclass customized the aggregation of the pre-entities dicts, keep using it
+                pre_entities = self.gather_pre_entities(
+                    sentence, input_ids, scores, offset_mapping, special_tokens_mask, aggregation_strategy
+                )
+                grouped_entities = self.aggregate(pre_entities, aggregation_strategy)
+                # Filter anything that is in self.ignore_labels
+                entities = [
+                    entity
+                    for entity in grouped_entities
+                    if entity.get("entity", None) not in ignore_labels
+                    and entity.get("entity_group", None) not in ignore_labels
+                ]
             all_entities.extend(entities)
         num_chunks = len(all_outputs)
         if num_chunks > 1:
             all_entities = self.aggregate_overlapping_entities(all_entities)
         return all_entities
 
+    def _has_default_aggregation(self) -> bool:
+        return all(
+            getattr(type(self), name) is getattr(TokenClassificationPipeline, name)
+            for name in (
+                "gather_pre_entities",
+                "aggregate",
+                "aggregate_word",
+                "aggregate_words",
+                "group_sub_entities",
+                "get_tag",
+                "group_entities",
+            )
+        )
+
+    def aggregate_arrays(
+        self,
+        sentence: str,
+        input_ids: np.ndarray,
+        scores: np.ndarray,
+        offset_mapping: Optional[List[Tuple[int, int]]],
+        special_tokens_mask: np.ndarray,
+        aggregation_strategy: AggregationStrategy,
+        ignore_labels: List[str],
+    ) -> List[dict]:
+        """
+        Array based equivalent of `gather_pre_entities`, `aggregate` and the `ignore_labels` filtering. Word boundaries
+        and entity groups are computed on whole arrays, and dicts are only built for the final entities.
+        """
+        token_indices = np.flatnonzero(np.asarray(special_tokens_mask) == 0)
+        if len(token_indices) == 0:
+            return []
+        scores = scores[token_indices]
+        input_ids = np.asarray(input_ids)[token_indices]
+        words = self.tokenizer.convert_ids_to_tokens(input_ids.tolist())
+
+        is_subword = np.zeros(len(words), dtype=bool)
+        if offset_mapping is not None:
+            offsets = np.asarray(offset_mapping)[token_indices]
+            starts, ends = offsets[:, 0], offsets[:, 1]
+            is_unk = input_ids == self.tokenizer.unk_token_id
+            if aggregation_strategy in {
+                AggregationStrategy.FIRST,
+                AggregationStrategy.AVERAGE,
+                AggregationStrategy.MAX,
+            }:
+                is_subword = self._is_subword(sentence, words, starts, ends) & ~is_unk
+            for idx in np.flatnonzero(is_unk):
+                words[idx] = sentence[starts[idx] : ends[idx]]
+
+        def get_offsets(first_token, last_token):
+            if offset_mapping is None:
+                return None, None
+            start_ind = offset_mapping[token_indices[first_token]][0]
+            end_ind = offset_mapping[token_indices[last_token]][1]
+            if not isinstance(start_ind, int) and self.framework == "pt":
+                start_ind = start_ind.item()
+                end_ind = end_ind.item()
+            return start_ind, end_ind
+
+        if aggregation_strategy in {AggregationStrategy.NONE, AggregationStrategy.SIMPLE}:
+            # Every token is its own word
+            word_starts = np.arange(len(words))
+            labels = scores.argmax(axis=-1)
+            label_scores = scores[word_starts, labels]
+            word_strings = words
+        else:
+            # The first token always starts a word
+            is_subword[0] = False
+            word_starts = np.flatnonzero(~is_subword)
+            labels, label_scores = self._aggregate_word_scores(scores, word_starts, aggregation_strategy)
+            word_strings = _LazyWords(self.tokenizer, words, word_starts)
+        word_ends = np.append(word_starts[1:], len(words))
+
+        if aggregation_strategy == AggregationStrategy.NONE:
+            entities = []
+            for idx in np.flatnonzero(~np.isin(labels, self._label_ids(ignore_labels))):
+                start_ind, end_ind = get_offsets(idx, idx)
+                entity = {
+                    "entity": self.model.config.id2label[labels[idx]],
+                    "score": label_scores[idx],
+                    "index": int(token_indices[idx]),
+                    "word": words[idx],
+                    "start": start_ind,
+                    "end": end_ind,
+                }
+                entities.append(entity)
+            return entities
+
+        # Run-length grouping of the adjacent words with the same tag, a B- tag always starts a new group
+        is_begin, tag_ids, group_names = self._label_tags()
+        word_tags = tag_ids[labels]
+        starts_group = np.concatenate([[True], (word_tags[1:] != word_tags[:-1]) | is_begin[labels[1:]]])
+        group_starts = np.flatnonzero(starts_group)
+        group_ends = np.append(group_starts[1:], len(labels))
+
+        entity_groups = []
+        for first, last in zip(group_starts.tolist(), group_ends.tolist()):
+            entity_group = group_names[labels[first]]
+            if entity_group in ignore_labels:
+                continue
+            start_ind, end_ind = get_offsets(word_starts[first], word_ends[last - 1] - 1)
+            entity_groups.append(
+                {
+                    "entity_group": entity_group,
+                    "score": np.mean(np.nanmean(label_scores[first:last])),
+                    "word": self.tokenizer.convert_tokens_to_string([word_strings[i] for i in range(first, last)]),
+                    "start": start_ind,
+                    "end": end_ind,
+                }
+            )
+        return entity_groups
+
+    def _is_subword(self, sentence, words, starts, ends) -> np.ndarray:
+        """Array based equivalent of the `is_subword` detection of `gather_pre_entities`."""
+        if getattr(self.tokenizer, "_tokenizer", None) and getattr(
+            self.tokenizer._tokenizer.model, "continuing_subword_prefix", None
+        ):
+            # This is a BPE, word aware tokenizer, there is a correct way
+            # to fuse tokens
+            sentence_length = len(sentence)
+            word_ref_lengths = np.maximum(np.minimum(ends, sentence_length) - np.minimum(starts, sentence_length), 0)
+            word_lengths = np.fromiter(map(len, words), dtype=np.int64, count=len(words))
+            return word_lengths != word_ref_lengths
+
+        # This is a fallback heuristic. This will fail most likely on any kind of text + punctuation mixtures that will
+        # be considered "words". Non word aware models cannot do better than this unfortunately.
+        warnings.warn("Tokenizer does not support real words, using fallback heuristic", UserWarning)
+        # `sentence[start - 1 : start + 1]` can contain a space, the extra position stands for the end of the sentence
+        is_space = np.zeros(len(sentence) + 1, dtype=bool)
+        is_space[:-1] = np.frombuffer(sentence.encode("utf-32-le", "surrogatepass"), dtype=np.uint32) == ord(" ")
+        before = is_space[np.clip(starts - 1, 0, len(sentence))]
+        at = is_space[np.clip(starts, 0, len(sentence))]
+        return (starts > 0) & ~before & ~at
+
+    def _aggregate_word_scores(self, scores, word_starts, aggregation_strategy) -> Tuple[np.ndarray, np.ndarray]:
+        """Array based equivalent of the label and score selection of `aggregate_word`, for all the words at once."""
+        if aggregation_strategy == AggregationStrategy.FIRST:
+            word_scores = scores[word_starts]
+        elif aggregation_strategy == AggregationStrategy.MAX:
+            # The first token of each word with the highest score
+            token_max = scores.max(axis=-1)
+            word_max = np.maximum.reduceat(token_max, word_starts)
+            word_lengths = np.diff(np.append(word_starts, len(scores)))
+            positions = np.where(token_max == np.repeat(word_max, word_lengths), np.arange(len(scores)), len(scores))
+            word_scores = scores[np.minimum.reduceat(positions, word_starts)]
+        elif aggregation_strategy == AggregationStrategy.AVERAGE:
+            # Single token words are their own average, only words split into subwords need `np.nanmean`
+            word_ends = np.append(word_starts[1:], len(scores))
+            word_scores = scores[word_starts]
+            for index in np.flatnonzero(word_ends - word_starts > 1):
+                word_scores[index] = np.nanmean(scores[word_starts[index] : word_ends[index]], axis=0)
+        else:
+            raise ValueError("Invalid aggregation_strategy")
+        labels = word_scores.argmax(axis=-1)
+        return labels, word_scores[np.arange(len(labels)), labels]
+
+    def _label_ids(self, label_names: List[str]) -> List[int]:
+        return [label_id for label_id, label in self.model.config.id2label.items() if label in label_names]
+
+    def _label_tags(self) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+        """
+        For every label id, whether it is a B- tag, an id of its tag (as defined by `get_tag`), and the name of the
+        group it starts (as defined by `group_sub_entities`).
+        """
+        id2label = self.model.config.id2label
+        num_labels = max(id2label) + 1
+        is_begin = np.zeros(num_labels, dtype=bool)
+        tag_ids = np.full(num_labels, -1, dtype=np.int64)
+        group_names = [None] * num_labels
+        tags = {}
+        for label_id, label in id2label.items():
+            bi, tag = self.get_tag(label)
+            is_begin[label_id] = bi == "B"
+            tag_ids[label_id] = tags.setdefault(tag, len(tags))
+            group_names[label_id] = label.split("-", 1)[-1]
+        return is_begin, tag_ids, group_names
+
     def aggregate_overlapping_entities(self, entities):
         if len(entities) == 0:
             return entities
@@ -567,4 +756,19 @@ class TokenClassificationPipeline(ChunkPipeline):
         return entity_groups
 
 
+class _LazyWords:
+    """
+    The string of every word, starting at the `tokens` indices in `word_starts`, only decoded when accessed.
+    """
+
+    def __init__(self, tokenizer, tokens, word_starts):
+        self.tokenizer = tokenizer
+        self.tokens = tokens
+        self.word_starts = word_starts
+        self.word_ends = np.append(word_starts[1:], len(tokens))
+
+    def __getitem__(self, index):
+        return self.tokenizer.convert_tokens_to_string(self.tokens[self.word_starts[index] : self.word_ends[index]])
+
+
 NerPipeline = TokenClassificationPipeline
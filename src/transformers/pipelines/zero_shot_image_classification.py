@@ -15,7 +15,7 @@ from .base import Pipeline, build_pipeline_init_args
 if is_vision_available():
     from PIL import Image
 
-    from ..image_utils import load_image
+    from ..image_utils import ImagePrefetcher, load_image
 
 if is_torch_available():
     import torch
@@ -29,7 +29,7 @@ if is_tf_available():
 logger = logging.get_logger(__name__)
 
 
-@add_end_docstrings(build_pipeline_init_args(has_image_processor=True))
+@add_end_docstrings(build_pipeline_init_args(has_image_processor=True, supports_image_prefetching=True))
 class ZeroShotImageClassificationPipeline(Pipeline):
     """
     Zero shot image classification pipeline using `CLIPModel`. This pipeline predicts the class of an image when you
@@ -63,7 +63,7 @@ class ZeroShotImageClassificationPipeline(Pipeline):
     [huggingface.co/models](https://huggingface.co/models?filter=zero-shot-image-classification).
     """
 
-    def __init__(self, **kwargs):
+    def __init__(self, prefetch_images: Union[bool, "ImagePrefetcher"] = False, **kwargs):
         super().__init__(**kwargs)
 
         requires_backends(self, "vision")
@@ -72,6 +72,9 @@ class ZeroShotImageClassificationPipeline(Pipeline):
             if self.framework == "tf"
             else MODEL_FOR_ZERO_SHOT_IMAGE_CLASSIFICATION_MAPPING_NAMES
         )
+        if prefetch_images is True:
+            prefetch_images = ImagePrefetcher()
+        self.image_prefetcher = prefetch_images or None
 
     def __call__(self, images: Union[str, List[str], "Image", List["Image"]], **kwargs):
         """
@@ -294,3 +294,42 @@ def id_tensor_storage(tensor: torch.Tensor) -> Tuple[torch.device, int, int]:
         unique_id = storage_ptr(tensor)
 
     return tensor.device, unique_id, storage_size(tensor)
+
+
+def copy_tensors_to_cpu(obj):
+    """
+    Returns a copy of a (nested) dict, list or tuple in which all the tensors are copied to the CPU, so that it can be
+    written to the disk while the original tensors keep being updated. Tensors on an accelerator are copied to pinned
+    memory, and tensors sharing the same data are copied once and stay shared.
+    """
+    copies = {}
+    synchronize = False
+
+    def _copy(obj):
+        nonlocal synchronize
+        if isinstance(obj, dict):
+            result = type(obj)((key, _copy(value)) for key, value in obj.items())
+            if hasattr(obj, "_metadata"):
+                result._metadata = obj._metadata
+            return result
+        if isinstance(obj, tuple) and hasattr(obj, "_fields"):
+            return type(obj)(*(_copy(value) for value in obj))
+        if isinstance(obj, (list, tuple)):
+            return type(obj)(_copy(value) for value in obj)
+        if not isinstance(obj, torch.Tensor) or obj.device.type == "meta":
+            return obj
+        key = (obj.device, obj.data_ptr(), obj.dtype, obj.shape, obj.stride())
+        if key not in copies:
+            if obj.device.type == "cpu":
+                copies[key] = obj.detach().clone()
+            else:
+                pin_memory = obj.device.type == "cuda"
+                copies[key] = torch.empty_like(obj, device="cpu", pin_memory=pin_memory)
+                copies[key].copy_(obj.detach(), non_blocking=pin_memory)
+                synchronize = synchronize or pin_memory
+        return copies[key]
+
+    obj = _copy(obj)
+    if synchronize:
+        torch.cuda.synchronize()
+    return obj
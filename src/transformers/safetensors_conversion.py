@@ -1,11 +1,22 @@
+import collections
 import json
+import os
+import re
+import sys
 import uuid
-from typing import Optional
+from typing import Dict, List, Optional, Union
 
 import requests
 from huggingface_hub import Discussion, HfApi, get_repo_discussions
 
-from .utils import cached_file, logging
+from .utils import (
+    SAFE_WEIGHTS_INDEX_NAME,
+    SAFE_WEIGHTS_NAME,
+    WEIGHTS_INDEX_NAME,
+    WEIGHTS_NAME,
+    cached_file,
+    logging,
+)
 
 
 logger = logging.get_logger(__name__)
@@ -105,3 +116,185 @@ def auto_conversion(pretrained_model_name_or_path: str, **cached_file_kwargs):
 
     resolved_archive_file = cached_file(pretrained_model_name_or_path, filename, **cached_file_kwargs)
     return resolved_archive_file, sha, sharded
+
+
+def _get_discarded_tied_weights(folder: str) -> Optional[List[str]]:
+    # The tied weights that can be dropped are the ones `from_pretrained` ties back, given by the architecture in the
+    # config of the checkpoint
+    config_file = os.path.join(folder, "config.json")
+    if not os.path.isfile(config_file):
+        return None
+    with open(config_file, "r", encoding="utf-8") as f:
+        architectures = json.load(f).get("architectures") or []
+    if len(architectures) == 0:
+        return None
+
+    import transformers
+
+    model_class = getattr(transformers, architectures[0], None)
+    if model_class is None:
+        return None
+    return getattr(model_class, "_tied_weights_keys", None) or []
+
+
+def _write_safetensors_file(state_dict, filename: str, metadata: Optional[Dict[str, str]] = None):
+    """
+    Writes a state dict in the safetensors format one tensor at a time, so that non-contiguous tensors are the only
+    ones copied in memory, one at a time, instead of serializing the whole state dict in memory first.
+    """
+    import torch
+    from safetensors.torch import save_file
+
+    from .modeling_utils import _SAFETENSORS_DTYPES
+
+    dtype_names = {dtype: name for name, dtype in _SAFETENSORS_DTYPES.items()}
+    if sys.byteorder != "little" or any(tensor.dtype not in dtype_names for tensor in state_dict.values()):
+        save_file({key: value.contiguous() for key, value in state_dict.items()}, filename, metadata=metadata)
+        return
+
+    # Like safetensors, sort the tensors by decreasing size of their dtype so that they are all aligned in the file
+    names = sorted(state_dict, key=lambda name: (-state_dict[name].element_size(), name))
+    header = {} if metadata is None else {"__metadata__": metadata}
+    offset = 0
+    for name in names:
+        tensor = state_dict[name]
+        size = tensor.numel() * tensor.element_size()
+        header[name] = {
+            "dtype": dtype_names[tensor.dtype],
+            "shape": list(tensor.shape),
+            "data_offsets": [offset, offset + size],
+        }
+        offset += size
+    header = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    header += b" " * (-len(header) % 8)
+
+    with open(filename, "wb") as f:
+        f.write(len(header).to_bytes(8, "little"))
+        f.write(header)
+        for name in names:
+            f.write(state_dict[name].detach().contiguous().reshape(-1).view(torch.uint8).numpy().data)
+
+
+def _verify_safetensors_file(state_dict, filename: str):
+    from safetensors import safe_open
+
+    from .modeling_utils import _tensor_hash
+
+    with safe_open(filename, framework="pt") as f:
+        if set(f.keys()) != set(state_dict):
+            raise ValueError(f"The tensors saved in {filename} are not the ones of the original checkpoint.")
+        for name, tensor in state_dict.items():
+            if _tensor_hash(f.get_tensor(name)) != _tensor_hash(tensor):
+                raise ValueError(
+                    f"The checksum of {name} in {filename} does not match the one of the original tensor."
+                )
+
+
+def convert_checkpoint_to_safetensors(
+    folder: Union[str, os.PathLike],
+    output_dir: Optional[Union[str, os.PathLike]] = None,
+    variant: Optional[str] = None,
+    discard_tied_weights: Optional[List[str]] = None,
+    verify: bool = True,
+) -> str:
+    """
+    Converts a local PyTorch checkpoint (`pytorch_model.bin` or sharded `pytorch_model-0000x-of-0000y.bin` files with
+    their index) to the safetensors format, without downloading anything nor loading the model.
+
+    The checkpoint is converted shard by shard: each shard is memory mapped (for checkpoints saved in the zipfile
+    format of PyTorch >= 1.6) and written one tensor at a time, so the memory used does not depend on the size of the
+    model. Each output shard is named after the input one (`model-0000x-of-0000y.safetensors`) and the index
+    (`model.safetensors.index.json`) is written last, so the checkpoint is only picked up by `from_pretrained` once
+    complete.
+
+    Tensors sharing the same storage (tied weights) are only saved once: the names dropped are the ones matching
+    `discard_tied_weights`, which defaults to the `_tied_weights_keys` of the architecture in the `config.json` of the
+    checkpoint, since `from_pretrained` ties them back. Without any of them, all the tensors are saved.
+
+    Args:
+        folder (`str` or `os.PathLike`):
+            The folder containing the PyTorch checkpoint.
+        output_dir (`str` or `os.PathLike`, *optional*):
+            The folder where to save the safetensors checkpoint. Defaults to `folder`.
+        variant (`str`, *optional*):
+            The variant of the checkpoint to convert, as in `pytorch_model.<variant>.bin`.
+        discard_tied_weights (`List[str]`, *optional*):
+            Patterns (regular expressions) of the names of the tied weights that can be dropped.
+        verify (`bool`, *optional*, defaults to `True`):
+            Whether or not to check that the checksums of the tensors saved match the ones of the original tensors,
+            after reading them back from the safetensors files.
+
+    Returns:
+        `str`: The path to the safetensors checkpoint file, or to its index for sharded checkpoints.
+    """
+    from .modeling_utils import _add_variant, load_state_dict
+    from .pytorch_utils import id_tensor_storage
+
+    output_dir = folder if output_dir is None else output_dir
+    weights_file = os.path.join(folder, _add_variant(WEIGHTS_NAME, variant))
+    index_file = os.path.join(folder, _add_variant(WEIGHTS_INDEX_NAME, variant))
+    if os.path.isfile(index_file):
+        with open(index_file, "r", encoding="utf-8") as f:
+            shard_files = sorted(set(json.load(f)["weight_map"].values()))
+    elif os.path.isfile(weights_file):
+        shard_files = [os.path.basename(weights_file)]
+    else:
+        raise EnvironmentError(f"Can't find a PyTorch checkpoint ({weights_file} or {index_file}) in {folder}.")
+
+    if discard_tied_weights is None:
+        discard_tied_weights = _get_discarded_tied_weights(folder)
+        if discard_tied_weights is None:
+            logger.warning(
+                f"Could not find the architecture of the checkpoint in {folder}, all the tied weights will be saved."
+            )
+            discard_tied_weights = []
+
+    os.makedirs(output_dir, exist_ok=True)
+    safe_weights_name = _add_variant(SAFE_WEIGHTS_NAME, variant)
+    weight_map = {}
+    total_size = 0
+    output_files = []
+    progress_bar = logging.tqdm(shard_files, desc="Converting checkpoint shards", disable=len(shard_files) <= 1)
+    for idx, shard_file in enumerate(progress_bar):
+        state_dict = load_state_dict(os.path.join(folder, shard_file))
+
+        # Tensors that are the same view of the same storage are tied: only keep one of them
+        tied_names = collections.defaultdict(list)
+        for name, tensor in state_dict.items():
+            view = (id_tensor_storage(tensor), tensor.data_ptr(), tensor.dtype, tensor.shape, tensor.stride())
+            tied_names[view].append(name)
+        for names in tied_names.values():
+            discarded = [name for name in names if any(re.search(p, name) for p in discard_tied_weights)]
+            if len(discarded) == len(names):
+                discarded = discarded[1:]
+            for name in discarded:
+                logger.info(f"Not saving {name}, which is tied to {[n for n in names if n not in discarded][0]}.")
+                del state_dict[name]
+
+        if len(shard_files) == 1:
+            output_file = safe_weights_name
+        else:
+            match = re.search(r"-\d{5}-of-\d{5}(?=\.bin$)", shard_file)
+            suffix = match.group() if match is not None else f"-{idx + 1:05d}-of-{len(shard_files):05d}"
+            output_file = safe_weights_name.replace(".safetensors", f"{suffix}.safetensors")
+        output_path = os.path.join(output_dir, output_file)
+        # Write to a temporary file first, so that an interrupted conversion does not leave a truncated file behind
+        _write_safetensors_file(state_dict, f"{output_path}.tmp", metadata={"format": "pt"})
+        os.replace(f"{output_path}.tmp", output_path)
+        output_files.append(output_path)
+
+        if verify:
+            _verify_safetensors_file(state_dict, output_path)
+        for name, tensor in state_dict.items():
+            weight_map[name] = output_file
+            total_size += tensor.numel() * tensor.element_size()
+        del state_dict
+
+    if len(shard_files) == 1:
+        return output_files[0]
+
+    index = {"metadata": {"total_size": total_size}, "weight_map": dict(sorted(weight_map.items()))}
+    index_file = os.path.join(output_dir, _add_variant(SAFE_WEIGHTS_INDEX_NAME, variant))
+    with open(index_file, "w", encoding="utf-8") as f:
+        f.write(json.dumps(index, indent=2, sort_keys=True) + "\n")
+    return index_file
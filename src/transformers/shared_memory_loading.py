@@ -0,0 +1,266 @@
+# Copyright 2024 The HuggingFace Team. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Sharing of the weights of a checkpoint between the processes of a host loading it at the same time.
+
+The first process loading a checkpoint becomes its coordinator: it reads each file of the checkpoint once, converts its
+tensors to the dtype of the model and writes them to a safetensors file in shared memory, that all the processes then
+memory map without copying it. The other processes ask the coordinator for these files over a local socket, with a
+one-line JSON request and response, and wait for them to be written.
+"""
+
+import atexit
+import hashlib
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+from typing import List, Optional
+
+from .utils import logging
+
+
+logger = logging.get_logger(__name__)
+
+
+SHARED_MEMORY_DIR = os.getenv("TRANSFORMERS_SHARED_MEMORY_DIR", "/dev/shm")
+# How long (in seconds) a process waits for the coordinator to write the shared files before loading the checkpoint
+# itself.
+SHARED_MEMORY_LOADING_TIMEOUT = float(os.getenv("TRANSFORMERS_SHARED_MEMORY_LOADING_TIMEOUT", 1800))
+
+# Coordinators running in this process, by checkpoint key
+_coordinators = {}
+
+
+def _checkpoint_key(checkpoint_files: List[str], dtype, keep_in_fp32_modules: Optional[List[str]]) -> str:
+    files = []
+    for checkpoint_file in checkpoint_files:
+        stat = os.stat(checkpoint_file)
+        files.append((os.path.abspath(checkpoint_file), stat.st_size, stat.st_mtime_ns))
+    description = {"files": files, "dtype": str(dtype), "keep_in_fp32_modules": sorted(keep_in_fp32_modules or [])}
+    return hashlib.sha256(json.dumps(description).encode("utf-8")).hexdigest()[:32]
+
+
+def _write_shared_files(
+    checkpoint_files: List[str], shared_files: List[str], dtype, keep_in_fp32_modules: Optional[List[str]]
+):
+    import torch
+
+    from .modeling_utils import load_state_dict
+    from .safetensors_conversion import _write_safetensors_file
+
+    written_files = []
+    tmp_file = None
+    try:
+        for checkpoint_file, shared_file in zip(checkpoint_files, shared_files):
+            state_dict = load_state_dict(checkpoint_file, mmap_weights=True)
+            # Same conversions as the ones of `_load_state_dict_into_meta_model`, so that the shared tensors are used
+            # as is
+            if dtype is not None:
+                for key, tensor in state_dict.items():
+                    if not torch.is_floating_point(tensor):
+                        continue
+                    if (
+                        keep_in_fp32_modules is not None
+                        and dtype == torch.float16
+                        and any(module in key.split(".") for module in keep_in_fp32_modules)
+                    ):
+                        state_dict[key] = tensor.to(torch.float32)
+                    else:
+                        state_dict[key] = tensor.to(dtype)
+            tmp_file = f"{shared_file}.{os.getpid()}.tmp"
+            _write_safetensors_file(state_dict, tmp_file, metadata={"format": "pt"})
+            os.replace(tmp_file, shared_file)
+            written_files.append(shared_file)
+            del state_dict
+        # All the files were written, they are kept
+        written_files = []
+    finally:
+        # Otherwise, none of them is left in shared memory, nor the temporary file of the one being written
+        for path in written_files + [tmp_file]:
+            if path is not None and os.path.exists(path):
+                os.remove(path)
+
+
+def _receive_line(connection: socket.socket) -> Optional[dict]:
+    data = b""
+    while not data.endswith(b"\n"):
+        chunk = connection.recv(4096)
+        if not chunk:
+            return None
+        data += chunk
+    return json.loads(data)
+
+
+class _Coordinator:
+    """
+    Answers the requests of the other processes for the shared files of a checkpoint, from a background thread, and
+    removes these files when the process exits (the processes which mapped them keep them until they unmap them).
+    """
+
+    def __init__(self, key: str, lock_fd: int, socket_path: str, shared_files: List[str]):
+        self.key = key
+        self.lock_fd = lock_fd
+        self.socket_path = socket_path
+        self.shared_files = shared_files
+        self.response = None
+        self.ready = threading.Event()
+
+        # The lock guarantees that a socket left here is the one of a coordinator which died
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        self.server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.server.bind(socket_path)
+        self.server.listen()
+        threading.Thread(target=self._serve, name="shared_memory_loading", daemon=True).start()
+
+    def _serve(self):
+        while True:
+            try:
+                connection, _ = self.server.accept()
+            except OSError:
+                # The server was closed
+                return
+            with connection:
+                try:
+                    connection.settimeout(10)
+                    request = _receive_line(connection)
+                    self.ready.wait()
+                    response = self.response
+                    if request is None or request.get("key") != self.key:
+                        response = {"status": "error", "message": "Unknown checkpoint."}
+                    connection.sendall(json.dumps(response).encode("utf-8") + b"\n")
+                except (OSError, ValueError) as e:
+                    logger.debug(f"Could not answer a request for the shared files of a checkpoint: {e}")
+
+    def set_response(self, response: dict):
+        self.response = response
+        self.ready.set()
+
+    def close(self, remove_files: bool = True):
+        self.server.close()
+        if remove_files:
+            for path in self.shared_files + [self.socket_path]:
+                if os.path.exists(path):
+                    os.remove(path)
+        os.close(self.lock_fd)
+
+
+@atexit.register
+def _close_coordinators():
+    for coordinator in _coordinators.values():
+        coordinator.close()
+    _coordinators.clear()
+
+
+def _forget_coordinators():
+    # Forked processes inherit the socket and the lock of the coordinators but not their threads
+    for coordinator in _coordinators.values():
+        coordinator.close(remove_files=False)
+    _coordinators.clear()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_coordinators)
+
+
+def _request_shared_files(socket_path: str, key: str, deadline: float) -> Optional[dict]:
+    """
+    Asks the coordinator of a checkpoint for its shared files, returns `None` if there is no coordinator (anymore).
+    """
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+            connection.settimeout(max(deadline - time.monotonic(), 0.1))
+            connection.connect(socket_path)
+            connection.sendall(json.dumps({"key": key}).encode("utf-8") + b"\n")
+            return _receive_line(connection)
+    except (FileNotFoundError, ConnectionError):
+        return None
+
+
+def get_shared_memory_checkpoint_files(
+    checkpoint_files: List[str], dtype=None, keep_in_fp32_modules: Optional[List[str]] = None
+) -> Optional[List[str]]:
+    """
+    Returns the files of `SHARED_MEMORY_DIR` containing the tensors of `checkpoint_files` (one safetensors file per
+    checkpoint file), with the floating point tensors converted to `dtype` (or to float32 for the ones of the
+    `keep_in_fp32_modules` when `dtype` is float16), to memory map instead of loading `checkpoint_files`.
+
+    The first process calling this function for given files writes the shared files while the other ones wait for them.
+    Returns `None` when they can't be shared (not on Linux, or the shared files couldn't be written or weren't written
+    after `SHARED_MEMORY_LOADING_TIMEOUT` seconds): the checkpoint should then be loaded as usual.
+    """
+    try:
+        import fcntl
+    except ImportError:
+        return None
+    if not hasattr(socket, "AF_UNIX") or not os.path.isdir(SHARED_MEMORY_DIR):
+        return None
+
+    key = _checkpoint_key(checkpoint_files, dtype, keep_in_fp32_modules)
+    if key in _coordinators:
+        coordinator = _coordinators[key]
+        coordinator.ready.wait()
+        return coordinator.shared_files if coordinator.response["status"] == "ready" else None
+
+    shared_files = [
+        os.path.join(SHARED_MEMORY_DIR, f"transformers-{key}-{index:05d}.safetensors")
+        for index in range(len(checkpoint_files))
+    ]
+    socket_path = os.path.join(tempfile.gettempdir(), f"transformers-{key}.sock")
+    lock_path = os.path.join(tempfile.gettempdir(), f"transformers-{key}.lock")
+    deadline = time.monotonic() + SHARED_MEMORY_LOADING_TIMEOUT
+    try:
+        while time.monotonic() < deadline:
+            response = _request_shared_files(socket_path, key, deadline)
+            if response is not None:
+                if response["status"] != "ready":
+                    logger.warning(f"The checkpoint couldn't be shared by another process: {response['message']}")
+                    return None
+                # Only use files written by the same user
+                if response["files"] != shared_files or any(
+                    os.stat(path).st_uid != os.getuid() for path in shared_files
+                ):
+                    logger.warning(f"Unexpected shared files for the checkpoint: {response['files']}")
+                    return None
+                return shared_files
+
+            # No coordinator answered: this process becomes the coordinator, unless another one just did
+            lock_fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                fcntl.flock(lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                os.close(lock_fd)
+                time.sleep(0.1)
+                continue
+            coordinator = _Coordinator(key, lock_fd, socket_path, shared_files)
+            _coordinators[key] = coordinator
+            try:
+                _write_shared_files(checkpoint_files, shared_files, dtype, keep_in_fp32_modules)
+            except Exception as e:
+                coordinator.set_response({"status": "error", "message": str(e)})
+                logger.warning(f"Could not write the checkpoint to shared memory: {e}")
+                return None
+            coordinator.set_response({"status": "ready", "files": shared_files})
+            return shared_files
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not load the checkpoint from shared memory: {e}")
+        return None
+
+    logger.warning(
+        f"The checkpoint was not written to shared memory by another process after {SHARED_MEMORY_LOADING_TIMEOUT}s."
+    )
+    return None
@@ -17,11 +17,19 @@
  tokenization_utils_fast.py
 """
 import bisect
+import heapq
 import itertools
+import math
+import os
+import pickle
 import re
 import unicodedata
+import weakref
 from collections import OrderedDict
-from typing import Any, Dict, List, Optional, Tuple, Union, overload
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Tuple, Union, overload
+
+import numpy as np
 
 from .tokenization_utils_base import (
     ENCODE_KWARGS_DOCSTRING,
@@ -38,7 +46,22 @@ from .tokenization_utils_base import (
     TextInputPair,
     TruncationStrategy,
 )
-from .utils import PaddingStrategy, TensorType, add_end_docstrings, logging
+from .utils import (
+    PaddingStrategy,
+    TensorType,
+    add_end_docstrings,
+    is_tf_available,
+    is_torch_available,
+    logging,
+    to_py_obj,
+)
+
+
+if TYPE_CHECKING:
+    if is_torch_available():
+        import torch
+    if is_tf_available():
+        import tensorflow as tf
 
 
 logger = logging.get_logger(__name__)
@@ -58,6 +81,7 @@ class Trie:
     def __init__(self):
         self.data = {}
         self._tokens = set()
+        self._pattern = None
 
     def add(self, word: str):
         """
@@ -84,6 +108,7 @@ class Trie:
             return
 
         self._tokens.add(word)
+        self._pattern = None
         ref = self.data
         for char in word:
             ref[char] = char in ref and ref[char] or {}
@@ -111,137 +136,41 @@ class Trie:
         ["[CLS]", " This is a ", "extra_id_100"]
         ```
         """
-        # indexes are counted left of the chars index.
-        # "hello", index 0, is left of h, index 1 is between h and e.
-        # index 5 is right of the "o".
-
-        # States are going to capture every possible start (indexes as above)
-        # as keys, and have as values, a pointer to the position in the trie
-        # where we're at. This is a partial match for now.
-        # This enables to keep track of multiple matches while we're iterating
-        # the string
-        # If the trie contains, "blowing", and "lower" and we encounter the
-        # string "blower", we need to split into ["b", "lower"].
-        # This is where we need to keep track of multiple possible starts.
-        states = OrderedDict()
-
-        # This will contain every indices where we need
-        # to cut.
-        # We force to cut at offset 0 and len(text) (added later)
+        if not self.data:
+            return self.cut_text(text, [0])
+        if self._pattern is None:
+            self._pattern = re.compile(self._to_regex(self.data))
+
+        # The regex only matches the words of the trie and, at each position, the longest one: the text is scanned in
+        # C and only the boundaries of the matches are kept.
         offsets = [0]
+        for match in self._pattern.finditer(text):
+            offsets.extend(match.span())
+        return self.cut_text(text, offsets)
 
-        # This is used by the lookahead which needs to skip over
-        # some text where the full match exceeded the place in the initial
-        # for loop
-        skip = 0
-        # Main loop, Giving this algorithm O(n) complexity
-        for current, current_char in enumerate(text):
-            if skip and current < skip:
-                # Prevents the lookahead for matching twice
-                # like extra_id_100 and id_100
+    def _to_regex(self, node: dict) -> str:
+        """
+        Converts the sub-trie starting at `node` to a regex matching the longest word it contains. The branches start
+        with distinct characters, and the words ending at `node` make the branches optional, so the regex engine tries
+        the longest continuations first and backtracks to the shortest ones.
+        """
+        branches = []
+        for char, child in node.items():
+            if char == "":
                 continue
-
-            # This will track every state
-            # that stop matching, we need to stop tracking them.
-            # If we look at "lowball", we're going to match "l" (add it to states), "o", "w", then
-            # fail on "b", we need to remove 0 from the valid states.
-            to_remove = set()
-            # Whenever we found a match, we need to drop everything
-            # this is a greedy algorithm, it will match on the first found token
-            reset = False
-
-            # In this case, we already have partial matches (But unfinished)
-            for start, trie_pointer in states.items():
-                if "" in trie_pointer:
-                    # This is a final match, we need to reset and
-                    # store the results in `offsets`.
-
-                    # Lookahead to match longest first
-                    # Important in case of extra_id_1 vs extra_id_100
-                    # Here we are also actively looking for other earlier partial
-                    # matches
-                    # "[CLS]", "L", we need to match CLS even if L is special
-                    for lookstart, looktrie_pointer in states.items():
-                        if lookstart > start:
-                            # This partial match is later, we can stop looking
-                            break
-                        elif lookstart < start:
-                            # This partial match is earlier, the trie pointer
-                            # was already updated, so index is + 1
-                            lookahead_index = current + 1
-                            end = current + 1
-                        else:
-                            # Here lookstart == start and
-                            #      looktrie_pointer == trie_pointer
-                            # It wasn't updated yet so indices are current ones
-                            lookahead_index = current
-                            end = current
-                        next_char = text[lookahead_index] if lookahead_index < len(text) else None
-                        if "" in looktrie_pointer:
-                            start = lookstart
-                            end = lookahead_index
-                            skip = lookahead_index
-
-                        while next_char in looktrie_pointer:
-                            looktrie_pointer = looktrie_pointer[next_char]
-                            lookahead_index += 1
-                            if "" in looktrie_pointer:
-                                start = lookstart
-                                end = lookahead_index
-                                skip = lookahead_index
-
-                            if lookahead_index == len(text):
-                                # End of string
-                                break
-                            next_char = text[lookahead_index]
-                        # End lookahead
-
-                    # Storing and resetting
-                    offsets.append(start)
-                    offsets.append(end)
-                    reset = True
-                    break
-                elif current_char in trie_pointer:
-                    # The current character being looked at has a match within the trie
-                    # update the pointer (it will be stored back into states later).
-                    trie_pointer = trie_pointer[current_char]
-
-                    # Storing back the new pointer into the states.
-                    # Partial matches got longer by one.
-                    states[start] = trie_pointer
-                else:
-                    # The new character has not match in the trie, we need
-                    # to stop keeping track of this partial match.
-                    # We can't do it directly within the loop because of how
-                    # python iteration works
-                    to_remove.add(start)
-
-            # Either clearing the full start (we found a real match)
-            # Or clearing only the partial matches that didn't work.
-            if reset:
-                states = {}
-            else:
-                for start in to_remove:
-                    del states[start]
-
-            # If this character is a starting character within the trie
-            # start keeping track of this partial match.
-            if current >= skip and current_char in self.data:
-                states[current] = self.data[current_char]
-
-        # We have a cut at the end with states.
-        for start, trie_pointer in states.items():
-            if "" in trie_pointer:
-                # This is a final match, we need to reset and
-                # store the results in `offsets`.
-                end = len(text)
-                offsets.append(start)
-                offsets.append(end)
-                # Longest cut is always the one with lower start so the first
-                # item so we need to break.
-                break
-
-        return self.cut_text(text, offsets)
+            # Collapse the chains of characters without branching into a single literal
+            chars = [char]
+            while len(child) == 1 and "" not in child:
+                ((char, child),) = child.items()
+                chars.append(char)
+            branches.append(re.escape("".join(chars)) + self._to_regex(child))
+        if not branches:
+            return ""
+        if "" in node:
+            return "(?:" + "|".join(branches) + ")?"
+        if len(branches) == 1:
+            return branches[0]
+        return "(?:" + "|".join(branches) + ")"
 
     def cut_text(self, text, offsets):
         # We have all the offsets now, we just need to do the actual splitting.
@@ -268,6 +197,153 @@ class Trie:
         return tokens
 
 
+class BytePairEncoder:
+    """
+    Byte-pair encoding of words, shared by the GPT-2 family of tokenizers. The merged words are kept in a
+    least-recently-used cache of bounded size, so that long-running processes do not grow it without limit.
+
+    Args:
+        bpe_ranks (`Dict[Tuple[str, str], int]`):
+            The rank of each merge, the merges with the lowest ranks are applied first.
+        max_cache_size (`int`, *optional*, defaults to 50000):
+            The maximum number of words kept in the cache. Set to `None` for an unbounded cache, or to `0` to disable
+            it.
+        end_of_word_suffix (`str`, *optional*, defaults to `""`):
+            A suffix appended to the last symbol of every word before merging, e.g. `"</w>"`.
+        never_split (`Iterable[str]`, *optional*):
+            Words which are returned as is.
+
+    Example:
+
+    ```python
+    >>> encoder = BytePairEncoder({("l", "o"): 0, ("lo", "w"): 1, ("e", "r"): 2})
+    >>> encoder("lower")
+    'low er'
+
+    >>> encoder.cache_info()
+    {'hits': 0, 'misses': 1, 'max_size': 50000, 'size': 1, 'hit_rate': 0.0}
+    ```
+    """
+
+    def __init__(
+        self,
+        bpe_ranks: Dict[Tuple[str, str], int],
+        max_cache_size: Optional[int] = 50000,
+        end_of_word_suffix: str = "",
+        never_split: Optional[Iterable[str]] = None,
+    ):
+        self.bpe_ranks = bpe_ranks
+        self.max_cache_size = max_cache_size
+        self.end_of_word_suffix = end_of_word_suffix
+        self.never_split = set(never_split) if never_split is not None else set()
+        self.clear_cache()
+
+    def __getstate__(self):
+        # The cache is not worth serializing, and keeping it out makes the pickled tokenizers deterministic
+        state = self.__dict__.copy()
+        state["cache"] = OrderedDict()
+        state["hits"] = state["misses"] = 0
+        return state
+
+    def clear_cache(self):
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def cache_info(self) -> Dict[str, Union[int, float]]:
+        """
+        Returns the statistics of the cache: the number of `hits` and `misses`, its `max_size`, its current `size` and
+        its `hit_rate`.
+        """
+        calls = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "max_size": self.max_cache_size,
+            "size": len(self.cache),
+            "hit_rate": self.hits / calls if calls else 0.0,
+        }
+
+    def __call__(self, token: str) -> str:
+        """
+        Returns the symbols of `token` after applying the merges, separated by spaces.
+        """
+        if token in self.never_split:
+            return token
+        word = self.cache.get(token)
+        if word is not None:
+            self.hits += 1
+            self.cache.move_to_end(token)
+            return word
+
+        self.misses += 1
+        if token:
+            word = " ".join(self.merge(list(token[:-1]) + [token[-1] + self.end_of_word_suffix]))
+        else:
+            word = token
+        if self.max_cache_size is None or self.max_cache_size > 0:
+            self.cache[token] = word
+            if self.max_cache_size is not None and len(self.cache) > self.max_cache_size:
+                self.cache.popitem(last=False)
+        return word
+
+    def merge(self, symbols: List[str]) -> List[str]:
+        """
+        Applies the merges to `symbols` and returns the merged symbols. All the occurrences of the pair with the lowest
+        rank are merged from left to right before looking at the next pair.
+
+        The symbols are kept in a linked list and the candidate pairs in a heap ordered by rank and position, so a word
+        of n symbols is merged in O(n log n) instead of O(n^2).
+        """
+        bpe_ranks = self.bpe_ranks
+        num_symbols = len(symbols)
+        if num_symbols < 2:
+            return symbols
+        # Index of the next/previous alive symbol, the merged symbols are stored at the index of the left one
+        next_index = list(range(1, num_symbols + 1))
+        next_index[-1] = -1
+        prev_index = list(range(-1, num_symbols - 1))
+        heap = [(bpe_ranks[pair], i) for i, pair in enumerate(zip(symbols, symbols[1:])) if pair in bpe_ranks]
+        heapq.heapify(heap)
+
+        while heap:
+            rank = heap[0][0]
+            merged = []
+            # A merge never creates a pair of the same rank, so the occurrences of this pair are all in the heap and
+            # are popped from left to right
+            while heap and heap[0][0] == rank:
+                i = heapq.heappop(heap)[1]
+                j = next_index[i]
+                # Skip the pairs that are no longer adjacent or have already been merged
+                if symbols[i] is None or j == -1 or bpe_ranks.get((symbols[i], symbols[j])) != rank:
+                    continue
+                symbols[i] += symbols[j]
+                symbols[j] = None
+                next_index[i] = next_index[j]
+                if next_index[j] != -1:
+                    prev_index[next_index[j]] = i
+                merged.append(i)
+
+            for i in merged:
+                if symbols[i] is None:
+                    continue
+                j = prev_index[i]
+                if j != -1 and (symbols[j], symbols[i]) in bpe_ranks:
+                    heapq.heappush(heap, (bpe_ranks[symbols[j], symbols[i]], j))
+                j = next_index[i]
+                if j != -1 and (symbols[i], symbols[j]) in bpe_ranks:
+                    heapq.heappush(heap, (bpe_ranks[symbols[i], symbols[j]], i))
+
+        return [symbol for symbol in symbols if symbol is not None]
+
+
+def _lower_chars(text: str) -> str:
+    """Lowercases `text` character by character, `str.lower` would lowercase a final sigma differently."""
+    if "\u03a3" in text:
+        return "".join(char.lower() for char in text)
+    return text.lower()
+
+
 def _is_whitespace(char):
     """Checks whether `char` is a whitespace character."""
     # \t, \n, and \r are technically control characters but we treat them
@@ -319,6 +395,37 @@ def _is_start_of_word(text):
     return bool(_is_control(first_char) | _is_punctuation(first_char) | _is_whitespace(first_char))
 
 
+class _CharacterTable(dict):
+    """
+    Translation table for `str.translate` which maps each character with `mapping_fn` the first time it is seen, so
+    that the unicode properties of a character are only looked up once.
+    """
+
+    def __init__(self, mapping_fn):
+        super().__init__()
+        self.mapping_fn = mapping_fn
+
+    def __missing__(self, cp):
+        value = self.mapping_fn(chr(cp))
+        self[cp] = value
+        return value
+
+
+# Removes the invalid and control characters and turns all the whitespace characters into spaces
+_CLEAN_TEXT_TABLE = _CharacterTable(
+    lambda char: None if char in ("\x00", "\ufffd") or _is_control(char) else (" " if _is_whitespace(char) else char)
+)
+# Removes the nonspacing marks (the accents once the text is NFD normalized)
+_STRIP_ACCENTS_TABLE = _CharacterTable(lambda char: None if unicodedata.category(char) == "Mn" else char)
+# Surrounds the punctuation characters with spaces
+_PUNCTUATION_SPLIT_TABLE = _CharacterTable(lambda char: f" {char} " if _is_punctuation(char) else char)
+# The CJK Unified Ideographs blocks, see `BasicTokenizer._is_chinese_char` in `models/bert/tokenization_bert.py`
+_CHINESE_CHARS_PATTERN = re.compile(
+    r"[\u4e00-\u9fff\u3400-\u4dbf\U00020000-\U0002A6DF\U0002A700-\U0002B73F\U0002B740-\U0002B81F"
+    r"\U0002B820-\U0002CEAF\uf900-\ufaff\U0002F800-\U0002FA1F]"
+)
+
+
 def _insert_one_token_to_ordered_list(token_list: List[str], new_token: str):
     """
     Inserts one token to an ordered list if it does not already exist. Note: token_list must be sorted.
@@ -332,6 +439,151 @@ def _insert_one_token_to_ordered_list(token_list: List[str], new_token: str):
         token_list.insert(insertion_idx, new_token)
 
 
+class _ParallelEncodingPool:
+    """
+    Persistent pool of processes used by [`PreTrainedTokenizer.enable_parallel_encoding`]. Each worker unpickles the
+    tokenizer once, when it starts, and the pool is restarted if the tokenizer changes.
+    """
+
+    def __init__(self, num_workers: int, min_batch_size: int, mp_context=None):
+        self.num_workers = num_workers
+        self.min_batch_size = min_batch_size
+        self.mp_context = mp_context
+        self.executor = None
+        self.tokenizer_state = None
+        self.tokenizer_signature = None
+
+    @staticmethod
+    def _get_tokenizer_signature(tokenizer: "PreTrainedTokenizer") -> tuple:
+        # Changes when an attribute is set (truncation side, special tokens...), when a container attribute changes
+        # size (added tokens, vocabulary...) or when an added token is replaced
+        attributes = tuple(
+            (name, value, len(value) if isinstance(value, (dict, list, set, tuple)) else None)
+            for name, value in tokenizer.__dict__.items()
+        )
+        return attributes, tuple(tokenizer._added_tokens_decoder.values())
+
+    def _is_tokenizer_signature_stale(self, signature: tuple) -> bool:
+        if self.tokenizer_signature is None:
+            return True
+        (attributes, added_tokens), (old_attributes, old_added_tokens) = signature, self.tokenizer_signature
+        if len(attributes) != len(old_attributes) or len(added_tokens) != len(old_added_tokens):
+            return True
+        return any(
+            name != old_name or value is not old_value or size != old_size
+            for (name, value, size), (old_name, old_value, old_size) in zip(attributes, old_attributes)
+        ) or any(token is not old_token for token, old_token in zip(added_tokens, old_added_tokens))
+
+    def get_executor(self, tokenizer: "PreTrainedTokenizer") -> ProcessPoolExecutor:
+        # The tokenizer is only pickled again if it may have changed since the workers were started, and the workers
+        # are only restarted if it did
+        signature = self._get_tokenizer_signature(tokenizer)
+        if self.executor is not None and not self._is_tokenizer_signature_stale(signature):
+            return self.executor
+        tokenizer_state = pickle.dumps(tokenizer)
+        if self.executor is None or tokenizer_state != self.tokenizer_state:
+            self.shutdown()
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.num_workers,
+                mp_context=self.mp_context,
+                initializer=_init_parallel_encoding_worker,
+                initargs=(tokenizer_state,),
+            )
+            self.tokenizer_state = tokenizer_state
+        self.tokenizer_signature = signature
+        return self.executor
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+            self.executor = None
+            self.tokenizer_state = None
+            self.tokenizer_signature = None
+
+
+# Kept outside of the tokenizers so that they can still be pickled, copied and saved
+_PARALLEL_ENCODING_POOLS = weakref.WeakKeyDictionary()
+_worker_tokenizer = None
+
+
+def _init_parallel_encoding_worker(tokenizer_state: bytes):
+    global _worker_tokenizer
+    _worker_tokenizer = pickle.loads(tokenizer_state)
+
+
+def _parallel_encoding_worker(batch_text_or_text_pairs, is_split_into_words, prepare_kwargs, tokenize_kwargs):
+    input_ids = _worker_tokenizer._get_batch_input_ids(
+        batch_text_or_text_pairs, is_split_into_words=is_split_into_words, **tokenize_kwargs
+    )
+    # Padding and the conversion to tensors are done once for the whole batch in the main process
+    batch_outputs = _worker_tokenizer._batch_prepare_for_model(
+        input_ids,
+        padding_strategy=PaddingStrategy.DO_NOT_PAD,
+        pad_to_multiple_of=None,
+        return_attention_mask=False,
+        return_tensors=None,
+        **prepare_kwargs,
+    )
+    return batch_outputs.data
+
+
+def _parallel_decoding_worker(sequences, skip_special_tokens, clean_up_tokenization_spaces, decode_kwargs):
+    return _worker_tokenizer.batch_decode(
+        sequences,
+        skip_special_tokens=skip_special_tokens,
+        clean_up_tokenization_spaces=clean_up_tokenization_spaces,
+        **decode_kwargs,
+    )
+
+
+class _DecodeTables:
+    """
+    Tables indexed by token id used by [`PreTrainedTokenizer.convert_ids_to_tokens`] and
+    [`PreTrainedTokenizer._decode`]: the string of each token, filled lazily, and flags telling if the token is special
+    and if it is decoded on its own. They are rebuilt when tokens are added, the special tokens change or the size of
+    the vocabulary mappings of the tokenizer changes (`VOCAB_MAPPINGS`, e.g. when tokens are added to them in place).
+    """
+
+    # Instance attributes most tokenizers convert their ids and tokens with
+    VOCAB_MAPPINGS = ("vocab", "ids_to_tokens", "encoder", "decoder")
+
+    SPECIAL = 1
+    # Added tokens that are not merged with the neighbouring tokens by `convert_tokens_to_string`
+    STANDALONE = 2
+    # The string of the token is in the table
+    CONVERTED = 4
+
+    def __init__(self, tokenizer: "PreTrainedTokenizer", signature: tuple):
+        self.signature = signature
+        added_tokens_decoder = tokenizer._added_tokens_decoder
+        vocab_size = tokenizer.vocab_size
+        size = max(vocab_size, max(added_tokens_decoder, default=-1) + 1)
+        self.tokens = np.empty(size, dtype=object)
+        self.flags = np.zeros(size, dtype=np.uint8)
+
+        all_special_tokens = tokenizer.all_special_tokens
+        self.standalone_tokens = set(tokenizer._added_tokens_encoder.keys()) - set(all_special_tokens) | {
+            token
+            for token in tokenizer.additional_special_tokens
+            if tokenizer.convert_tokens_to_ids(token) >= vocab_size
+        }
+        for index in tokenizer.convert_tokens_to_ids(all_special_tokens):
+            if index is not None and 0 <= index < size:
+                self.flags[index] |= self.SPECIAL
+        for index, token in added_tokens_decoder.items():
+            self.tokens[index] = token.content
+            self.flags[index] |= self.CONVERTED | (self.STANDALONE if token.content in self.standalone_tokens else 0)
+
+    def convert(self, tokenizer: "PreTrainedTokenizer", indices: np.ndarray):
+        for index in indices.tolist():
+            token = tokenizer._convert_id_to_token(index)
+            self.tokens[index] = token
+            self.flags[index] |= self.CONVERTED | (self.STANDALONE if token in self.standalone_tokens else 0)
+
+
+_DECODE_TABLES = weakref.WeakKeyDictionary()
+
+
 @add_end_docstrings(INIT_TOKENIZER_DOCSTRING)
 class PreTrainedTokenizer(PreTrainedTokenizerBase):
     """
@@ -350,6 +602,7 @@ class PreTrainedTokenizer(PreTrainedTokenizerBase):
         # 1. Init the parent class
 
         self.tokens_trie = Trie()
+        self._no_lowercase_pattern = None
 
         # 2. init `_added_tokens_decoder` if child class did not
         if not hasattr(self, "_added_tokens_decoder"):
@@ -411,6 +664,8 @@ class PreTrainedTokenizer(PreTrainedTokenizerBase):
 
             self._added_tokens_decoder[index] = AddedToken(token) if isinstance(token, str) else token
             self._added_tokens_encoder[str(token)] = index
+        self._no_lowercase_pattern = None
+        _DECODE_TABLES.pop(self, None)
 
     def get_added_vocab(self) -> Dict[str, int]:
         """
@@ -508,6 +763,8 @@ class PreTrainedTokenizer(PreTrainedTokenizerBase):
         return added_tokens
 
     def _update_trie(self, unique_no_split_tokens: Optional[str] = []):
+        self._no_lowercase_pattern = None
+        _DECODE_TABLES.pop(self, None)
         for token in self._added_tokens_decoder.values():
             if token not in self.tokens_trie._tokens:
                 self.tokens_trie.add(token.content)
@@ -562,15 +819,8 @@ class PreTrainedTokenizer(PreTrainedTokenizerBase):
             logger.warning(f"Keyword arguments {kwargs} not recognized.")
 
         if hasattr(self, "do_lower_case") and self.do_lower_case:
-            # convert non-special tokens to lowercase. Might be super slow as well?
-            escaped_special_toks = [re.escape(s_tok) for s_tok in (self.all_special_tokens)]
-            escaped_special_toks += [
-                re.escape(s_tok.content)
-                for s_tok in (self._added_tokens_decoder.values())
-                if not s_tok.special and s_tok.normalized
-            ]
-            pattern = r"(" + r"|".join(escaped_special_toks) + r")|" + r"(.+?)"
-            text = re.sub(pattern, lambda m: m.groups()[0] or m.groups()[1].lower(), text)
+            # convert non-special tokens to lowercase
+            text = self._lowercase_non_special_tokens(text)
 
         if split_special_tokens:
             no_split_token = []
@@ -618,6 +868,32 @@ class PreTrainedTokenizer(PreTrainedTokenizerBase):
         # ["This", " is", " something", "<special_token_1>", "else"]
         return tokenized_text
 
+    def _lowercase_non_special_tokens(self, text: str) -> str:
+        # The special tokens can be set without adding tokens, so they are part of the key of the cached pattern
+        special_tokens = tuple(self.all_special_tokens)
+        if self._no_lowercase_pattern is None or self._no_lowercase_pattern[0] != special_tokens:
+            escaped_tokens = [re.escape(token) for token in special_tokens]
+            escaped_tokens += [
+                re.escape(token.content)
+                for token in self._added_tokens_decoder.values()
+                if not token.special and token.normalized
+            ]
+            # The first token of the alternation that matches wins, as when the tokens were matched one char at a time
+            pattern = re.compile("|".join(escaped_tokens)) if escaped_tokens else None
+            self._no_lowercase_pattern = (special_tokens, pattern)
+
+        pattern = self._no_lowercase_pattern[1]
+        if pattern is None:
+            return _lower_chars(text)
+        chunks = []
+        start = 0
+        for match in pattern.finditer(text):
+            chunks.append(_lower_chars(text[start : match.start()]))
+            chunks.append(match.group())
+            start = match.end()
+        chunks.append(_lower_chars(text[start:]))
+        return "".join(chunks)
+
     def _tokenize(self, text, **kwargs):
         """
         Converts a string into a sequence of tokens (string), using the tokenizer. Split in words for word-based
@@ -765,6 +1041,77 @@ class PreTrainedTokenizer(PreTrainedTokenizerBase):
         verbose: bool = True,
         **kwargs,
     ) -> BatchEncoding:
+        if return_offsets_mapping:
+            raise NotImplementedError(
+                "return_offset_mapping is not available when using Python tokenizers. "
+                "To use this feature, change your tokenizer to one deriving from "
+                "transformers.PreTrainedTokenizerFast."
+            )
+
+        prepare_kwargs = {
+            "add_special_tokens": add_special_tokens,
+            "truncation_strategy": truncation_strategy,
+            "max_length": max_length,
+            "stride": stride,
+            "return_token_type_ids": return_token_type_ids,
+            "return_overflowing_tokens": return_overflowing_tokens,
+            "return_special_tokens_mask": return_special_tokens_mask,
+            "return_length": return_length,
+            "verbose": verbose,
+        }
+
+        pool = _PARALLEL_ENCODING_POOLS.get(self, None)
+        if pool is not None and len(batch_text_or_text_pairs) >= pool.min_batch_size:
+            # Contiguous chunks, one per worker, so that the order of the batch is kept when merging them
+            chunk_size = math.ceil(len(batch_text_or_text_pairs) / pool.num_workers)
+            chunks = [
+                batch_text_or_text_pairs[i : i + chunk_size]
+                for i in range(0, len(batch_text_or_text_pairs), chunk_size)
+            ]
+            executor = pool.get_executor(self)
+            batch_outputs = {}
+            for chunk_outputs in executor.map(
+                _parallel_encoding_worker,
+                chunks,
+                itertools.repeat(is_split_into_words),
+                itertools.repeat(prepare_kwargs),
+                itertools.repeat(kwargs),
+            ):
+                for key, value in chunk_outputs.items():
+                    batch_outputs.setdefault(key, []).extend(value)
+
+            batch_outputs = self.pad(
+                batch_outputs,
+                padding=padding_strategy.value,
+                max_length=max_length,
+                pad_to_multiple_of=pad_to_multiple_of,
+                return_attention_mask=return_attention_mask,
+            )
+            return BatchEncoding(batch_outputs, tensor_type=return_tensors)
+
+        input_ids = self._get_batch_input_ids(
+            batch_text_or_text_pairs, is_split_into_words=is_split_into_words, **kwargs
+        )
+
+        batch_outputs = self._batch_prepare_for_model(
+            input_ids,
+            padding_strategy=padding_strategy,
+            pad_to_multiple_of=pad_to_multiple_of,
+            return_attention_mask=return_attention_mask,
+            return_tensors=return_tensors,
+            **prepare_kwargs,
+        )
+
+        return BatchEncoding(batch_outputs)
+
+    def _get_batch_input_ids(
+        self, batch_text_or_text_pairs, is_split_into_words: bool = False, **kwargs
+    ) -> List[Tuple[List[int], Optional[List[int]]]]:
+        """
+        Tokenizes and converts to ids each text (or pair of texts) of a batch, as the first step of
+        `_batch_encode_plus`.
+        """
+
         def get_input_ids(text):
             if isinstance(text, str):
                 tokens = self.tokenize(text, **kwargs)
@@ -784,13 +1131,6 @@ class PreTrainedTokenizer(PreTrainedTokenizerBase):
                     "Input is not valid. Should be a string, a list/tuple of strings or a list/tuple of integers."
                 )
 
-        if return_offsets_mapping:
-            raise NotImplementedError(
-                "return_offset_mapping is not available when using Python tokenizers. "
-                "To use this feature, change your tokenizer to one deriving from "
-                "transformers.PreTrainedTokenizerFast."
-            )
-
         input_ids = []
         for ids_or_pair_ids in batch_text_or_text_pairs:
             if not isinstance(ids_or_pair_ids, (list, tuple)):
@@ -803,25 +1143,44 @@ class PreTrainedTokenizer(PreTrainedTokenizerBase):
             first_ids = get_input_ids(ids)
             second_ids = get_input_ids(pair_ids) if pair_ids is not None else None
             input_ids.append((first_ids, second_ids))
+        return input_ids
 
-        batch_outputs = self._batch_prepare_for_model(
-            input_ids,
-            add_special_tokens=add_special_tokens,
-            padding_strategy=padding_strategy,
-            truncation_strategy=truncation_strategy,
-            max_length=max_length,
-            stride=stride,
-            pad_to_multiple_of=pad_to_multiple_of,
-            return_attention_mask=return_attention_mask,
-            return_token_type_ids=return_token_type_ids,
-            return_overflowing_tokens=return_overflowing_tokens,
-            return_special_tokens_mask=return_special_tokens_mask,
-            return_length=return_length,
-            return_tensors=return_tensors,
-            verbose=verbose,
-        )
+    def enable_parallel_encoding(
+        self, num_workers: Optional[int] = None, min_batch_size: int = 256, mp_context=None
+    ) -> None:
+        """
+        Encodes large batches in a persistent pool of processes instead of a single Python thread. Each worker is
+        initialized once with a copy of this tokenizer, the batches are split in contiguous chunks across the workers
+        and their outputs are merged in order before padding, so the outputs are the same as the serial ones.
 
-        return BatchEncoding(batch_outputs)
+        The workers are restarted if the tokenizer is modified (e.g. new tokens are added or one of its attributes is
+        set). Objects held by the tokenizer and modified in place are not tracked: call this method again after such
+        changes to restart the workers with the updated tokenizer. The workers are also used by
+        [`~PreTrainedTokenizer.batch_decode`] for batches of at least `min_batch_size` sequences.
+
+        Args:
+            num_workers (`int`, *optional*):
+                The number of processes. Defaults to the number of CPUs.
+            min_batch_size (`int`, *optional*, defaults to 256):
+                Smaller batches are still encoded serially, as they are not worth the communication overhead.
+            mp_context (*optional*):
+                The `multiprocessing` context used to start the workers, defaults to the platform default.
+        """
+        self.disable_parallel_encoding()
+        if num_workers is None:
+            num_workers = os.cpu_count() or 1
+        if num_workers < 1:
+            raise ValueError(f"`num_workers` should be at least 1, got {num_workers}")
+        _PARALLEL_ENCODING_POOLS[self] = _ParallelEncodingPool(num_workers, min_batch_size, mp_context=mp_context)
+
+    def disable_parallel_encoding(self) -> None:
+        """
+        Stops the workers started by [`~PreTrainedTokenizer.enable_parallel_encoding`] and goes back to serial
+        encoding.
+        """
+        pool = _PARALLEL_ENCODING_POOLS.pop(self, None)
+        if pool is not None:
+            pool.shutdown()
 
     @add_end_docstrings(ENCODE_KWARGS_DOCSTRING, ENCODE_PLUS_ADDITIONAL_KWARGS_DOCSTRING)
     def _batch_prepare_for_model(
@@ -971,10 +1330,14 @@ class PreTrainedTokenizer(PreTrainedTokenizerBase):
                 return self._added_tokens_decoder[ids].content
             else:
                 return self._convert_id_to_token(ids)
+        converted = self._convert_ids_with_tables(ids, skip_special_tokens)
+        if converted is not None:
+            return converted[0]
+        all_special_ids = set(self.all_special_ids) if skip_special_tokens else set()
         tokens = []
         for index in ids:
             index = int(index)
-            if skip_special_tokens and index in self.all_special_ids:
+            if index in all_special_ids:
                 continue
             if index in self._added_tokens_decoder:
                 tokens.append(self._added_tokens_decoder[index].content)
@@ -982,12 +1345,105 @@ class PreTrainedTokenizer(PreTrainedTokenizerBase):
                 tokens.append(self._convert_id_to_token(index))
         return tokens
 
+    def _get_decode_tables(self) -> _DecodeTables:
+        special_tokens = tuple(getattr(self, f"_{attr}") for attr in self.SPECIAL_TOKENS_ATTRIBUTES[:-1])
+        # Only the instance attributes are read, the properties of some tokenizers build a whole vocabulary
+        vocab_mappings = (self.__dict__.get(name) for name in _DecodeTables.VOCAB_MAPPINGS)
+        signature = (
+            self.vocab_size,
+            len(self._added_tokens_decoder),
+            tuple((id(mapping), len(mapping)) for mapping in vocab_mappings if isinstance(mapping, dict)),
+            special_tokens,
+            *(self._additional_special_tokens or ()),
+        )
+        tables = _DECODE_TABLES.get(self, None)
+        if tables is None or tables.signature != signature:
+            tables = _DecodeTables(self, signature)
+            _DECODE_TABLES[self] = tables
+        return tables
+
+    def _convert_ids_with_tables(
+        self, ids: List[int], skip_special_tokens: bool = False
+    ) -> Optional[Tuple[List[str], np.ndarray]]:
+        """
+        Converts a sequence of indices in tokens with the decode tables, and tells which tokens are decoded on their
+        own. Returns `None` if some indices are not in the tables, so that they go through the regular conversion.
+        """
+        if isinstance(ids, np.ndarray) and ids.dtype.kind in "iu":
+            ids = ids.astype(np.int64, copy=False)
+        elif all(isinstance(index, (int, np.integer)) for index in ids):
+            ids = np.array(ids, dtype=np.int64)
+        else:
+            return None
+        tables = self._get_decode_tables()
+        if ids.ndim != 1 or (len(ids) > 0 and (ids.min() < 0 or ids.max() >= len(tables.flags))):
+            return None
+
+        flags = tables.flags[ids]
+        if skip_special_tokens:
+            # Filters the special tokens on the whole array of ids at once
+            keep = (flags & _DecodeTables.SPECIAL) == 0
+            ids, flags = ids[keep], flags[keep]
+        not_converted = (flags & _DecodeTables.CONVERTED) == 0
+        if not_converted.any():
+            tables.convert(self, np.unique(ids[not_converted]))
+            flags = tables.flags[ids]
+        return tables.tokens[ids].tolist(), (flags & _DecodeTables.STANDALONE) != 0
+
     def _convert_id_to_token(self, index: int) -> str:
         raise NotImplementedError
 
     def convert_tokens_to_string(self, tokens: List[str]) -> str:
         return " ".join(tokens)
 
+    def batch_decode(
+        self,
+        sequences: Union[List[int], List[List[int]], "np.ndarray", "torch.Tensor", "tf.Tensor"],
+        skip_special_tokens: bool = False,
+        clean_up_tokenization_spaces: bool = None,
+        **kwargs,
+    ) -> List[str]:
+        """
+        Convert a list of lists of token ids into a list of strings by calling decode. Large batches are decoded in the
+        pool of processes started by [`~PreTrainedTokenizer.enable_parallel_encoding`] if it is enabled.
+
+        Args:
+            sequences (`Union[List[int], List[List[int]], np.ndarray, torch.Tensor, tf.Tensor]`):
+                List of tokenized input ids. Can be obtained using the `__call__` method.
+            skip_special_tokens (`bool`, *optional*, defaults to `False`):
+                Whether or not to remove special tokens in the decoding.
+            clean_up_tokenization_spaces (`bool`, *optional*):
+                Whether or not to clean up the tokenization spaces. If `None`, will default to
+                `self.clean_up_tokenization_spaces`.
+            kwargs (additional keyword arguments, *optional*):
+                Will be passed to the underlying model specific decode method.
+
+        Returns:
+            `List[str]`: The list of decoded sentences.
+        """
+        pool = _PARALLEL_ENCODING_POOLS.get(self, None)
+        if pool is None or len(sequences) < pool.min_batch_size:
+            return super().batch_decode(
+                sequences,
+                skip_special_tokens=skip_special_tokens,
+                clean_up_tokenization_spaces=clean_up_tokenization_spaces,
+                **kwargs,
+            )
+
+        sequences = to_py_obj(sequences)
+        chunk_size = math.ceil(len(sequences) / pool.num_workers)
+        chunks = [sequences[i : i + chunk_size] for i in range(0, len(sequences), chunk_size)]
+        texts = []
+        for chunk_texts in pool.get_executor(self).map(
+            _parallel_decoding_worker,
+            chunks,
+            itertools.repeat(skip_special_tokens),
+            itertools.repeat(clean_up_tokenization_spaces),
+            itertools.repeat(kwargs),
+        ):
+            texts.extend(chunk_texts)
+        return texts
+
     def _decode(
         self,
         token_ids: List[int],
@@ -998,30 +1454,52 @@ class PreTrainedTokenizer(PreTrainedTokenizerBase):
     ) -> str:
         self._decode_use_source_tokenizer = kwargs.pop("use_source_tokenizer", False)
 
-        filtered_tokens = self.convert_ids_to_tokens(token_ids, skip_special_tokens=skip_special_tokens)
-        legacy_added_tokens = set(self._added_tokens_encoder.keys()) - set(self.all_special_tokens) | {
-            token for token in self.additional_special_tokens if self.convert_tokens_to_ids(token) >= self.vocab_size
-        }
+        converted = None
+        if type(self).convert_ids_to_tokens is PreTrainedTokenizer.convert_ids_to_tokens and isinstance(
+            token_ids, list
+        ):
+            converted = self._convert_ids_with_tables(token_ids, skip_special_tokens)
+
         # To avoid mixing byte-level and unicode for byte-level BPT
         # we need to build string separately for added tokens and byte-level tokens
         # cf. https://github.com/huggingface/transformers/issues/1133
         sub_texts = []
-        current_sub_text = []
-        # TODO @ArthurZ in version 5, special tokens should be handled in convert_tokens_to_string, while _convert_tokens_to_string
-        for token in filtered_tokens:
-            if skip_special_tokens and token in self.all_special_ids:
-                continue
-            if token in legacy_added_tokens:
-                if current_sub_text:
-                    string = self.convert_tokens_to_string(current_sub_text)
+        if converted is not None:
+            filtered_tokens, standalone = converted
+            start = 0
+            for position in np.flatnonzero(standalone).tolist():
+                if position > start:
+                    string = self.convert_tokens_to_string(filtered_tokens[start:position])
                     if len(string) > 0:
                         sub_texts.append(string)
-                    current_sub_text = []
-                sub_texts.append(token)
-            else:
-                current_sub_text.append(token)
-        if current_sub_text:
-            sub_texts.append(self.convert_tokens_to_string(current_sub_text))
+                sub_texts.append(filtered_tokens[position])
+                start = position + 1
+            if start < len(filtered_tokens):
+                sub_texts.append(self.convert_tokens_to_string(filtered_tokens[start:]))
+        else:
+            filtered_tokens = self.convert_ids_to_tokens(token_ids, skip_special_tokens=skip_special_tokens)
+            legacy_added_tokens = set(self._added_tokens_encoder.keys()) - set(self.all_special_tokens) | {
+                token
+                for token in self.additional_special_tokens
+                if self.convert_tokens_to_ids(token) >= self.vocab_size
+            }
+            all_special_ids = set(self.all_special_ids) if skip_special_tokens else set()
+            current_sub_text = []
+            # TODO @ArthurZ in version 5, special tokens should be handled in convert_tokens_to_string, while _convert_tokens_to_string
+            for token in filtered_tokens:
+                if token in all_special_ids:
+                    continue
+                if token in legacy_added_tokens:
+                    if current_sub_text:
+                        string = self.convert_tokens_to_string(current_sub_text)
+                        if len(string) > 0:
+                            sub_texts.append(string)
+                        current_sub_text = []
+                    sub_texts.append(token)
+                else:
+                    current_sub_text.append(token)
+            if current_sub_text:
+                sub_texts.append(self.convert_tokens_to_string(current_sub_text))
 
         if spaces_between_special_tokens:
             text = " ".join(sub_texts)
@@ -19,11 +19,13 @@ of output with special method for the Fast tokenizers)
 """
 
 import copy
+import itertools
 import json
 import os
 import re
 import warnings
-from collections import UserDict
+import weakref
+from collections import OrderedDict, UserDict
 from collections.abc import Mapping, Sized
 from contextlib import contextmanager
 from dataclasses import dataclass
@@ -134,6 +136,11 @@ TOKENIZER_CONFIG_FILE = "tokenizer_config.json"
 FULL_TOKENIZER_FILE = "tokenizer.json"
 _re_tokenizer_file = re.compile(r"tokenizer\.(.*)\.json")
 
+# Rendered and tokenized conversation prefixes of `apply_chat_template(..., incremental=True)`, kept outside of the
+# tokenizers so that they are not pickled or copied with them
+_CHAT_TEMPLATE_CACHES = weakref.WeakKeyDictionary()
+CHAT_TEMPLATE_CACHE_SIZE = 32
+
 
 class TruncationStrategy(ExplicitEnum):
     """
@@ -1686,6 +1693,7 @@ class PreTrainedTokenizerBase(SpecialTokensMixin, PushToHubMixin):
         max_length: Optional[int] = None,
         return_tensors: Optional[Union[str, TensorType]] = None,
         return_dict: bool = False,
+        incremental: bool = False,
         **tokenizer_kwargs,
     ) -> Union[str, List[int]]:
         """
@@ -1721,6 +1729,14 @@ class PreTrainedTokenizerBase(SpecialTokensMixin, PushToHubMixin):
                 - `'jax'`: Return JAX `jnp.ndarray` objects.
             return_dict (`bool`, *optional*, defaults to `False`):
                 Whether to return a dictionary with named outputs. Has no effect if tokenize is `False`.
+            incremental (`bool`, *optional*, defaults to `False`):
+                Whether to reuse the token ids of the longest prefix of `conversation` previously passed with
+                `incremental=True`, and only tokenize the text the template renders for the new messages. The prefix
+                is reused if the template renders it the same way and the new text starts with an added token, like
+                the control tokens opening a turn, otherwise the whole conversation is tokenized. When it is reused,
+                the returned token ids start with the ids returned for the prefix, so the key/value cache computed for
+                them can be reused. Not compatible with `padding`, `truncation` or other tokenizer kwargs. Has no
+                effect if tokenize is `False`.
             **tokenizer_kwargs: Additional kwargs to pass to the tokenizer.
 
         Returns:
@@ -1742,6 +1758,20 @@ class PreTrainedTokenizerBase(SpecialTokensMixin, PushToHubMixin):
         # Compilation function uses a cache to avoid recompiling the same template
         compiled_template = self._compile_jinja_template(chat_template)
 
+        if incremental and tokenize:
+            if padding or truncation or tokenizer_kwargs:
+                raise ValueError(
+                    "`incremental=True` does not support `padding`, `truncation` or additional tokenizer kwargs, got "
+                    f"padding={padding}, truncation={truncation} and {tokenizer_kwargs}."
+                )
+            input_ids = self._tokenize_chat_incrementally(
+                conversation, chat_template, compiled_template, add_generation_prompt
+            )
+            encoded_inputs = self.prepare_for_model(
+                input_ids, add_special_tokens=False, return_tensors=return_tensors, prepend_batch_axis=True
+            )
+            return encoded_inputs if return_dict else encoded_inputs["input_ids"]
+
         rendered = compiled_template.render(
             messages=conversation, add_generation_prompt=add_generation_prompt, **self.special_tokens_map
         )
@@ -1772,6 +1802,59 @@ class PreTrainedTokenizerBase(SpecialTokensMixin, PushToHubMixin):
         else:
             return rendered
 
+    def _tokenize_chat_incrementally(
+        self, conversation: List[Dict[str, str]], chat_template: str, compiled_template, add_generation_prompt: bool
+    ) -> List[int]:
+        cache = _CHAT_TEMPLATE_CACHES.setdefault(self, OrderedDict())
+        # Each prefix of the conversation gets its own key by chaining the keys of the messages
+        key = (chat_template, json.dumps(self.special_tokens_map, sort_keys=True, default=str))
+        prefix_keys = []
+        for message in conversation:
+            key = (key, json.dumps(message, sort_keys=True, default=str))
+            prefix_keys.append(key)
+
+        rendered = compiled_template.render(
+            messages=conversation, add_generation_prompt=False, **self.special_tokens_map
+        )
+        prefix, prefix_ids = "", ()
+        for key in reversed(prefix_keys):
+            if key in cache and rendered.startswith(cache[key][0]):
+                cache.move_to_end(key)
+                prefix, prefix_ids = cache[key]
+                break
+        input_ids = self._tokenize_chat_continuation(prefix, prefix_ids, rendered)
+
+        if prefix_keys:
+            # The ids are stored as a tuple, the returned lists can be modified
+            cache[prefix_keys[-1]] = (rendered, tuple(input_ids))
+            if len(cache) > CHAT_TEMPLATE_CACHE_SIZE:
+                cache.popitem(last=False)
+
+        if add_generation_prompt:
+            prompt = compiled_template.render(
+                messages=conversation, add_generation_prompt=True, **self.special_tokens_map
+            )
+            if prompt.startswith(rendered):
+                return self._tokenize_chat_continuation(rendered, input_ids, prompt)
+            return self._tokenize_chat_continuation(prefix, prefix_ids, prompt)
+        return input_ids
+
+    def _tokenize_chat_continuation(self, prefix: str, prefix_ids: Sequence[int], text: str) -> List[int]:
+        """
+        Returns the token ids of `text`, starting with `prefix_ids` if `text` starts with `prefix` and continues with an
+        added token: the added tokens are split out of the text before tokenizing it, so the tokens before them do not
+        depend on what follows. This does not hold for the added tokens which strip the spaces on their left or only
+        match single words, since they depend on the end of `prefix`.
+        """
+        if prefix and text.startswith(prefix):
+            continuation = text[len(prefix) :]
+            if not continuation:
+                return list(prefix_ids)
+            for token in self.added_tokens_decoder.values():
+                if not token.lstrip and not token.single_word and continuation.startswith(token.content):
+                    return list(prefix_ids) + self.encode(continuation, add_special_tokens=False)
+        return self.encode(text, add_special_tokens=False)
+
     @lru_cache
     def _compile_jinja_template(self, chat_template):
         try:
@@ -3279,14 +3362,27 @@ class PreTrainedTokenizerBase(SpecialTokensMixin, PushToHubMixin):
                     "Should be one of a python, numpy, pytorch or tensorflow object."
                 )
 
-            for key, value in encoded_inputs.items():
-                encoded_inputs[key] = to_py_obj(value)
-
         # Convert padding_strategy in PaddingStrategy
         padding_strategy, _, max_length, _ = self._get_padding_truncation_strategies(
             padding=padding, max_length=max_length, verbose=verbose
         )
 
+        # Batches padded to NumPy arrays or PyTorch tensors are padded all at once, without going through python lists
+        batch_outputs = self._pad_batch_to_arrays(
+            encoded_inputs,
+            max_length=max_length,
+            padding_strategy=padding_strategy,
+            pad_to_multiple_of=pad_to_multiple_of,
+            return_attention_mask=return_attention_mask,
+            return_tensors=return_tensors,
+        )
+        if batch_outputs is not None:
+            return BatchEncoding(batch_outputs, tensor_type=return_tensors)
+
+        if not isinstance(first_element, (int, list, tuple)):
+            for key, value in encoded_inputs.items():
+                encoded_inputs[key] = to_py_obj(value)
+
         required_input = encoded_inputs[self.model_input_names[0]]
         if required_input and not isinstance(required_input[0], (list, tuple)):
             encoded_inputs = self._pad(
@@ -3702,6 +3798,96 @@ class PreTrainedTokenizerBase(SpecialTokensMixin, PushToHubMixin):
 
         return encoded_inputs
 
+    def _pad_batch_to_arrays(
+        self,
+        encoded_inputs: Dict[str, Any],
+        max_length: Optional[int] = None,
+        padding_strategy: PaddingStrategy = PaddingStrategy.DO_NOT_PAD,
+        pad_to_multiple_of: Optional[int] = None,
+        return_attention_mask: Optional[bool] = None,
+        return_tensors: Optional[Union[str, TensorType]] = None,
+    ) -> Optional[dict]:
+        """
+        Pads a batch of encoded inputs like [`~PreTrainedTokenizerBase._pad`] does for each input, but writes the
+        sequences of the whole batch at once in preallocated NumPy arrays (converted to PyTorch tensors without a copy
+        if `return_tensors="pt"`).
+
+        Returns `None` if the batch cannot take this path and must be padded input by input: tensors other than NumPy
+        or PyTorch are requested, `_pad` is overridden, the inputs are not integer sequences of consistent lengths or
+        are longer than `max_length`.
+        """
+        if return_tensors is None or padding_strategy == PaddingStrategy.DO_NOT_PAD:
+            return None
+        return_tensors = TensorType(return_tensors)
+        if return_tensors not in (TensorType.NUMPY, TensorType.PYTORCH) or (
+            return_tensors == TensorType.PYTORCH and not is_torch_available()
+        ):
+            return None
+        if type(self)._pad is not PreTrainedTokenizerBase._pad:
+            return None
+
+        if return_attention_mask is None:
+            return_attention_mask = "attention_mask" in self.model_input_names
+        main_input_name = self.model_input_names[0]
+        padding_values = {
+            main_input_name: self.pad_token_id,
+            "attention_mask": 0,
+            "token_type_ids": self.pad_token_type_id,
+            "special_tokens_mask": 1,
+        }
+        if "attention_mask" in encoded_inputs and not return_attention_mask:
+            return None
+
+        # Number of tokens of each input, all the padded keys have to agree on it
+        required_input = encoded_inputs[main_input_name]
+        lengths = _sequence_lengths(required_input)
+        if lengths is None:
+            return None
+        for key in padding_values.keys() & encoded_inputs.keys():
+            if key != main_input_name and not np.array_equal(_sequence_lengths(encoded_inputs[key]), lengths):
+                return None
+
+        if padding_strategy == PaddingStrategy.LONGEST:
+            max_length = int(lengths.max())
+        if max_length is not None and pad_to_multiple_of is not None and max_length % pad_to_multiple_of != 0:
+            max_length = ((max_length // pad_to_multiple_of) + 1) * pad_to_multiple_of
+        if not max_length or lengths.max() > max_length:
+            return None
+
+        positions = np.arange(max_length)
+        if self.padding_side == "right":
+            token_mask = positions < lengths[:, None]
+        elif self.padding_side == "left":
+            token_mask = positions >= (max_length - lengths)[:, None]
+        else:
+            raise ValueError("Invalid padding strategy:" + str(self.padding_side))
+
+        batch_outputs = {}
+        # As on the slow path, the other values are only converted to python objects if the inputs are tensors
+        inputs_are_tensors = not isinstance(required_input[0], (list, tuple))
+        for key, value in encoded_inputs.items():
+            if key not in padding_values:
+                batch_outputs[key] = to_py_obj(value) if inputs_are_tensors else value
+                continue
+            values = _concatenate_sequences(value)
+            if values is None:
+                return None
+            # Boolean masks are filled in row-major order, so each input is written at its padded position
+            array = np.full((len(lengths), max_length), padding_values[key], dtype=np.int64)
+            array[token_mask] = values
+            batch_outputs[key] = array
+        if return_attention_mask and "attention_mask" not in batch_outputs:
+            batch_outputs["attention_mask"] = token_mask.astype(np.int64)
+
+        if return_tensors == TensorType.PYTORCH:
+            import torch
+
+            batch_outputs = {
+                key: torch.from_numpy(value) if isinstance(value, np.ndarray) else value
+                for key, value in batch_outputs.items()
+            }
+        return batch_outputs
+
     def convert_tokens_to_string(self, tokens: List[str]) -> str:
         """
         Converts a sequence of tokens in a single string. The most simple way to do it is `" ".join(tokens)` but we
@@ -4049,6 +4235,59 @@ For a more complete example, see the implementation of `prepare_seq2seq_batch`.
         return model_inputs
 
 
+def _is_integer_tensor(tensor) -> bool:
+    if is_numpy_array(tensor):
+        return np.issubdtype(tensor.dtype, np.integer)
+    if is_torch_tensor(tensor):
+        import torch
+
+        return tensor.dtype in (torch.uint8, torch.int8, torch.int16, torch.int32, torch.int64)
+    return False
+
+
+def _sequence_lengths(sequences) -> Optional[np.ndarray]:
+    """
+    Returns the lengths of a batch of integer sequences (a list of lists, of 1D arrays or of 1D tensors, or a 2D array
+    or tensor), or `None` if `sequences` is not such a batch.
+    """
+    if is_numpy_array(sequences) or is_torch_tensor(sequences):
+        if sequences.ndim != 2 or not _is_integer_tensor(sequences):
+            return None
+        return np.full(sequences.shape[0], sequences.shape[1], dtype=np.int64)
+    if not isinstance(sequences, (list, tuple)) or len(sequences) == 0:
+        return None
+    if isinstance(sequences[0], (list, tuple)):
+        if not all(isinstance(sequence, (list, tuple)) for sequence in sequences):
+            return None
+    elif not all(_is_integer_tensor(sequence) and sequence.ndim == 1 for sequence in sequences):
+        return None
+    return np.fromiter(map(len, sequences), dtype=np.int64, count=len(sequences))
+
+
+def _concatenate_sequences(sequences) -> Optional[np.ndarray]:
+    """
+    Concatenates a batch of sequences accepted by `_sequence_lengths` in a flat NumPy array, or returns `None` if the
+    values of a batch of python lists are not all integers.
+    """
+    if is_torch_tensor(sequences):
+        return sequences.detach().cpu().numpy().reshape(-1)
+    if is_numpy_array(sequences):
+        return sequences.reshape(-1)
+    if is_torch_tensor(sequences[0]):
+        import torch
+
+        return torch.cat([sequence.detach().cpu() for sequence in sequences]).numpy()
+    if is_numpy_array(sequences[0]):
+        return np.concatenate(sequences)
+    try:
+        values = np.array(list(itertools.chain.from_iterable(sequences)))
+    except ValueError:
+        return None
+    if values.ndim != 1 or (values.size > 0 and values.dtype.kind not in "iub"):
+        return None
+    return values
+
+
 def get_fast_tokenizer_file(tokenization_files: List[str]) -> str:
     """
     Get the tokenization file to use for this version of transformers.
@@ -17,6 +17,7 @@
  see tokenization_utils.py
 """
 import copy
+import inspect
 import json
 import os
 from collections import defaultdict
@@ -28,7 +29,7 @@ from tokenizers import Tokenizer as TokenizerFast
 from tokenizers.decoders import Decoder as DecoderFast
 from tokenizers.trainers import BpeTrainer, UnigramTrainer, WordLevelTrainer, WordPieceTrainer
 
-from .convert_slow_tokenizer import convert_slow_tokenizer
+from .convert_slow_tokenizer import cached_convert_slow_tokenizer
 from .tokenization_utils import PreTrainedTokenizer
 from .tokenization_utils_base import (
     INIT_TOKENIZER_DOCSTRING,
@@ -74,6 +75,16 @@ MODEL_TO_TRAINER_MAPPING = {
 VOCAB_FILES_NAMES = {"tokenizer_file": TOKENIZER_FILE}
 
 
+def _get_vocab_files(slow_tokenizer_class, args, kwargs) -> Dict[str, Any]:
+    """
+    Returns the arguments the slow tokenizer is instantiated from, including the vocabulary files given as positional
+    arguments, which the slow tokenizers don't keep track of.
+    """
+    parameters = inspect.signature(slow_tokenizer_class.__init__).parameters.values()
+    names = [parameter.name for parameter in parameters if parameter.kind == parameter.POSITIONAL_OR_KEYWORD]
+    return {**dict(zip(names[1:], args)), **kwargs}
+
+
 @add_end_docstrings(INIT_TOKENIZER_DOCSTRING)
 class PreTrainedTokenizerFast(PreTrainedTokenizerBase):
     """
@@ -110,12 +121,14 @@ class PreTrainedTokenizerFast(PreTrainedTokenizerBase):
             # We have a serialization from tokenizers which let us directly build the backend
             fast_tokenizer = TokenizerFast.from_file(fast_tokenizer_file)
         elif slow_tokenizer is not None:
-            # We need to convert a slow tokenizer to build the backend
-            fast_tokenizer = convert_slow_tokenizer(slow_tokenizer)
+            # We need to convert a slow tokenizer to build the backend, it was loaded from the same vocabulary files
+            source_files = _get_vocab_files(type(slow_tokenizer), args, kwargs)
+            fast_tokenizer = cached_convert_slow_tokenizer(slow_tokenizer, source_files=source_files)
         elif self.slow_tokenizer_class is not None:
             # We need to create and convert a slow tokenizer to build the backend
             slow_tokenizer = self.slow_tokenizer_class(*args, **kwargs)
-            fast_tokenizer = convert_slow_tokenizer(slow_tokenizer)
+            source_files = _get_vocab_files(self.slow_tokenizer_class, args, kwargs)
+            fast_tokenizer = cached_convert_slow_tokenizer(slow_tokenizer, source_files=source_files)
         else:
             raise ValueError(
                 "Couldn't instantiate the backend tokenizer from one of: \n"
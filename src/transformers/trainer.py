@@ -62,13 +62,19 @@ from .hyperparameter_search import ALL_HYPERPARAMETER_SEARCH_BACKENDS, default_h
 from .integrations.deepspeed import deepspeed_init, deepspeed_load_checkpoint, is_deepspeed_available
 from .integrations.tpu import tpu_spmd_dataloader
 from .modelcard import TrainingSummary
-from .modeling_utils import PreTrainedModel, load_sharded_checkpoint, unwrap_model
+from .modeling_utils import (
+    PreTrainedModel,
+    get_delta_checkpoint_base,
+    load_sharded_checkpoint,
+    save_in_background,
+    unwrap_model,
+)
 from .models.auto.modeling_auto import (
     MODEL_FOR_CAUSAL_LM_MAPPING_NAMES,
     MODEL_MAPPING_NAMES,
 )
 from .optimization import Adafactor, get_scheduler
-from .pytorch_utils import ALL_LAYERNORM_LAYERS, is_torch_greater_or_equal_than_1_13
+from .pytorch_utils import ALL_LAYERNORM_LAYERS, copy_tensors_to_cpu, is_torch_greater_or_equal_than_1_13
 from .tokenization_utils_base import PreTrainedTokenizerBase
 from .trainer_callback import (
     CallbackHandler,
@@ -81,6 +87,7 @@ from .trainer_callback import (
 )
 from .trainer_pt_utils import (
     DistributedTensorGatherer,
+    EvalLoopContainer,
     IterableDatasetShard,
     LabelSmoother,
     LengthGroupedSampler,
@@ -92,7 +99,6 @@ from .trainer_pt_utils import (
     get_model_param_count,
     get_module_class_from_name,
     get_parameter_names,
-    nested_concat,
     nested_detach,
     nested_numpify,
     nested_xla_mesh_reduce,
@@ -640,6 +646,15 @@ class Trainer:
         self._train_batch_size = args.train_batch_size
         self._created_lr_scheduler = False
 
+        # Internal variables for the checkpoints written in the background with `args.save_async`: the futures of the
+        # writes of the checkpoint being saved, and the last checkpoint not yet moved to its final location
+        self._async_save_futures = None
+        self._pending_checkpoint = None
+        # The base checkpoint of the delta checkpoints saved with `args.save_delta_checkpoints`, and the one used by the
+        # checkpoint being saved
+        self._delta_base_checkpoint = None
+        self._checkpoint_base = None
+
         # very last
         self._memory_tracker.stop_and_update_metrics()
 
@@ -2067,6 +2082,7 @@ class Trainer:
             delattr(self, "_past")
 
         logger.info("\n\nTraining completed. Do not forget to share your model on huggingface.co/models =)\n\n")
+        self._finish_pending_checkpoint()
         if args.load_best_model_at_end and self.state.best_model_checkpoint is not None:
             # Wait for everyone to get here so we are sure the model has been saved by process 0.
             if is_torch_tpu_available():
@@ -2360,7 +2376,9 @@ class Trainer:
                     load_result = model.load_state_dict(state_dict, False)
                 if not is_sagemaker_mp_enabled() and has_been_loaded:
                     self._issue_warnings_after_load(load_result)
-        elif os.path.exists(os.path.join(self.state.best_model_checkpoint, WEIGHTS_INDEX_NAME)):
+        elif os.path.exists(os.path.join(self.state.best_model_checkpoint, WEIGHTS_INDEX_NAME)) or os.path.exists(
+            os.path.join(self.state.best_model_checkpoint, SAFE_WEIGHTS_INDEX_NAME)
+        ):
             load_result = load_sharded_checkpoint(
                 model, self.state.best_model_checkpoint, strict=is_sagemaker_mp_enabled()
             )
@@ -2482,6 +2500,9 @@ class Trainer:
         # want to save except FullyShardedDDP.
         # assert unwrap_model(model) is self.model, "internal model should be a reference to self.model"
 
+        # Wait for the previous checkpoint to be written before saving a new one
+        self._finish_pending_checkpoint()
+
         # Save model checkpoint
         checkpoint_folder = f"{PREFIX_CHECKPOINT_DIR}-{self.state.global_step}"
 
@@ -2498,7 +2519,16 @@ class Trainer:
             staging_output_dir = output_dir
         else:
             staging_output_dir = os.path.join(run_dir, f"tmp-{checkpoint_folder}")
+        if self.args.save_async:
+            self._async_save_futures = []
+        if self.args.save_delta_checkpoints:
+            if self._delta_base_checkpoint is not None and os.path.isdir(self._delta_base_checkpoint):
+                self._checkpoint_base = self._delta_base_checkpoint
+            else:
+                # The first checkpoint is complete, the next ones only contain the weights that changed since then
+                self._delta_base_checkpoint = output_dir
         self.save_model(staging_output_dir, _internal_call=True)
+        self._checkpoint_base = None
 
         if not self.args.save_only_model:
             # Save optimizer and scheduler
@@ -2526,9 +2556,34 @@ class Trainer:
         if self.args.should_save:
             self.state.save_to_json(os.path.join(staging_output_dir, TRAINER_STATE_NAME))
 
+        futures, self._async_save_futures = self._async_save_futures or [], None
         if self.args.push_to_hub:
+            # The checkpoint has to be fully written to be uploaded
+            for future in futures:
+                future.result()
             self._push_from_checkpoint(staging_output_dir)
 
+        self._pending_checkpoint = (
+            futures,
+            functools.partial(self._move_checkpoint, run_dir, staging_output_dir, output_dir),
+        )
+        if not self.args.save_async:
+            self._finish_pending_checkpoint()
+
+    def _finish_pending_checkpoint(self):
+        """
+        Waits for the files of the last checkpoint to be written when they are saved in the background (see
+        `args.save_async`), then moves it to its final location.
+        """
+        if self._pending_checkpoint is None:
+            return
+        futures, move_checkpoint = self._pending_checkpoint
+        self._pending_checkpoint = None
+        for future in futures:
+            future.result()
+        move_checkpoint()
+
+    def _move_checkpoint(self, run_dir, staging_output_dir, output_dir):
         # Place checkpoint in final location after all saving is finished.
         # First wait for everyone to finish writing
         self.args.distributed_state.wait_for_everyone()
@@ -2627,7 +2682,13 @@ class Trainer:
             )
         elif self.args.should_save:
             # deepspeed.save_checkpoint above saves model/optim/sched
-            torch.save(self.optimizer.state_dict(), os.path.join(output_dir, OPTIMIZER_NAME))
+            if self._async_save_futures is not None:
+                optimizer_state = copy_tensors_to_cpu(self.optimizer.state_dict())
+                self._async_save_futures.append(
+                    save_in_background(torch.save, optimizer_state, os.path.join(output_dir, OPTIMIZER_NAME))
+                )
+            else:
+                torch.save(self.optimizer.state_dict(), os.path.join(output_dir, OPTIMIZER_NAME))
 
         # Save SCHEDULER & SCALER
         is_deepspeed_custom_scheduler = self.is_deepspeed_enabled and not isinstance(
@@ -3076,9 +3137,7 @@ class Trainer:
                 state_dict = self.model.state_dict()
 
             if isinstance(unwrap_model(self.model), supported_classes):
-                unwrap_model(self.model).save_pretrained(
-                    output_dir, state_dict=state_dict, safe_serialization=self.args.save_safetensors
-                )
+                self._save_pretrained(unwrap_model(self.model), output_dir, state_dict=state_dict)
             else:
                 logger.info("Trainer.model is not a `PreTrainedModel`, only saving its state dict.")
                 if self.args.save_safetensors:
@@ -3088,9 +3147,7 @@ class Trainer:
                 else:
                     torch.save(state_dict, os.path.join(output_dir, WEIGHTS_NAME))
         else:
-            self.model.save_pretrained(
-                output_dir, state_dict=state_dict, safe_serialization=self.args.save_safetensors
-            )
+            self._save_pretrained(self.model, output_dir, state_dict=state_dict)
 
         if self.tokenizer is not None:
             self.tokenizer.save_pretrained(output_dir)
@@ -3098,6 +3155,21 @@ class Trainer:
         # Good practice: save your training arguments together with the trained model
         torch.save(self.args, os.path.join(output_dir, TRAINING_ARGS_NAME))
 
+    def _save_pretrained(self, model, output_dir, state_dict=None):
+        # Checkpoints can be written in the background or as delta checkpoints, see `args.save_async` and
+        # `args.save_delta_checkpoints`
+        kwargs = {}
+        if isinstance(model, PreTrainedModel):
+            if self._async_save_futures is not None:
+                kwargs["async_save"] = True
+            if self._checkpoint_base is not None:
+                kwargs["base_checkpoint"] = self._checkpoint_base
+        future = model.save_pretrained(
+            output_dir, state_dict=state_dict, safe_serialization=self.args.save_safetensors, **kwargs
+        )
+        if future is not None and self._async_save_futures is not None:
+            self._async_save_futures.append(future)
+
     def store_flos(self):
         # Storing the number of floating-point operations that went into the model
         if self.args.parallel_mode == ParallelMode.DISTRIBUTED:
@@ -3157,6 +3229,12 @@ class Trainer:
 
         number_of_checkpoints_to_delete = max(0, len(checkpoints_sorted) - save_total_limit)
         checkpoints_to_be_deleted = checkpoints_sorted[:number_of_checkpoints_to_delete]
+        # Keep the base checkpoints of the delta checkpoints that are kept
+        kept_checkpoints = checkpoints_sorted[number_of_checkpoints_to_delete:]
+        base_checkpoints = {get_delta_checkpoint_base(checkpoint) for checkpoint in kept_checkpoints}
+        checkpoints_to_be_deleted = [
+            c for c in checkpoints_to_be_deleted if os.path.abspath(c) not in base_checkpoints
+        ]
         for checkpoint in checkpoints_to_be_deleted:
             logger.info(f"Deleting older checkpoint [{checkpoint}] due to args.save_total_limit")
             shutil.rmtree(checkpoint, ignore_errors=True)
@@ -3392,17 +3470,12 @@ class Trainer:
             self._past = None
 
         # Initialize containers
-        # losses/preds/labels on GPU/TPU (accumulated for eval_accumulation_steps)
-        losses_host = None
-        preds_host = None
-        labels_host = None
-        inputs_host = None
-
-        # losses/preds/labels on CPU (final containers)
-        all_losses = None
-        all_preds = None
-        all_labels = None
-        all_inputs = None
+        # The losses/preds/labels of each step stay on GPU/TPU until moved to the CPU (every eval_accumulation_steps),
+        # and are only concatenated at the end
+        all_losses = EvalLoopContainer(padding_index=-100)
+        all_preds = EvalLoopContainer(padding_index=-100, spill_dir=args.eval_spill_dir)
+        all_labels = EvalLoopContainer(padding_index=-100, spill_dir=args.eval_spill_dir)
+        all_inputs = EvalLoopContainer(padding_index=-100, spill_dir=args.eval_spill_dir)
         # Will be useful when we have an iterable dataset so don't know its length.
 
         observed_num_examples = 0
@@ -3424,56 +3497,35 @@ class Trainer:
             if is_torch_tpu_available():
                 xm.mark_step()
 
-            # Update containers on host
+            # Update containers
             if loss is not None:
                 losses = self.gather_function((loss.repeat(batch_size)))
-                losses_host = losses if losses_host is None else nested_concat(losses_host, losses, padding_index=-100)
+                all_losses.add(losses)
             if labels is not None:
                 labels = self.accelerator.pad_across_processes(labels, dim=1, pad_index=-100)
             if inputs_decode is not None:
                 inputs_decode = self.accelerator.pad_across_processes(inputs_decode, dim=1, pad_index=-100)
                 inputs_decode = self.gather_function((inputs_decode))
-                inputs_host = (
-                    inputs_decode
-                    if inputs_host is None
-                    else nested_concat(inputs_host, inputs_decode, padding_index=-100)
-                )
+                all_inputs.add(inputs_decode)
             if logits is not None:
                 logits = self.accelerator.pad_across_processes(logits, dim=1, pad_index=-100)
                 if self.preprocess_logits_for_metrics is not None:
                     logits = self.preprocess_logits_for_metrics(logits, labels)
                 logits = self.gather_function((logits))
-                preds_host = logits if preds_host is None else nested_concat(preds_host, logits, padding_index=-100)
+                all_preds.add(logits)
 
             if labels is not None:
                 labels = self.gather_function((labels))
-                labels_host = labels if labels_host is None else nested_concat(labels_host, labels, padding_index=-100)
+                all_labels.add(labels)
 
             self.control = self.callback_handler.on_prediction_step(args, self.state, self.control)
 
-            # Gather all tensors and put them back on the CPU if we have done enough accumulation steps.
+            # Put the tensors back on the CPU if we have done enough accumulation steps.
             if args.eval_accumulation_steps is not None and (step + 1) % args.eval_accumulation_steps == 0:
-                if losses_host is not None:
-                    losses = nested_numpify(losses_host)
-                    all_losses = losses if all_losses is None else np.concatenate((all_losses, losses), axis=0)
-                if preds_host is not None:
-                    logits = nested_numpify(preds_host)
-                    all_preds = logits if all_preds is None else nested_concat(all_preds, logits, padding_index=-100)
-                if inputs_host is not None:
-                    inputs_decode = nested_numpify(inputs_host)
-                    all_inputs = (
-                        inputs_decode
-                        if all_inputs is None
-                        else nested_concat(all_inputs, inputs_decode, padding_index=-100)
-                    )
-                if labels_host is not None:
-                    labels = nested_numpify(labels_host)
-                    all_labels = (
-                        labels if all_labels is None else nested_concat(all_labels, labels, padding_index=-100)
-                    )
-
-                # Set back to None to begin a new accumulation
-                losses_host, preds_host, inputs_host, labels_host = None, None, None, None
+                all_losses.to_cpu_and_numpy()
+                all_preds.to_cpu_and_numpy()
+                all_labels.to_cpu_and_numpy()
+                all_inputs.to_cpu_and_numpy()
 
         # After all calls to `.gather_function`, reset to `gather_for_metrics`:
         self.gather_function = self.accelerator.gather_for_metrics
@@ -3481,21 +3533,12 @@ class Trainer:
             # Clean the state at the end of the evaluation loop
             delattr(self, "_past")
 
-        # Gather all remaining tensors and put them back on the CPU
-        if losses_host is not None:
-            losses = nested_numpify(losses_host)
-            all_losses = losses if all_losses is None else np.concatenate((all_losses, losses), axis=0)
-        if preds_host is not None:
-            logits = nested_numpify(preds_host)
-            all_preds = logits if all_preds is None else nested_concat(all_preds, logits, padding_index=-100)
-        if inputs_host is not None:
-            inputs_decode = nested_numpify(inputs_host)
-            all_inputs = (
-                inputs_decode if all_inputs is None else nested_concat(all_inputs, inputs_decode, padding_index=-100)
-            )
-        if labels_host is not None:
-            labels = nested_numpify(labels_host)
-            all_labels = labels if all_labels is None else nested_concat(all_labels, labels, padding_index=-100)
+        # Put all remaining tensors back on the CPU and concatenate them
+        spilled_containers = [all_preds, all_labels, all_inputs]
+        all_losses = all_losses.get_arrays()
+        all_preds = all_preds.get_arrays()
+        all_labels = all_labels.get_arrays()
+        all_inputs = all_inputs.get_arrays()
 
         # Number of samples
         if has_length(eval_dataset):
@@ -3523,6 +3566,10 @@ class Trainer:
         else:
             metrics = {}
 
+        # The files written in `args.eval_spill_dir` are only kept while the returned arrays map them
+        for container in spilled_containers:
+            container.remove_spill_folder()
+
         # To be JSON-serializable, we need to remove numpy types or zero-d tensors
         metrics = denumpify_detensorize(metrics)
 
@@ -3959,10 +4006,10 @@ class Trainer:
         logger.info(f"***** Running {description} *****")
         logger.info(f"  Num examples = {num_examples}")
         logger.info(f"  Batch size = {batch_size}")
-        losses_host: torch.Tensor = None
-        preds_host: Union[torch.Tensor, List[torch.Tensor]] = None
-        labels_host: Union[torch.Tensor, List[torch.Tensor]] = None
-        inputs_host: Union[torch.Tensor, List[torch.Tensor]] = None
+        losses_host = EvalLoopContainer(padding_index=-100)
+        preds_host = EvalLoopContainer(padding_index=-100)
+        labels_host = EvalLoopContainer(padding_index=-100)
+        inputs_host = EvalLoopContainer(padding_index=-100)
 
         world_size = max(1, args.world_size)
 
@@ -3990,41 +4037,31 @@ class Trainer:
             inputs_decode = self._prepare_input(inputs[main_input_name]) if args.include_inputs_for_metrics else None
 
             if loss is not None:
-                losses = loss.repeat(batch_size)
-                losses_host = losses if losses_host is None else torch.cat((losses_host, losses), dim=0)
-            if logits is not None:
-                preds_host = logits if preds_host is None else nested_concat(preds_host, logits, padding_index=-100)
-            if labels is not None:
-                labels_host = labels if labels_host is None else nested_concat(labels_host, labels, padding_index=-100)
-            if inputs_decode is not None:
-                inputs_host = (
-                    inputs_decode
-                    if inputs_host is None
-                    else nested_concat(inputs_host, inputs_decode, padding_index=-100)
-                )
+                losses_host.add(loss.repeat(batch_size))
+            if not prediction_loss_only:
+                preds_host.add(logits)
+                labels_host.add(labels)
+                inputs_host.add(inputs_decode)
             self.control = self.callback_handler.on_prediction_step(args, self.state, self.control)
 
             # Gather all tensors and put them back on the CPU if we have done enough accumulation steps.
             if args.eval_accumulation_steps is not None and (step + 1) % args.eval_accumulation_steps == 0:
-                eval_losses_gatherer.add_arrays(self._gather_and_numpify(losses_host, "eval_losses"))
+                eval_losses_gatherer.add_arrays(self._gather_and_numpify(losses_host.get_tensors(), "eval_losses"))
                 if not prediction_loss_only:
-                    preds_gatherer.add_arrays(self._gather_and_numpify(preds_host, "eval_preds"))
-                    labels_gatherer.add_arrays(self._gather_and_numpify(labels_host, "eval_label_ids"))
-                    inputs_gatherer.add_arrays(self._gather_and_numpify(inputs_host, "eval_inputs_ids"))
-
-                # Set back to None to begin a new accumulation
-                losses_host, preds_host, labels_host, inputs_host = None, None, None, None
+                    preds_gatherer.add_arrays(self._gather_and_numpify(preds_host.get_tensors(), "eval_preds"))
+                    labels_gatherer.add_arrays(self._gather_and_numpify(labels_host.get_tensors(), "eval_label_ids"))
+                    inputs_gatherer.add_arrays(self._gather_and_numpify(inputs_host.get_tensors(), "eval_inputs_ids"))
 
         if args.past_index and hasattr(self, "_past"):
             # Clean the state at the end of the evaluation loop
             delattr(self, "_past")
 
         # Gather all remaining tensors and put them back on the CPU
-        eval_losses_gatherer.add_arrays(self._gather_and_numpify(losses_host, "eval_losses"))
+        eval_losses_gatherer.add_arrays(self._gather_and_numpify(losses_host.get_tensors(), "eval_losses"))
         if not prediction_loss_only:
-            preds_gatherer.add_arrays(self._gather_and_numpify(preds_host, "eval_preds"))
-            labels_gatherer.add_arrays(self._gather_and_numpify(labels_host, "eval_label_ids"))
-            inputs_gatherer.add_arrays(self._gather_and_numpify(inputs_host, "eval_inputs_ids"))
+            preds_gatherer.add_arrays(self._gather_and_numpify(preds_host.get_tensors(), "eval_preds"))
+            labels_gatherer.add_arrays(self._gather_and_numpify(labels_host.get_tensors(), "eval_label_ids"))
+            inputs_gatherer.add_arrays(self._gather_and_numpify(inputs_host.get_tensors(), "eval_inputs_ids"))
 
         eval_loss = eval_losses_gatherer.finalize()
         preds = preds_gatherer.finalize() if not prediction_loss_only else None
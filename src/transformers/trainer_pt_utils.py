@@ -22,7 +22,9 @@ import io
 import json
 import math
 import os
+import shutil
 import sys
+import tempfile
 import warnings
 from collections.abc import Mapping
 from contextlib import contextmanager
@@ -133,6 +135,167 @@ def nested_concat(tensors, new_tensors, padding_index=-100):
         raise TypeError(f"Unsupported type for concatenation: got {type(tensors)}")
 
 
+def pad_and_concatenate_chunks(chunks, padding_index=-100, allocate=None):
+    """
+    Concatenates all the tensors or arrays of `chunks` on first axis at once, applying padding on the second if
+    necessary. The result is allocated a single time, instead of once per chunk with successive calls to
+    `torch_pad_and_concatenate` or `numpy_pad_and_concatenate`.
+
+    `allocate`, when passed, is called with the shape and the dtype of the result to allocate it (arrays only).
+    """
+    chunks = [atleast_1d(chunk) for chunk in chunks]
+    first = chunks[0]
+    if len(chunks) == 1 and allocate is None:
+        return first
+
+    num_rows = sum(chunk.shape[0] for chunk in chunks)
+    if len(first.shape) == 1:
+        shape = (num_rows,)
+    else:
+        shape = (num_rows, max(chunk.shape[1] for chunk in chunks)) + first.shape[2:]
+    needs_padding = any(chunk.shape[1:2] != shape[1:2] for chunk in chunks)
+
+    if isinstance(first, torch.Tensor):
+        if not needs_padding:
+            return torch.cat(chunks, dim=0)
+        dtype = first.dtype
+        for chunk in chunks[1:]:
+            dtype = torch.promote_types(dtype, chunk.dtype)
+        result = first.new_full(shape, padding_index, dtype=dtype)
+    elif isinstance(first, np.ndarray):
+        if allocate is None and not needs_padding:
+            return np.concatenate(chunks, axis=0)
+        dtype = np.result_type(*chunks)
+        if allocate is None:
+            result = np.full(shape, padding_index, dtype=dtype)
+        else:
+            result = allocate(shape, dtype)
+            if needs_padding:
+                result[...] = padding_index
+    else:
+        raise TypeError(f"Unsupported type for concatenation: got {type(first)}")
+
+    offset = 0
+    for chunk in chunks:
+        if len(shape) == 1:
+            result[offset : offset + chunk.shape[0]] = chunk
+        else:
+            result[offset : offset + chunk.shape[0], : chunk.shape[1]] = chunk
+        offset += chunk.shape[0]
+    return result
+
+
+def nested_concat_chunks(chunks, padding_index=-100, allocate=None):
+    """
+    Concat all the `chunks` on the first dim and pad them on the second if needed, like successive calls to
+    `nested_concat` would, but in linear time. Works for a list of tensors or of nested list/tuples/dict of tensors (with
+    the same structure).
+    """
+    first = chunks[0]
+    for chunk in chunks[1:]:
+        assert type(chunk) == type(
+            first
+        ), f"Expected all chunks to have the same type but found {type(first)} and {type(chunk)}."
+    if isinstance(first, (list, tuple)):
+        return type(first)(
+            nested_concat_chunks(list(items), padding_index=padding_index, allocate=allocate) for items in zip(*chunks)
+        )
+    elif isinstance(first, Mapping):
+        return type(first)(
+            {
+                k: nested_concat_chunks([chunk[k] for chunk in chunks], padding_index=padding_index, allocate=allocate)
+                for k in first
+            }
+        )
+    return pad_and_concatenate_chunks(chunks, padding_index=padding_index, allocate=allocate)
+
+
+class EvalLoopContainer:
+    """
+    Container for the tensors (or nested list/tuple/dict of tensors) produced at each step of an evaluation loop. They
+    are kept as they are when added and concatenated only once, when the arrays are requested, which takes a time
+    linear in their total size, unlike calling `nested_concat` at each step.
+
+    Args:
+        padding_index (`int`, *optional*, defaults to -100):
+            The padding index to use if the tensors don't all have the same sequence length.
+        spill_dir (`str`, *optional*):
+            If passed, the arrays moved to the CPU are written to memory-mapped `.npy` files in a new folder of this
+            directory instead of being kept in memory, and so is their concatenation. The folder is removed by
+            `remove_spill_folder`.
+    """
+
+    def __init__(self, padding_index: int = -100, spill_dir: Optional[str] = None):
+        self.padding_index = padding_index
+        self.spill_dir = spill_dir
+        self.tensors = []
+        self.arrays = []
+        self._spill_folder = None
+        self._spill_files = []
+        self._num_spilled = 0
+
+    def add(self, tensors) -> None:
+        """Add the tensors of a step, if not `None`."""
+        if tensors is not None:
+            self.tensors.append(tensors)
+
+    def get_tensors(self):
+        """Returns the concatenation of the tensors added since the last call, which are then removed."""
+        if len(self.tensors) == 0:
+            return None
+        tensors = nested_concat_chunks(self.tensors, padding_index=self.padding_index)
+        self.tensors = []
+        return tensors
+
+    def to_cpu_and_numpy(self) -> None:
+        """Move the tensors added so far to the CPU and convert them to numpy arrays."""
+        if len(self.tensors) == 0:
+            return
+        arrays = [nested_numpify(tensors) for tensors in self.tensors]
+        self.tensors = []
+        if self.spill_dir is not None:
+            arrays = [nested_concat_chunks(arrays, padding_index=self.padding_index, allocate=self._allocate_spilled)]
+        self.arrays.extend(arrays)
+
+    def get_arrays(self):
+        """Returns the concatenation of all the tensors added, as numpy arrays, or `None` if none were added."""
+        self.to_cpu_and_numpy()
+        if len(self.arrays) <= 1:
+            return self.arrays[0] if len(self.arrays) > 0 else None
+
+        allocate = self._allocate_spilled if self.spill_dir is not None else None
+        spilled_chunks = self._spill_files
+        self._spill_files = []
+        self.arrays = [nested_concat_chunks(self.arrays, padding_index=self.padding_index, allocate=allocate)]
+        for spilled_chunk in spilled_chunks:
+            # The arrays were only mapped by the chunks, the file can be removed once they are concatenated
+            try:
+                os.remove(spilled_chunk)
+            except OSError:
+                pass
+        return self.arrays[0]
+
+    def remove_spill_folder(self) -> None:
+        """
+        Removes the folder of the files written in `spill_dir`. The arrays already returned by `get_arrays` keep
+        mapping their files, which are only deleted once these arrays are (on systems that allow removing mapped
+        files, like Linux and macOS).
+        """
+        if self._spill_folder is not None:
+            shutil.rmtree(self._spill_folder, ignore_errors=True)
+            self._spill_folder = None
+            self._spill_files = []
+
+    def _allocate_spilled(self, shape, dtype):
+        if self._spill_folder is None:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            self._spill_folder = tempfile.mkdtemp(prefix="eval-", dir=self.spill_dir)
+        spill_file = os.path.join(self._spill_folder, f"{self._num_spilled:05d}.npy")
+        self._num_spilled += 1
+        self._spill_files.append(spill_file)
+        return np.lib.format.open_memmap(spill_file, mode="w+", dtype=dtype, shape=shape)
+
+
 def find_batch_size(tensors):
     """
     Find the first dimension of a tensor in a nested list/tuple/dict of tensors.
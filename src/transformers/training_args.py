@@ -219,6 +219,13 @@ class TrainingArguments:
             Number of predictions steps to accumulate the output tensors for, before moving the results to the CPU. If
             left unset, the whole predictions are accumulated on GPU/NPU/TPU before being moved to the CPU (faster but
             requires more memory).
+        eval_spill_dir (`str`, *optional*):
+            A directory where the predictions, labels and inputs moved to the CPU during evaluation are written, as
+            `.npy` files. They are then returned as memory-mapped arrays of these files, to evaluate on datasets whose
+            predictions don't fit in memory. Works best with `eval_accumulation_steps`, since the predictions are
+            written to disk each time they are moved to the CPU. The files of an evaluation are removed once its
+            metrics are computed, and their disk space is freed once the returned arrays are deleted (on systems that
+            allow removing mapped files, like Linux and macOS). Not supported with `use_legacy_prediction_loop`.
         eval_delay (`float`, *optional*):
             Number of epochs or steps to wait for before the first evaluation can be performed, depending on the
             evaluation_strategy.
@@ -315,6 +322,17 @@ class TrainingArguments:
             Note that when this is true, you won't be able to resume training from checkpoint.
             This enables you to save storage by not storing the optimizer, scheduler & rng state.
             You can only load the model using `from_pretrained` with this option set to `True`.
+        save_async (`bool`, *optional*, defaults to `False`):
+            Whether to write the model weights and the optimizer state of the checkpoints on a background thread, so
+            that training resumes as soon as they are copied to the CPU. The trainer waits for a checkpoint to be
+            written before saving the next one and at the end of training. The checkpoint folder only gets its final
+            name once everything is written, which can be after the `on_save` event of the callbacks.
+        save_delta_checkpoints (`bool`, *optional*, defaults to `False`):
+            Whether to save the model weights of the checkpoints as delta checkpoints (see the `base_checkpoint`
+            argument of [`~PreTrainedModel.save_pretrained`]): the first checkpoint of the training is complete, and
+            the next ones only contain the weights that changed since then. This is useful when most of the model is
+            frozen. The first checkpoint is not deleted by `save_total_limit` as long as other checkpoints need it.
+            Requires `save_safetensors=True`.
         use_cpu (`bool`, *optional*, defaults to `False`):
             Whether or not to use cpu. If set to False, we will use cuda or mps device if available.
         seed (`int`, *optional*, defaults to 42):
@@ -754,6 +772,15 @@ class TrainingArguments:
         default=None,
         metadata={"help": "Number of predictions steps to accumulate before moving the tensors to the CPU."},
     )
+    eval_spill_dir: Optional[str] = field(
+        default=None,
+        metadata={
+            "help": (
+                "A directory where the predictions, labels and inputs moved to the CPU during evaluation are written,"
+                " to return them as memory-mapped arrays instead of keeping them in memory."
+            )
+        },
+    )
 
     eval_delay: Optional[float] = field(
         default=0,
@@ -890,6 +917,25 @@ class TrainingArguments:
             )
         },
     )
+    save_async: bool = field(
+        default=False,
+        metadata={
+            "help": (
+                "Whether to write the model weights and the optimizer state of the checkpoints on a background thread."
+                " The trainer waits for a checkpoint to be written before saving the next one and at the end of"
+                " training."
+            )
+        },
+    )
+    save_delta_checkpoints: bool = field(
+        default=False,
+        metadata={
+            "help": (
+                "Whether to only save the model weights that changed since the first checkpoint of the training in the"
+                " next checkpoints, which read the other weights from the first checkpoint."
+            )
+        },
+    )
     no_cuda: bool = field(
         default=False,
         metadata={"help": "This argument is deprecated. It will be removed in version 5.0 of 🤗 Transformers."},
@@ -1444,7 +1490,12 @@ class TrainingArguments:
                     f"steps, but found {self.save_steps}, which is not a round multiple of {self.eval_steps}."
                 )
 
+        if self.eval_spill_dir is not None and self.use_legacy_prediction_loop:
+            raise ValueError("--eval_spill_dir is not supported with --use_legacy_prediction_loop")
+
         safetensors_available = is_safetensors_available()
+        if self.save_delta_checkpoints and not self.save_safetensors:
+            raise ValueError("--save_delta_checkpoints requires --save_safetensors")
         if self.save_safetensors and not safetensors_available:
             raise ValueError(f"--save_safetensors={self.save_safetensors} requires safetensors to be installed!")
         if not self.save_safetensors and safetensors_available:
@@ -62,6 +62,7 @@ from .generic import (
 )
 from .hub import (
     CLOUDFRONT_DISTRIB_PREFIX,
+    CONVERTED_TOKENIZERS_CACHE,
     HF_MODULES_CACHE,
     HUGGINGFACE_CO_PREFIX,
     HUGGINGFACE_CO_RESOLVE_ENDPOINT,
@@ -20,11 +20,12 @@ import re
 import shutil
 import sys
 import tempfile
+import time
 import traceback
 import warnings
 from concurrent import futures
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple, Union
+from typing import Dict, FrozenSet, List, Optional, Tuple, Union
 from urllib.parse import urlparse
 from uuid import uuid4
 
@@ -33,6 +34,7 @@ import requests
 from huggingface_hub import (
     _CACHED_NO_EXIST,
     CommitOperationAdd,
+    HfApi,
     ModelCard,
     ModelCardData,
     constants,
@@ -44,7 +46,12 @@ from huggingface_hub import (
     hf_hub_url,
     try_to_load_from_cache,
 )
-from huggingface_hub.file_download import REGEX_COMMIT_HASH, http_get
+from huggingface_hub.file_download import (
+    REGEX_COMMIT_HASH,
+    _cache_commit_hash_for_specific_revision,
+    http_get,
+    repo_folder_name,
+)
 from huggingface_hub.utils import (
     EntryNotFoundError,
     GatedRepoError,
@@ -115,6 +122,15 @@ if (
     shutil.move(old_default_cache_path, constants.HF_HUB_CACHE)
 
 HF_MODULES_CACHE = os.getenv("HF_MODULES_CACHE", os.path.join(constants.HF_HOME, "modules"))
+CONVERTED_TOKENIZERS_CACHE = os.getenv(
+    "HF_CONVERTED_TOKENIZERS_CACHE", os.path.join(constants.HF_HOME, "converted_tokenizers")
+)
+RESOLUTION_MANIFESTS_CACHE = os.getenv(
+    "HF_RESOLUTION_MANIFESTS_CACHE", os.path.join(constants.HF_HOME, "resolution_manifests")
+)
+# How long (in seconds) the list of files of a branch or a tag of a repo is trusted before being fetched again, 0
+# disables the resolution manifests. Manifests of commit hashes never expire.
+RESOLUTION_MANIFEST_TTL = float(os.getenv("TRANSFORMERS_RESOLUTION_MANIFEST_TTL", 300))
 TRANSFORMERS_DYNAMIC_MODULE_NAME = "transformers_modules"
 SESSION_ID = uuid4().hex
 
@@ -263,6 +279,112 @@ def extract_commit_hash(resolved_file: Optional[str], commit_hash: Optional[str]
     return commit_hash if REGEX_COMMIT_HASH.match(commit_hash) else None
 
 
+# Resolution manifests (commit hash and list of files of a revision of a repo on the Hub) and files resolved with them
+# by this process.
+_resolution_manifests = {}
+_resolved_files = {}
+
+
+def _save_resolution_manifest(manifest: Dict, manifest_file: str):
+    try:
+        os.makedirs(os.path.dirname(manifest_file), exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+            "w", dir=os.path.dirname(manifest_file), suffix=".tmp", delete=False, encoding="utf-8"
+        ) as f:
+            json.dump(manifest, f)
+        os.replace(f.name, manifest_file)
+    except OSError as e:
+        logger.debug(f"Could not save the resolution manifest {manifest_file}: {e}")
+
+
+def _get_resolution_manifest(
+    repo_id: str,
+    revision: Optional[str] = None,
+    repo_type: Optional[str] = None,
+    token: Optional[Union[bool, str]] = None,
+    local_files_only: bool = False,
+) -> Optional[Tuple[str, FrozenSet[str]]]:
+    """
+    Returns the commit hash a revision of a repo on the Hub points to and the names of all the files of the repo at
+    that commit, or `None` if they can't be fetched. They are fetched with a single call to the Hub API, then kept in
+    memory and in `RESOLUTION_MANIFESTS_CACHE` (to be shared with other processes) for `RESOLUTION_MANIFEST_TTL` seconds
+    (forever for commit hashes).
+    """
+    if RESOLUTION_MANIFEST_TTL <= 0:
+        return None
+    if revision is None:
+        revision = constants.DEFAULT_REVISION
+    if repo_type is None:
+        repo_type = "model"
+    is_commit_hash = REGEX_COMMIT_HASH.match(revision) is not None
+    if local_files_only and not is_commit_hash:
+        # The revision may have moved since the manifest was fetched, the refs of the cache are the reference offline.
+        return None
+
+    def is_valid(manifest):
+        if manifest.get("endpoint") != constants.ENDPOINT:
+            return False
+        if is_commit_hash and manifest["commit_hash"] is not None:
+            return True
+        return time.time() - manifest["timestamp"] < RESOLUTION_MANIFEST_TTL
+
+    key = (constants.ENDPOINT, repo_type, repo_id, revision)
+    manifest = _resolution_manifests.get(key)
+    if manifest is None or not is_valid(manifest):
+        manifests_folder = os.path.join(
+            RESOLUTION_MANIFESTS_CACHE, repo_folder_name(repo_id=repo_id, repo_type=repo_type)
+        )
+        manifest_file = os.path.join(manifests_folder, f"{revision.replace('/', '--')}.json")
+        manifest = None
+        if os.path.isfile(manifest_file):
+            try:
+                with open(manifest_file, encoding="utf-8") as f:
+                    manifest = json.load(f)
+            except (OSError, ValueError):
+                manifest = None
+            if manifest is not None and is_valid(manifest):
+                manifest["files"] = frozenset(manifest["files"])
+            else:
+                manifest = None
+
+        if manifest is None:
+            if local_files_only:
+                return None
+            try:
+                info = HfApi().repo_info(repo_id, revision=revision, repo_type=repo_type, token=token)
+            except (requests.exceptions.RequestException, HFValidationError) as e:
+                logger.debug(f"Could not fetch the list of files of {repo_id} at revision {revision}: {e}")
+                info = None
+            manifest = {"endpoint": constants.ENDPOINT, "commit_hash": None, "timestamp": time.time()}
+            if info is not None and info.sha is not None and info.siblings is not None:
+                manifest["commit_hash"] = info.sha
+                manifest["files"] = sorted(sibling.rfilename for sibling in info.siblings)
+                _save_resolution_manifest(manifest, manifest_file)
+                if info.sha != revision:
+                    _save_resolution_manifest(manifest, os.path.join(manifests_folder, f"{info.sha}.json"))
+                manifest["files"] = frozenset(manifest["files"])
+                _resolution_manifests[key[:-1] + (info.sha,)] = manifest
+        _resolution_manifests[key] = manifest
+
+    if manifest["commit_hash"] is None:
+        return None
+    return manifest["commit_hash"], manifest["files"]
+
+
+def _cache_missing_entry(
+    repo_id: str, filename: str, cache_dir: str, repo_type: Optional[str], revision: Optional[str], commit_hash: str
+):
+    # Same markers as the ones `hf_hub_download` leaves for missing files, so that they are also found offline.
+    storage_folder = os.path.join(cache_dir, repo_folder_name(repo_id=repo_id, repo_type=repo_type or "model"))
+    try:
+        _cache_commit_hash_for_specific_revision(storage_folder, revision or constants.DEFAULT_REVISION, commit_hash)
+        no_exist_file = Path(storage_folder) / ".no_exist" / commit_hash / filename
+        no_exist_file.parent.mkdir(parents=True, exist_ok=True)
+        no_exist_file.touch()
+    except OSError as e:
+        logger.debug(f"Could not cache the absence of {filename} in {repo_id}: {e}")
+
+
 def cached_file(
     path_or_repo_id: Union[str, os.PathLike],
     filename: str,
@@ -379,6 +501,32 @@ def cached_file(
     if isinstance(cache_dir, Path):
         cache_dir = str(cache_dir)
 
+    manifest = None
+    if not force_download and proxies is None:
+        # The list of files of the repo answers for all the files of the revision, present or missing.
+        manifest = _get_resolution_manifest(
+            path_or_repo_id,
+            revision=_commit_hash or revision,
+            repo_type=repo_type,
+            token=token,
+            local_files_only=local_files_only,
+        )
+    if manifest is not None:
+        _commit_hash, repo_files = manifest
+        repo_filename = Path(full_filename).as_posix()
+        resolved_key = (cache_dir, repo_type, path_or_repo_id, _commit_hash, repo_filename)
+        if resolved_key not in _resolved_files and repo_filename not in repo_files:
+            _cache_missing_entry(path_or_repo_id, repo_filename, cache_dir, repo_type, revision, _commit_hash)
+            _resolved_files[resolved_key] = None
+        if resolved_key in _resolved_files:
+            resolved_file = _resolved_files[resolved_key]
+            if resolved_file is not None or not _raise_exceptions_for_missing_entries:
+                return resolved_file
+            raise EnvironmentError(
+                f"{path_or_repo_id} does not appear to have a file named {full_filename}. Checkout "
+                f"'https://huggingface.co/{path_or_repo_id}/{revision or 'main'}' for available files."
+            )
+
     if _commit_hash is not None and not force_download:
         # If the file is cached under that commit hash, we return it directly.
         resolved_file = try_to_load_from_cache(
@@ -386,6 +534,8 @@ def cached_file(
         )
         if resolved_file is not None:
             if resolved_file is not _CACHED_NO_EXIST:
+                if manifest is not None:
+                    _resolved_files[resolved_key] = resolved_file
                 return resolved_file
             elif not _raise_exceptions_for_missing_entries:
                 return None
@@ -462,6 +612,8 @@ def cached_file(
         raise EnvironmentError(
             f"Incorrect path_or_model_id: '{path_or_repo_id}'. Please provide either the path to a local folder or the repo_id of a model on the Hub."
         ) from e
+    if manifest is not None:
+        _resolved_files[resolved_key] = resolved_file
     return resolved_file
 
 
@@ -1019,6 +1171,18 @@ def get_checkpoint_shard_files(
     sharded_metadata["all_checkpoint_keys"] = list(index["weight_map"].keys())
     sharded_metadata["weight_map"] = index["weight_map"].copy()
 
+    if "base_checkpoint" in sharded_metadata:
+        # Delta checkpoints read the weights that did not change from the files of their base checkpoint. Their paths
+        # are made absolute, so that they don't depend on the folder of the checkpoint.
+        if not os.path.isdir(pretrained_model_name_or_path):
+            raise ValueError(
+                f"{pretrained_model_name_or_path} is a delta checkpoint, which can only be loaded from a local folder."
+            )
+        folder = os.path.join(pretrained_model_name_or_path, subfolder)
+        weight_map = {key: os.path.abspath(os.path.join(folder, f)) for key, f in index["weight_map"].items()}
+        sharded_metadata["weight_map"] = weight_map
+        return sorted(set(weight_map.values())), sharded_metadata
+
     # First, let's deal with local folder.
     if os.path.isdir(pretrained_model_name_or_path):
         shard_filenames = [os.path.join(pretrained_model_name_or_path, subfolder, f) for f in shard_filenames]
@@ -15,6 +15,7 @@
 
 
 import os
+import pickle
 import unittest
 
 from transformers import BertTokenizerFast
@@ -202,6 +203,38 @@ class BertTokenizationTest(TokenizerTesterMixin, unittest.TestCase):
 
         self.assertListEqual(tokenizer.tokenize("unwantedX running"), ["[UNK]", "runn", "##ing"])
 
+    def test_basic_tokenizer_special_characters(self):
+        tokenizer = BasicTokenizer()
+
+        # Control characters are removed, CJK characters and punctuation are split and final sigmas are kept
+        self.assertListEqual(
+            tokenizer.tokenize("A\x00b​c\x0bD ΟΔΟΣ中文、Éé́!"),
+            ["abcd", "οδος", "中", "文", "、", "ee", "!"],
+        )
+        # Tokens in `never_split` are kept as is, the other ones are processed in the same way
+        self.assertListEqual(tokenizer.tokenize("ΟΔΟΣ Éé,ΟΔΟΣ", never_split=["ΟΔΟΣ"]), ["ΟΔΟΣ", "ee", ",", "οδος"])
+
+    def test_basic_tokenizer_never_split_after_normalization(self):
+        # Tokens are also kept as is when they only match `never_split` once lower cased or stripped of their accents
+        tokenizer = BasicTokenizer(do_lower_case=True, never_split=["<e1>"])
+        self.assertListEqual(tokenizer.tokenize("the <E1> man"), ["the", "<e1>", "man"])
+
+        tokenizer = BasicTokenizer(do_lower_case=False, strip_accents=True, never_split=["[MASK]"])
+        self.assertListEqual(tokenizer.tokenize("the [MASK]\u0301 man"), ["the", "[MASK]", "man"])
+
+    def test_wordpiece_tokenizer_vocab_changes(self):
+        vocab = {"[UNK]": 0, "un": 1, "##want": 2, "##wanted": 3, "##e": 4}
+        tokenizer = WordpieceTokenizer(vocab=vocab, unk_token="[UNK]")
+
+        self.assertListEqual(tokenizer.tokenize("unwanted"), ["un", "##wanted"])
+        self.assertListEqual(tokenizer.tokenize("unwanteed"), ["[UNK]"])
+
+        vocab["##ed"] = 5
+        self.assertListEqual(tokenizer.tokenize("unwanteed"), ["un", "##want", "##e", "##ed"])
+
+        unpickled_tokenizer = pickle.loads(pickle.dumps(tokenizer))
+        self.assertListEqual(unpickled_tokenizer.tokenize("unwanteed"), ["un", "##want", "##e", "##ed"])
+
     def test_is_whitespace(self):
         self.assertTrue(_is_whitespace(" "))
         self.assertTrue(_is_whitespace("\t"))
@@ -12,7 +12,10 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import os
+import tempfile
 import unittest
+from unittest import mock
 
 import numpy as np
 import pytest
@@ -25,13 +28,25 @@ from transformers import (
     AutoFeatureExtractor,
     AutoProcessor,
     AutoTokenizer,
+    BertConfig,
+    BertTokenizer,
     Speech2TextForConditionalGeneration,
+    SpeechEncoderDecoderConfig,
+    SpeechEncoderDecoderModel,
+    Wav2Vec2Config,
+    Wav2Vec2FeatureExtractor,
     Wav2Vec2ForCTC,
     WhisperForConditionalGeneration,
 )
 from transformers.pipelines import AutomaticSpeechRecognitionPipeline, pipeline
 from transformers.pipelines.audio_utils import chunk_bytes_iter
-from transformers.pipelines.automatic_speech_recognition import _find_timestamp_sequence, chunk_iter
+from transformers.pipelines.automatic_speech_recognition import (
+    _fast_find_longest_common_sequence,
+    _find_overlap_length,
+    _find_timestamp_sequence,
+    chunk_iter,
+    stream_chunk_iter,
+)
 from transformers.testing_utils import (
     is_pipeline_test,
     is_torch_available,
@@ -1094,6 +1109,46 @@ class AutomaticSpeechRecognitionPipelineTests(unittest.TestCase):
         self.assertEqual(output, [{"text": ANY(str)}])
         self.assertEqual(output[0]["text"][:6], "ZBT ZC")
 
+    @require_torch
+    def test_chunking_fast_scheduled(self):
+        speech_recognizer = pipeline(
+            task="automatic-speech-recognition",
+            model="hf-internal-testing/tiny-random-wav2vec2",
+            chunk_length_s=1.0,
+            schedule_chunks=True,
+        )
+        # Every chunk can be batched with another chunk of the same length, so batching doesn't add any padding
+        waveforms = [np.tile(np.arange(1000, dtype=np.float32), n) * 1e-3 for n in (40, 8, 40, 8)]
+
+        expected = speech_recognizer(waveforms, batch_size=1)
+        output = speech_recognizer(waveforms, batch_size=2)
+        self.assertEqual(output, expected)
+
+        def data():
+            yield from waveforms
+
+        output = list(speech_recognizer(data(), batch_size=2))
+        self.assertEqual(output, expected)
+
+    def test_fast_find_longest_common_sequence(self):
+        index_left, index_right, longest = _fast_find_longest_common_sequence([1, 2, 3, 4, 5, 6], [9, 3, 4, 5, 2, 3])
+        self.assertEqual((index_left, index_right, longest), (2, 1, 3))
+
+        # The last occurrence of the longest match is used
+        index_left, index_right, longest = _fast_find_longest_common_sequence([1, 2, 7, 1, 2], [1, 2])
+        self.assertEqual((index_left, index_right, longest), (3, 0, 2))
+
+        self.assertEqual(_fast_find_longest_common_sequence([1, 2], [3, 4]), (-1, -1, 0))
+        self.assertEqual(_fast_find_longest_common_sequence([], [3, 4]), (-1, -1, 0))
+
+    def test_find_overlap_length(self):
+        self.assertEqual(_find_overlap_length([1, 2, 3, 4, 5], [4, 5, 6, 7]), 2)
+        # A single matching token is not enough
+        self.assertEqual(_find_overlap_length([1, 2, 3, 4, 5], [5, 6, 7]), 0)
+        # Imperfect but long overlaps are accepted
+        self.assertEqual(_find_overlap_length([1, 2, 3, 4, 5], [2, 3, 9, 5, 6]), 4)
+        self.assertEqual(_find_overlap_length([], [1, 2]), 0)
+
     @require_torch
     def test_return_timestamps_ctc_fast(self):
         speech_recognizer = pipeline(
@@ -1479,6 +1534,110 @@ class AutomaticSpeechRecognitionPipelineTests(unittest.TestCase):
         # (85, 100)
         self.assertEqual(nested_simplify(input_values[:, 80:100]), nested_simplify(outs[4]["input_values"]))
 
+    def test_stream_chunk_iterator(self):
+        inputs = np.arange(100, dtype=np.float32)
+        frames = [inputs[i : i + 7] for i in range(0, 100, 7)]
+
+        outs = list(stream_chunk_iter(iter(frames), 36, 6, 6))
+        self.assertEqual([o["stride"] for o in outs], [(36, 0, 6), (36, 6, 6), (36, 6, 6), (28, 6, 0)])
+        self.assertEqual([o["is_last"] for o in outs], [False, False, False, True])
+        self.assertEqual([o["partial"] for o in outs], [False, False, False, False])
+        # Same windows as `chunk_iter` on the full input
+        self.assertEqual([o["raw"].tolist() for o in outs], [inputs[i : i + 36].tolist() for i in range(0, 73, 24)])
+
+        # Partial windows are yielded in between full ones
+        outs = list(stream_chunk_iter(iter(frames), 36, 6, 6, stream_chunk_len=14))
+        self.assertEqual(
+            [o["stride"] for o in outs if o["partial"]],
+            [(14, 0, 0), (28, 0, 0), (32, 6, 0), (29, 6, 0), (26, 6, 0)],
+        )
+        self.assertEqual(
+            [o["stride"] for o in outs if not o["partial"]], [(36, 0, 6), (36, 6, 6), (36, 6, 6), (28, 6, 0)]
+        )
+
+        # Nothing left after the last full window
+        outs = list(stream_chunk_iter(iter([inputs[:36]]), 36, 6, 0))
+        self.assertEqual([o["stride"] for o in outs], [(36, 0, 0)])
+
+        with self.assertRaises(ValueError):
+            list(stream_chunk_iter(iter(frames), 12, 6, 6))
+
+    @require_torch
+    def test_stream(self):
+        speech_recognizer = pipeline(
+            task="automatic-speech-recognition",
+            model="hf-internal-testing/tiny-random-wav2vec2",
+        )
+        waveform = np.tile(np.arange(1000, dtype=np.float32), 34)
+        frames = (waveform[i : i + 1600] for i in range(0, waveform.shape[0], 1600))
+
+        outputs = list(speech_recognizer.stream(frames, chunk_length_s=0.5, stride_length_s=0.1, stream_chunk_s=0.2))
+        self.assertEqual([o["is_last"] for o in outputs], [False] * (len(outputs) - 1) + [True])
+        self.assertEqual(outputs[-1]["unstable_text"], "")
+
+        # The stable parts add up to the offline chunked transcription
+        expected = speech_recognizer(waveform, chunk_length_s=0.5, stride_length_s=0.1)
+        self.assertEqual("".join(o["stable_text"] for o in outputs), expected["text"])
+
+    @require_torch
+    def test_stream_seq2seq(self):
+        encoder_config = Wav2Vec2Config(
+            hidden_size=16,
+            num_hidden_layers=1,
+            num_attention_heads=2,
+            intermediate_size=16,
+            conv_dim=(16,),
+            conv_stride=(5,),
+            conv_kernel=(10,),
+        )
+        decoder_config = BertConfig(
+            vocab_size=25, hidden_size=16, num_hidden_layers=1, num_attention_heads=2, intermediate_size=16
+        )
+        config = SpeechEncoderDecoderConfig.from_encoder_decoder_configs(encoder_config, decoder_config)
+        model = SpeechEncoderDecoderModel(config).eval()
+        feature_extractor = Wav2Vec2FeatureExtractor(do_normalize=False, return_attention_mask=False)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            vocab_file = os.path.join(tmp_dir, "vocab.txt")
+            with open(vocab_file, "w", encoding="utf-8") as vocab_writer:
+                vocab_tokens = ["[UNK]", "[CLS]", "[SEP]", "[PAD]", "[MASK]"] + [f"w{i}" for i in range(20)]
+                vocab_writer.write("".join([x + "\n" for x in vocab_tokens]))
+            tokenizer = BertTokenizer(vocab_file)
+        speech_recognizer = AutomaticSpeechRecognitionPipeline(
+            model=model, feature_extractor=feature_extractor, tokenizer=tokenizer
+        )
+
+        # Each run of 400 samples of value `i` is transcribed as the token `i`, when most of it is in the window
+        def generate(encoder_outputs, attention_mask=None, **kwargs):
+            values = encoder_outputs[0].round().long()
+            boundaries = torch.nonzero(values[1:] != values[:-1]).flatten() + 1
+            starts = [0] + boundaries.tolist()
+            ends = boundaries.tolist() + [len(values)]
+            tokens = [values[start].item() for start, end in zip(starts, ends) if end - start >= 200]
+            return torch.tensor([[tokenizer.cls_token_id] + tokens + [tokenizer.sep_token_id]])
+
+        token_ids = np.random.RandomState(0).permutation(np.arange(5, 25))
+        waveform = np.repeat(token_ids, 400).astype(np.float32)
+        frames = (waveform[i : i + 1000] for i in range(0, waveform.shape[0], 1000))
+        with mock.patch.object(model, "get_encoder", return_value=lambda inputs, attention_mask=None: inputs):
+            with mock.patch.object(model, "generate", side_effect=generate):
+                with mock.patch(
+                    "transformers.pipelines.automatic_speech_recognition._find_overlap_length",
+                    wraps=_find_overlap_length,
+                ) as mock_find_overlap_length:
+                    outputs = list(
+                        speech_recognizer.stream(frames, chunk_length_s=0.25, stride_length_s=0.05, stream_chunk_s=0.1)
+                    )
+                    self.assertGreater(mock_find_overlap_length.call_count, 0)
+                expected = speech_recognizer(waveform)
+
+        self.assertEqual([o["is_last"] for o in outputs], [False] * (len(outputs) - 1) + [True])
+        self.assertTrue(any(o["unstable_text"] for o in outputs))
+        self.assertEqual(outputs[-1]["unstable_text"], "")
+
+        # The stable parts add up to the transcription of the whole audio, without repeating the overlapping windows
+        self.assertEqual(expected["text"], tokenizer.decode(token_ids))
+        self.assertEqual("".join(o["stable_text"] for o in outputs), expected["text"])
+
     @require_torch
     def test_stride(self):
         speech_recognizer = pipeline(
@@ -488,6 +488,55 @@ class PipelineUtilsTest(unittest.TestCase):
         outputs = list(dataset)
         self.assertEqual(outputs, [[{"id": 2}, {"id": 3}, {"id": 4}, {"id": 5}]])
 
+    @require_torch
+    def test_pipeline_chunk_scheduler(self):
+        import torch
+
+        from transformers.pipelines.pt_utils import PipelineChunkIterator, PipelineChunkScheduler
+
+        def preprocess_chunk(n: int):
+            for i in range(n):
+                # The last chunk is shorter
+                length = 4 if i < n - 1 else 2
+                yield {"id": torch.zeros((1, length)), "is_last": i == n - 1}
+
+        dataset = PipelineChunkIterator([3, 1, 2, 3], preprocess_chunk, {})
+        dataset = PipelineChunkScheduler(dataset, batch_size=2)
+
+        outputs = [(item["chunk_index"], item["id"].shape[1]) for item in dataset]
+        self.assertEqual(
+            outputs,
+            [
+                ((0, 0), 4),
+                ((0, 1), 4),
+                ((0, 2), 2),
+                ((1, 0), 2),
+                ((2, 0), 4),
+                ((3, 0), 4),
+                ((2, 1), 2),
+                ((3, 2), 2),
+                ((3, 1), 4),
+            ],
+        )
+
+    @require_torch
+    def test_pipeline_scheduled_pack_iterator(self):
+        from transformers.pipelines.pt_utils import PipelineScheduledPackIterator
+
+        dummy_dataset = [
+            {"id": [0, 1, 2], "is_last": [False, True, True], "chunk_index": [(1, 0), (1, 1), (0, 0)]},
+            {"id": [3, 4], "is_last": [False, True], "chunk_index": [(2, 0), (2, 1)]},
+        ]
+
+        def add(number, extra=0):
+            self.assertNotIn("chunk_index", number)
+            return {"id": [i + extra for i in number["id"]], "is_last": number["is_last"]}
+
+        dataset = PipelineScheduledPackIterator(dummy_dataset, add, {"extra": 2}, loader_batch_size=3)
+
+        outputs = list(dataset)
+        self.assertEqual(outputs, [[{"id": 4}], [{"id": 2}, {"id": 3}], [{"id": 5}, {"id": 6}]])
+
     def test_pipeline_negative_device(self):
         # To avoid regressing, pipeline used to accept device=-1
         classifier = pipeline("text-generation", "hf-internal-testing/tiny-random-bert", device=-1)
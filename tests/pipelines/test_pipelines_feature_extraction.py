@@ -12,6 +12,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import os
+import tempfile
 import unittest
 
 import numpy as np
@@ -150,6 +152,57 @@ class FeatureExtractionPipelineTests(unittest.TestCase):
         outputs = feature_extractor("This is a test", return_tensors=True)
         self.assertTrue(torch.is_tensor(outputs))
 
+    @require_torch
+    def test_pooling_pt(self):
+        feature_extractor = pipeline(
+            task="feature-extraction", model="hf-internal-testing/tiny-random-distilbert", framework="pt"
+        )
+        texts = ["This is a test", "This is another, longer test of the pooling"]
+        features = [feature_extractor(text, return_tensors="np") for text in texts]
+        self.assertIsInstance(features[0], np.ndarray)
+        self.assertEqual(features[0].shape[::2], (1, 32))
+
+        for batch_size in (1, 2):
+            cls = feature_extractor(texts, pooling="cls", return_tensors="np", batch_size=batch_size)
+            mean = feature_extractor(texts, pooling="mean", return_tensors="np", batch_size=batch_size)
+            last = feature_extractor(texts, pooling="last", return_tensors="np", batch_size=batch_size)
+            self.assertEqual(cls.shape, (2, 32))
+            self.assertTrue(cls.flags["C_CONTIGUOUS"])
+            for feature, cls_feature, mean_feature, last_feature in zip(features, cls, mean, last):
+                self.assertTrue(np.allclose(cls_feature, feature[0, 0], atol=1e-5))
+                self.assertTrue(np.allclose(mean_feature, feature[0].mean(axis=0), atol=1e-5))
+                self.assertTrue(np.allclose(last_feature, feature[0, -1], atol=1e-5))
+
+        # Without pooling the features of each input keep their own number of tokens
+        outputs = feature_extractor(texts, return_tensors="np")
+        self.assertIsInstance(outputs, list)
+        self.assertEqual([output.shape for output in outputs], [feature.shape for feature in features])
+
+        outputs = feature_extractor("This is a test", pooling="mean", return_tensors=True)
+        self.assertTrue(torch.is_tensor(outputs))
+        self.assertEqual(outputs.shape, (1, 32))
+
+    @require_torch
+    def test_output_file_pt(self):
+        feature_extractor = pipeline(
+            task="feature-extraction", model="hf-internal-testing/tiny-random-distilbert", framework="pt"
+        )
+        texts = ["This is a test", "This is another, longer test of the pooling", "A third one"]
+        expected = feature_extractor(texts, pooling="mean", return_tensors="np")
+        self.assertEqual(expected.shape, (3, 32))
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            output_file = os.path.join(tmp_dir, "embeddings.npy")
+            embeddings = feature_extractor(texts, pooling="mean", batch_size=2, output_file=output_file)
+            self.assertIsInstance(embeddings, np.memmap)
+            self.assertEqual(embeddings.shape, (3, 32))
+            self.assertTrue(np.allclose(embeddings, expected, atol=1e-5))
+            self.assertTrue(np.allclose(np.load(output_file), expected, atol=1e-5))
+            del embeddings
+
+            with self.assertRaises(ValueError):
+                feature_extractor(texts, output_file=output_file)
+
     @require_tf
     def test_return_tensors_tf(self):
         feature_extractor = pipeline(
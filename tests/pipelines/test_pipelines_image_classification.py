@@ -141,6 +141,21 @@ class ImageClassificationPipelineTests(unittest.TestCase):
             ],
         )
 
+    @require_torch
+    def test_small_model_pt_prefetch_images(self):
+        small_model = "hf-internal-testing/tiny-random-vit"
+        image_classifier = pipeline("image-classification", model=small_model)
+        prefetching_image_classifier = pipeline("image-classification", model=small_model, prefetch_images=True)
+        self.assertIsNotNone(prefetching_image_classifier.image_prefetcher)
+
+        # The images are decoded at full size, so the outputs are the same
+        self.assertIsNone(prefetching_image_classifier.image_prefetcher.draft_size)
+        images = ["./tests/fixtures/tests_samples/COCO/000000039769.png"] * 3
+        self.assertEqual(
+            nested_simplify(prefetching_image_classifier(images, top_k=2, batch_size=2)),
+            nested_simplify(image_classifier(images, top_k=2, batch_size=2)),
+        )
+
     @require_tf
     def test_small_model_tf(self):
         small_model = "hf-internal-testing/tiny-random-vit"
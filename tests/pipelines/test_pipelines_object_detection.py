@@ -12,6 +12,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import os
+import tempfile
 import unittest
 
 from transformers import (
@@ -38,6 +40,8 @@ from .test_pipelines_common import ANY
 
 if is_vision_available():
     from PIL import Image
+
+    from transformers.image_utils import ImagePrefetcher
 else:
 
     class Image:
@@ -147,6 +151,37 @@ class ObjectDetectionPipelineTests(unittest.TestCase):
             ],
         )
 
+    @require_torch
+    def test_small_model_pt_prefetch_images(self):
+        model_id = "hf-internal-testing/tiny-detr-mobilenetsv3"
+
+        model = AutoModelForObjectDetection.from_pretrained(model_id)
+        feature_extractor = AutoFeatureExtractor.from_pretrained(model_id)
+        object_detector = ObjectDetectionPipeline(model=model, feature_extractor=feature_extractor)
+        prefetching_object_detector = ObjectDetectionPipeline(
+            model=model, feature_extractor=feature_extractor, prefetch_images=True
+        )
+        self.assertIsNone(prefetching_object_detector.image_prefetcher.draft_size)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            # A JPEG image large enough to be decoded at a reduced size if it was asked for
+            image = Image.open("./tests/fixtures/tests_samples/COCO/000000039769.png")
+            image = image.convert("RGB").resize((image.width * 6, image.height * 6))
+            image_path = os.path.join(tmp_dir, "image.jpg")
+            image.save(image_path)
+
+            # The images are decoded at full size, so the scores and the boxes are the same
+            images = [image_path] * 3
+            self.assertEqual(
+                nested_simplify(prefetching_object_detector(images, threshold=0.0), decimals=4),
+                nested_simplify(object_detector(images, threshold=0.0), decimals=4),
+            )
+
+        with self.assertRaises(ValueError):
+            ObjectDetectionPipeline(
+                model=model, feature_extractor=feature_extractor, prefetch_images=ImagePrefetcher(draft_size=800)
+            )
+
     @require_torch
     @slow
     def test_large_model_pt(self):
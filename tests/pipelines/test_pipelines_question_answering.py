@@ -14,6 +14,8 @@
 
 import unittest
 
+import numpy as np
+
 from transformers import (
     MODEL_FOR_QUESTION_ANSWERING_MAPPING,
     TF_MODEL_FOR_QUESTION_ANSWERING_MAPPING,
@@ -22,6 +24,7 @@ from transformers import (
 )
 from transformers.data.processors.squad import SquadExample
 from transformers.pipelines import QuestionAnsweringArgumentHandler, pipeline
+from transformers.pipelines.question_answering import merge_spans, select_spans_across_features, select_starts_ends
 from transformers.testing_utils import (
     is_pipeline_test,
     nested_simplify,
@@ -191,6 +194,69 @@ class QAPipelineTests(unittest.TestCase):
 
         self.assertEqual(nested_simplify(outputs), {"score": 0.028, "start": 0, "end": 11, "answer": "HuggingFace"})
 
+    def test_select_spans_across_features(self):
+        rng = np.random.RandomState(0)
+        start = rng.randn(3, 20).astype(np.float32)
+        end = rng.randn(3, 20).astype(np.float32)
+        # The question is on the first tokens, the CLS token is kept
+        p_mask = np.zeros((3, 20), dtype=np.int64)
+        p_mask[:, 1:5] = 1
+        attention_mask = np.ones((3, 20), dtype=np.int64)
+        attention_mask[2, 15:] = 0
+
+        starts, ends, scores, num_spans, null_scores = select_spans_across_features(
+            start, end, p_mask, attention_mask, max_answer_len=4
+        )
+        for i in range(3):
+            valid_starts, valid_ends = starts[i, : num_spans[i]], ends[i, : num_spans[i]]
+            self.assertTrue(np.all(valid_starts >= 5))
+            self.assertTrue(np.all(valid_starts <= valid_ends))
+            self.assertTrue(np.all(valid_ends - valid_starts < 4))
+            self.assertTrue(np.all(np.diff(scores[i, : num_spans[i]]) <= 0))
+
+            # Same spans and scores as the per feature decoding
+            expected_starts, expected_ends, expected_scores, null_score = select_starts_ends(
+                start[i : i + 1],
+                end[i : i + 1],
+                p_mask[i : i + 1],
+                attention_mask[i : i + 1],
+                top_k=5,
+                handle_impossible_answer=True,
+                max_answer_len=4,
+            )
+            self.assertEqual(starts[i, :5].tolist(), expected_starts.tolist())
+            self.assertEqual(ends[i, :5].tolist(), expected_ends.tolist())
+            self.assertTrue(np.allclose(scores[i, :5], expected_scores))
+            self.assertAlmostEqual(null_scores[i].item(), null_score)
+        self.assertEqual(num_spans.tolist(), [54, 54, 34])
+
+        # Only keeping the `top_k` best spans of each feature does not change them
+        top_starts, top_ends, top_scores, _, _ = select_spans_across_features(
+            start, end, p_mask, attention_mask, max_answer_len=4, top_k=5
+        )
+        self.assertEqual(top_starts.tolist(), starts[:, :5].tolist())
+        self.assertEqual(top_ends.tolist(), ends[:, :5].tolist())
+
+        merged = [scores[feature_index, span_index] for feature_index, span_index in merge_spans(scores, num_spans)]
+        self.assertEqual(len(merged), num_spans.sum())
+        self.assertEqual(merged, sorted(merged, reverse=True))
+
+    @require_torch
+    def test_small_model_pt_long_context_deduplicated(self):
+        question_answerer = pipeline(
+            "question-answering", model="sshleifer/tiny-distilbert-base-cased-distilled-squad"
+        )
+        outputs = question_answerer(
+            question="Where was HuggingFace founded ?",
+            context="HuggingFace was founded in Paris. " * 20,
+            max_seq_len=32,
+            doc_stride=24,
+            top_k=30,
+        )
+        self.assertEqual(len(outputs), 30)
+        self.assertEqual(len({(output["start"], output["end"]) for output in outputs}), 30)
+        self.assertEqual(outputs, sorted(outputs, key=lambda output: output["score"], reverse=True))
+
     @slow
     @require_torch
     def test_small_model_japanese(self):
@@ -720,6 +720,51 @@ class TokenClassificationPipelineTests(unittest.TestCase):
             ],
         )
 
+    @require_torch
+    def test_aggregate_arrays(self):
+        model_name = "sshleifer/tiny-dbmdz-bert-large-cased-finetuned-conll03-english"
+        tokenizer = AutoTokenizer.from_pretrained(model_name, use_fast=True)
+        token_classifier = pipeline(task="ner", model=model_name, tokenizer=tokenizer, framework="pt")
+
+        sentence = "Enzo works at the Ramazotti bakery in Paris, France"
+
+        tokens = tokenizer(
+            sentence,
+            return_attention_mask=False,
+            return_tensors="pt",
+            return_special_tokens_mask=True,
+            return_offsets_mapping=True,
+        )
+        offset_mapping = tokens.pop("offset_mapping").cpu().numpy()[0]
+        special_tokens_mask = tokens.pop("special_tokens_mask").cpu().numpy()[0]
+        input_ids = tokens["input_ids"].numpy()[0]
+        rng = np.random.RandomState(0)
+        logits = rng.randn(len(input_ids), len(token_classifier.model.config.id2label)).astype(np.float32) * 3
+        scores = np.exp(logits) / np.exp(logits).sum(-1, keepdims=True)
+
+        for aggregation_strategy in AggregationStrategy:
+            for ignore_labels in (["O"], []):
+                pre_entities = token_classifier.gather_pre_entities(
+                    sentence, input_ids, scores, offset_mapping, special_tokens_mask, aggregation_strategy
+                )
+                grouped_entities = token_classifier.aggregate(pre_entities, aggregation_strategy)
+                expected = [
+                    entity
+                    for entity in grouped_entities
+                    if entity.get("entity", None) not in ignore_labels
+                    and entity.get("entity_group", None) not in ignore_labels
+                ]
+                entities = token_classifier.aggregate_arrays(
+                    sentence,
+                    input_ids,
+                    scores,
+                    offset_mapping,
+                    special_tokens_mask,
+                    aggregation_strategy,
+                    ignore_labels,
+                )
+                self.assertEqual(entities, expected)
+
     @require_torch
     def test_word_heuristic_leading_space(self):
         model_name = "hf-internal-testing/tiny-random-deberta-v2"
@@ -18,6 +18,7 @@ import glob
 import json
 import os
 import os.path
+import subprocess
 import sys
 import tempfile
 import unittest
@@ -81,6 +82,7 @@ from test_module.custom_configuration import CustomConfig, NoSuperInitConfig  #
 
 if is_torch_available():
     import torch
+    from safetensors import safe_open
     from safetensors.torch import save_file as safe_save_file
     from test_module.custom_modeling import CustomModel, NoSuperInitModel
     from torch import nn
@@ -90,11 +92,14 @@ if is_torch_available():
         AutoModelForCausalLM,
         AutoTokenizer,
         BertConfig,
+        BertForMaskedLM,
+        BertForSequenceClassification,
         BertModel,
         CLIPTextModel,
         PreTrainedModel,
         T5Config,
         T5ForConditionalGeneration,
+        shared_memory_loading,
     )
     from transformers.modeling_attn_mask_utils import (
         AttentionMaskConverter,
@@ -102,7 +107,14 @@ if is_torch_available():
         _prepare_4d_attention_mask,
         _prepare_4d_causal_attention_mask,
     )
-    from transformers.modeling_utils import shard_checkpoint
+    from transformers.modeling_utils import (
+        _init_empty_weights,
+        get_delta_checkpoint_base,
+        load_sharded_checkpoint,
+        load_state_dicts,
+        shard_checkpoint,
+    )
+    from transformers.safetensors_conversion import _write_safetensors_file, convert_checkpoint_to_safetensors
 
     # Fake pretrained models for tests
     class BaseModel(PreTrainedModel):
@@ -627,6 +639,380 @@ class ModelUtilsTest(TestCasePlus):
         for p1, p2 in zip(model.parameters(), new_model.parameters()):
             self.assertTrue(torch.allclose(p1, p2))
 
+    def test_checkpoint_sharding_prefetch(self):
+        config = BertConfig(
+            vocab_size=99, hidden_size=32, num_hidden_layers=4, num_attention_heads=4, intermediate_size=37
+        )
+        model = BertModel(config)
+
+        for safe_serialization in [False, True]:
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                model.save_pretrained(tmp_dir, max_shard_size="50kB", safe_serialization=safe_serialization)
+                shard_files = sorted(os.path.join(tmp_dir, f) for f in os.listdir(tmp_dir) if "-of-" in f)
+                self.assertGreater(len(shard_files), 2)
+
+                # The state dicts are yielded in order, whatever the number of prefetched shards
+                serial_keys = [list(state_dict) for state_dict in load_state_dicts(shard_files)]
+                prefetched_keys = [list(state_dict) for state_dict in load_state_dicts(shard_files, prefetch_shards=2)]
+                self.assertListEqual(serial_keys, prefetched_keys)
+
+                # Stopping early does not wait for all the shards
+                state_dicts = load_state_dicts(shard_files, prefetch_shards=2)
+                next(state_dicts)
+                state_dicts.close()
+
+                for low_cpu_mem_usage in [False, True]:
+                    new_model = BertModel.from_pretrained(
+                        tmp_dir, low_cpu_mem_usage=low_cpu_mem_usage, prefetch_shards=2
+                    )
+                    self.assertTrue(check_models_equal(model, new_model))
+
+    @require_safetensors
+    def test_mmap_weights(self):
+        config = BertConfig(
+            vocab_size=99, hidden_size=32, num_hidden_layers=2, num_attention_heads=4, intermediate_size=37
+        )
+        model = BertModel(config)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            model.save_pretrained(tmp_dir)
+            file_size = os.path.getsize(os.path.join(tmp_dir, SAFE_WEIGHTS_NAME))
+
+            new_model = BertModel.from_pretrained(tmp_dir, mmap_weights=True)
+            self.assertTrue(check_models_equal(model, new_model))
+            # The weights are views of the whole file
+            for param in new_model.parameters():
+                self.assertEqual(param.untyped_storage().nbytes(), file_size)
+
+            # Modifying the weights does not modify the file
+            with torch.no_grad():
+                new_model.embeddings.word_embeddings.weight.add_(1.0)
+            self.assertTrue(check_models_equal(model, BertModel.from_pretrained(tmp_dir, mmap_weights=True)))
+
+            # The weights converted to another dtype are copied
+            new_model = BertModel.from_pretrained(tmp_dir, mmap_weights=True, torch_dtype=torch.float16)
+            for param in new_model.parameters():
+                self.assertEqual(param.untyped_storage().nbytes(), param.nbytes)
+
+            with self.assertRaises(ValueError):
+                BertModel.from_pretrained(tmp_dir, mmap_weights=True, device_map="cpu")
+
+    @require_safetensors
+    def test_from_pretrained_on_meta_device(self):
+        config = BertConfig(
+            vocab_size=99, hidden_size=32, num_hidden_layers=2, num_attention_heads=4, intermediate_size=37
+        )
+        model = BertForMaskedLM(config).eval()
+        input_ids = torch.tensor([[1, 2, 3, 4, 5]])
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            model.save_pretrained(tmp_dir)
+
+            with mock.patch(
+                "transformers.modeling_utils._init_empty_weights", wraps=_init_empty_weights
+            ) as mock_init_empty_weights:
+                new_model = BertForMaskedLM.from_pretrained(tmp_dir, low_cpu_mem_usage=True)
+                mock_init_empty_weights.assert_called_once()
+                # The weights shared in `__init__` are still shared once loaded
+                self.assertIs(new_model.cls.predictions.decoder.bias, new_model.cls.predictions.bias)
+                with torch.no_grad():
+                    self.assertTrue(torch.equal(model(input_ids)[0], new_model(input_ids)[0]))
+
+                # Only the missing weights are created, and initialized like in `_init_weights`
+                new_model, loading_info = BertForSequenceClassification.from_pretrained(
+                    tmp_dir, output_loading_info=True, low_cpu_mem_usage=True
+                )
+                self.assertEqual(mock_init_empty_weights.call_count, 2)
+            self.assertEqual(
+                sorted(loading_info["missing_keys"]),
+                ["bert.pooler.dense.bias", "bert.pooler.dense.weight", "classifier.bias", "classifier.weight"],
+            )
+            self.assertTrue(all(not param.is_meta for param in new_model.parameters()))
+            self.assertTrue(torch.equal(new_model.classifier.bias, torch.zeros(2)))
+            self.assertLess(new_model.classifier.weight.std().item(), 5 * config.initializer_range)
+            self.assertTrue(
+                torch.equal(
+                    new_model.bert.embeddings.word_embeddings.weight, model.bert.embeddings.word_embeddings.weight
+                )
+            )
+
+            # By default, the model is built on the meta device when the checkpoint contains all its weights
+            with mock.patch(
+                "transformers.modeling_utils._init_empty_weights", wraps=_init_empty_weights
+            ) as mock_init_empty_weights:
+                new_model = BertForMaskedLM.from_pretrained(tmp_dir)
+                mock_init_empty_weights.assert_called_once()
+            self.assertTrue(check_models_equal(model, new_model))
+
+            # and built again with all its weights otherwise
+            new_model = BertForSequenceClassification.from_pretrained(tmp_dir)
+            self.assertTrue(all(not param.is_meta for param in new_model.parameters()))
+            self.assertTrue(torch.equal(new_model.classifier.bias, torch.zeros(2)))
+            self.assertTrue(
+                torch.equal(
+                    new_model.bert.embeddings.word_embeddings.weight, model.bert.embeddings.word_embeddings.weight
+                )
+            )
+
+    def test_from_pretrained_on_meta_device_unsupported_init(self):
+        class ModelWithDataInInit(PreTrainedModel):
+            config_class = PretrainedConfig
+
+            def __init__(self, config):
+                super().__init__(config)
+                self.linear = nn.Linear(4, 4)
+                # Setting `.data` fails on the meta device
+                self.linear.bias.data = torch.ones(4)
+
+        model = ModelWithDataInInit(PretrainedConfig())
+        with torch.no_grad():
+            model.linear.weight.normal_()
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            model.save_pretrained(tmp_dir)
+
+            # The model is built on the CPU when its `__init__` does not support the meta device
+            new_model = ModelWithDataInInit.from_pretrained(tmp_dir)
+            self.assertTrue(check_models_equal(model, new_model))
+
+            with self.assertRaises(Exception):
+                ModelWithDataInInit.from_pretrained(tmp_dir, low_cpu_mem_usage=True)
+
+    def test_from_pretrained_on_meta_device_tied_weights_missing(self):
+        config = BertConfig(
+            vocab_size=99, hidden_size=32, num_hidden_layers=2, num_attention_heads=4, intermediate_size=37
+        )
+        model = BertModel(config)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            model.save_pretrained(tmp_dir)
+
+            # The bias of the decoder and the one of the head are shared and both missing from the base model, they
+            # are materialized once and initialized with `_init_weights`
+            for low_cpu_mem_usage in (True, False):
+                new_model = BertForMaskedLM.from_pretrained(tmp_dir, low_cpu_mem_usage=low_cpu_mem_usage)
+                predictions = new_model.cls.predictions
+                self.assertIs(predictions.decoder.bias, predictions.bias)
+                self.assertTrue(torch.equal(predictions.bias, torch.zeros(config.vocab_size)))
+                self.assertIs(predictions.decoder.weight, new_model.bert.embeddings.word_embeddings.weight)
+
+    def test_shared_memory_loading(self):
+        config = BertConfig(
+            vocab_size=99, hidden_size=32, num_hidden_layers=2, num_attention_heads=4, intermediate_size=37
+        )
+        model = BertForMaskedLM(config).eval()
+        input_ids = torch.tensor([[1, 2, 3, 4, 5]])
+
+        with tempfile.TemporaryDirectory() as tmp_dir, tempfile.TemporaryDirectory() as shared_dir:
+            model.save_pretrained(tmp_dir, safe_serialization=False, max_shard_size="50kB")
+
+            with mock.patch("transformers.shared_memory_loading.SHARED_MEMORY_DIR", shared_dir):
+                try:
+                    new_model = BertForMaskedLM.from_pretrained(
+                        tmp_dir, shared_memory_loading=True, torch_dtype=torch.float16
+                    )
+                    self.assertEqual(len(shared_memory_loading._coordinators), 1)
+                    shared_files = sorted(os.listdir(shared_dir))
+                    self.assertEqual(len(shared_files), len(glob.glob(os.path.join(tmp_dir, "*.bin"))))
+                    self.assertEqual(new_model.dtype, torch.float16)
+                    self.assertIs(new_model.cls.predictions.decoder.bias, new_model.cls.predictions.bias)
+                    self.assertTrue(
+                        torch.equal(
+                            new_model.bert.embeddings.word_embeddings.weight,
+                            model.bert.embeddings.word_embeddings.weight.half(),
+                        )
+                    )
+
+                    # Another process maps the files written by this one instead of loading the checkpoint again
+                    script = (
+                        "import sys, torch\n"
+                        "from transformers import BertForMaskedLM, shared_memory_loading\n"
+                        "model = BertForMaskedLM.from_pretrained(sys.argv[1], shared_memory_loading=True, "
+                        "torch_dtype=torch.float16)\n"
+                        "assert not shared_memory_loading._coordinators\n"
+                        "with open('/proc/self/maps') as f:\n"
+                        "    assert sys.argv[2] in f.read()\n"
+                    )
+                    env = os.environ.copy()
+                    env["TRANSFORMERS_SHARED_MEMORY_DIR"] = shared_dir
+                    env["PYTHONPATH"] = os.pathsep.join(sys.path)
+                    result = subprocess.run(
+                        [sys.executable, "-c", script, tmp_dir, shared_dir], env=env, capture_output=True, text=True
+                    )
+                    self.assertEqual(result.returncode, 0, result.stderr)
+                    self.assertEqual(sorted(os.listdir(shared_dir)), shared_files)
+
+                    # Loading again in this process reuses the shared files
+                    new_model = BertForMaskedLM.from_pretrained(
+                        tmp_dir, shared_memory_loading=True, torch_dtype=torch.float16
+                    )
+                    self.assertEqual(len(shared_memory_loading._coordinators), 1)
+                finally:
+                    shared_memory_loading._close_coordinators()
+                self.assertEqual(os.listdir(shared_dir), [])
+
+            # No file is left in shared memory when one of them can't be written
+            written_files = []
+
+            def write_until_full(state_dict, filename, metadata=None):
+                _write_safetensors_file(state_dict, filename, metadata=metadata)
+                written_files.append(filename)
+                if len(written_files) == 2:
+                    raise OSError("No space left on device")
+
+            with mock.patch("transformers.shared_memory_loading.SHARED_MEMORY_DIR", shared_dir), mock.patch(
+                "transformers.safetensors_conversion._write_safetensors_file", side_effect=write_until_full
+            ):
+                try:
+                    new_model = BertForMaskedLM.from_pretrained(tmp_dir, shared_memory_loading=True)
+                    self.assertEqual(len(written_files), 2)
+                    self.assertEqual(os.listdir(shared_dir), [])
+                finally:
+                    shared_memory_loading._close_coordinators()
+            with torch.no_grad():
+                self.assertTrue(torch.equal(model(input_ids)[0], new_model(input_ids)[0]))
+
+            # The checkpoint is loaded as usual when it can't be shared
+            with mock.patch("transformers.shared_memory_loading.SHARED_MEMORY_DIR", os.path.join(shared_dir, "none")):
+                new_model = BertForMaskedLM.from_pretrained(tmp_dir, shared_memory_loading=True)
+                self.assertEqual(shared_memory_loading._coordinators, {})
+            with torch.no_grad():
+                self.assertTrue(torch.equal(model(input_ids)[0], new_model(input_ids)[0]))
+
+            with self.assertRaises(ValueError):
+                BertForMaskedLM.from_pretrained(tmp_dir, shared_memory_loading=True, lazy_loading=True)
+
+    def test_lazy_loading(self):
+        config = BertConfig(
+            vocab_size=99, hidden_size=32, num_hidden_layers=3, num_attention_heads=4, intermediate_size=37
+        )
+        model = BertModel(config).eval()
+        input_ids = torch.tensor([[1, 2, 3, 4, 5]])
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            model.save_pretrained(tmp_dir, max_shard_size="50kB")
+            self.assertTrue(os.path.isfile(os.path.join(tmp_dir, SAFE_WEIGHTS_INDEX_NAME)))
+
+            new_model = BertModel.from_pretrained(tmp_dir, lazy_loading=True)
+            # Only the weights outside of the layers are loaded
+            self.assertTrue(all(not param.is_meta for param in new_model.embeddings.parameters()))
+            self.assertTrue(all(param.is_meta for param in new_model.encoder.layer.parameters()))
+
+            with torch.no_grad():
+                self.assertTrue(torch.equal(model(input_ids)[0], new_model(input_ids)[0]))
+            self.assertTrue(check_models_equal(model, new_model))
+
+            model.save_pretrained(tmp_dir, safe_serialization=False)
+            with self.assertRaises(ValueError):
+                BertModel.from_pretrained(tmp_dir, lazy_loading=True, use_safetensors=False)
+
+    def test_async_save(self):
+        config = BertConfig(
+            vocab_size=99, hidden_size=32, num_hidden_layers=2, num_attention_heads=4, intermediate_size=37
+        )
+        model = BertModel(config)
+        reference = BertModel(config)
+
+        for safe_serialization in [True, False]:
+            reference.load_state_dict(model.state_dict())
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                future = model.save_pretrained(
+                    tmp_dir, max_shard_size="50kB", safe_serialization=safe_serialization, async_save=True
+                )
+                # Updating the model while it is written does not change the checkpoint
+                with torch.no_grad():
+                    model.embeddings.word_embeddings.weight.add_(1.0)
+                future.result()
+
+                index_name = SAFE_WEIGHTS_INDEX_NAME if safe_serialization else WEIGHTS_INDEX_NAME
+                self.assertTrue(os.path.isfile(os.path.join(tmp_dir, index_name)))
+                self.assertTrue(check_models_equal(reference, BertModel.from_pretrained(tmp_dir)))
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            self.assertIsNone(model.save_pretrained(tmp_dir))
+
+    @require_safetensors
+    def test_delta_checkpoint(self):
+        config = BertConfig(
+            vocab_size=99, hidden_size=32, num_hidden_layers=2, num_attention_heads=4, intermediate_size=37
+        )
+        model = BertModel(config)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            base_dir = os.path.join(tmp_dir, "base")
+            model.save_pretrained(base_dir, max_shard_size="50kB")
+
+            # Only the weights that changed are saved, the index maps the other ones to the files of the base
+            with torch.no_grad():
+                model.pooler.dense.weight.add_(1.0)
+            delta_dir = os.path.join(tmp_dir, "delta")
+            model.save_pretrained(delta_dir, base_checkpoint=base_dir)
+            self.assertEqual(get_delta_checkpoint_base(delta_dir), os.path.abspath(base_dir))
+            self.assertIsNone(get_delta_checkpoint_base(base_dir))
+            with safe_open(os.path.join(delta_dir, "model-00001-of-00001.safetensors"), framework="pt") as f:
+                self.assertEqual(list(f.keys()), ["pooler.dense.weight"])
+            self.assertTrue(check_models_equal(model, BertModel.from_pretrained(delta_dir)))
+            new_model = BertModel.from_pretrained(delta_dir, lazy_loading=True)
+            new_model(torch.tensor([[1, 2, 3]]))
+            self.assertTrue(check_models_equal(model, new_model))
+
+            # A delta checkpoint can be the base of another one
+            with torch.no_grad():
+                model.embeddings.word_embeddings.weight.add_(1.0)
+            delta_dir_2 = os.path.join(tmp_dir, "delta_2")
+            model.save_pretrained(delta_dir_2, base_checkpoint=delta_dir)
+            with open(os.path.join(delta_dir_2, SAFE_WEIGHTS_INDEX_NAME)) as f:
+                weight_map = json.load(f)["weight_map"]
+            self.assertEqual(
+                weight_map["pooler.dense.weight"], os.path.join("..", "delta", "model-00001-of-00001.safetensors")
+            )
+            self.assertEqual(weight_map["embeddings.word_embeddings.weight"], "model-00001-of-00001.safetensors")
+
+            new_model = BertModel(config)
+            load_sharded_checkpoint(new_model, delta_dir_2)
+            self.assertTrue(check_models_equal(model, new_model))
+            self.assertTrue(check_models_equal(model, BertModel.from_pretrained(delta_dir_2)))
+
+    @require_safetensors
+    def test_convert_checkpoint_to_safetensors(self):
+        config = BertConfig(
+            vocab_size=99, hidden_size=32, num_hidden_layers=2, num_attention_heads=4, intermediate_size=37
+        )
+        model = BertForMaskedLM(config)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            model.save_pretrained(tmp_dir, safe_serialization=False, max_shard_size="50kB")
+            index_file = convert_checkpoint_to_safetensors(tmp_dir)
+            self.assertEqual(index_file, os.path.join(tmp_dir, SAFE_WEIGHTS_INDEX_NAME))
+
+            with open(index_file) as f:
+                weight_map = json.load(f)["weight_map"]
+            with open(os.path.join(tmp_dir, WEIGHTS_INDEX_NAME)) as f:
+                bin_weight_map = json.load(f)["weight_map"]
+            # The shards are converted one by one and the tied weights are only saved once
+            self.assertEqual(
+                {
+                    file.replace(".bin", ".safetensors").replace("pytorch_model", "model")
+                    for file in bin_weight_map.values()
+                },
+                set(weight_map.values()),
+            )
+            self.assertEqual(
+                set(bin_weight_map) - set(weight_map),
+                {"cls.predictions.decoder.weight", "cls.predictions.decoder.bias"},
+            )
+
+            new_model = BertForMaskedLM.from_pretrained(tmp_dir, use_safetensors=True)
+            self.assertTrue(check_models_equal(model, new_model))
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            model.save_pretrained(tmp_dir, safe_serialization=False)
+            output_dir = os.path.join(tmp_dir, "converted")
+            output_file = convert_checkpoint_to_safetensors(tmp_dir, output_dir=output_dir, discard_tied_weights=[])
+            self.assertEqual(output_file, os.path.join(output_dir, SAFE_WEIGHTS_NAME))
+            with safe_open(output_file, framework="pt") as f:
+                self.assertIn("cls.predictions.decoder.weight", f.keys())
+
     def test_checkpoint_variant_hub(self):
         with tempfile.TemporaryDirectory() as tmp_dir:
             with self.assertRaises(EnvironmentError):
@@ -1033,6 +1419,56 @@ class ModelUtilsTest(TestCasePlus):
             # Should only complain about the missing bias
             self.assertListEqual(load_info["missing_keys"], ["decoder.bias"])
 
+    def test_resize_token_embeddings_in_place(self):
+        config = BertConfig(
+            vocab_size=99, hidden_size=32, num_hidden_layers=2, num_attention_heads=4, intermediate_size=37
+        )
+        model = BertForMaskedLM(config)
+        embeddings = model.get_input_embeddings()
+        embeddings_weight = embeddings.weight
+        old_weight = embeddings_weight.detach().clone()
+
+        with mock.patch(
+            "transformers.modeling_utils._RESIZE_INIT_BLOCK_NUMEL", 5 * config.hidden_size
+        ), mock.patch.object(model, "_init_weights", wraps=model._init_weights) as mock_init_weights:
+            self.assertIs(model.resize_token_embeddings(120), embeddings)
+        # Only the added tokens are initialized, by blocks of 5 tokens
+        self.assertEqual([call.args[0].weight.shape[0] for call in mock_init_weights.call_args_list], [5, 5, 5, 5, 1])
+        self.assertIs(model.get_input_embeddings().weight, embeddings_weight)
+        self.assertEqual(embeddings.num_embeddings, 120)
+        self.assertTrue(torch.equal(embeddings_weight[:99], old_weight))
+        self.assertLess(embeddings_weight[99:].std().item(), 5 * config.initializer_range)
+        # The decoder is still tied to the embeddings, and its bias is resized with them
+        self.assertIs(model.get_output_embeddings().weight, embeddings_weight)
+        self.assertEqual(model.cls.predictions.bias.shape, (120,))
+        self.assertIs(model.cls.predictions.decoder.bias, model.cls.predictions.bias)
+
+        model.resize_token_embeddings(50)
+        self.assertIs(model.get_input_embeddings().weight, embeddings_weight)
+        self.assertTrue(torch.equal(embeddings_weight, old_weight[:50]))
+        self.assertEqual(model.get_output_embeddings().out_features, 50)
+
+        # Without tied embeddings, the decoder is resized in place as well
+        config = BertConfig(
+            vocab_size=99,
+            hidden_size=32,
+            num_hidden_layers=2,
+            num_attention_heads=4,
+            intermediate_size=37,
+            tie_word_embeddings=False,
+        )
+        model = BertForMaskedLM(config)
+        decoder = model.get_output_embeddings()
+        old_decoder_weight = decoder.weight.detach().clone()
+        model.resize_token_embeddings(120)
+        self.assertIs(model.get_output_embeddings(), decoder)
+        self.assertIsNot(decoder.weight, model.get_input_embeddings().weight)
+        self.assertEqual(decoder.weight.shape, (120, config.hidden_size))
+        self.assertEqual(decoder.out_features, 120)
+        self.assertTrue(torch.equal(decoder.weight[:99], old_decoder_weight))
+        self.assertTrue(torch.equal(decoder.bias[99:], torch.zeros(21)))
+        self.assertIs(model.cls.predictions.decoder.bias, model.cls.predictions.bias)
+
     def test_unexpected_keys_warnings(self):
         model = ModelWithHead(PretrainedConfig())
         logger = logging.get_logger("transformers.modeling_utils")
@@ -33,7 +33,7 @@ from transformers import (
     is_tokenizers_available,
 )
 from transformers.testing_utils import TOKEN, USER, is_staging_test, require_tokenizers
-from transformers.tokenization_utils import Trie
+from transformers.tokenization_utils import BytePairEncoder, Trie
 
 
 sys.path.append(str(Path(__file__).parent.parent / "utils"))
@@ -272,9 +272,50 @@ class TrieTest(unittest.TestCase):
         trie.add("CD")
         self.assertEqual(trie.split("ABCD"), ["ABC", "D"])
 
+    def test_trie_partial_match(self):
+        trie = Trie()
+        trie.add("abd")
+        trie.add("b")
+        # "ab" is a partial match of "abd" which fails on "X", it must not be extended past it
+        self.assertEqual(trie.split("abXd"), ["a", "b", "Xd"])
+
+    def test_trie_add_after_split(self):
+        trie = Trie()
+        trie.add("[CLS]")
+        self.assertEqual(trie.split("[CLS] extra_id_1"), ["[CLS]", " extra_id_1"])
+        trie.add("extra_id_1")
+        self.assertEqual(trie.split("[CLS] extra_id_1"), ["[CLS]", " ", "extra_id_1"])
+
     def test_cut_text_hardening(self):
         # Even if the offsets are wrong, we necessarily output correct string
         # parts.
         trie = Trie()
         parts = trie.cut_text("ABC", [0, 0, 2, 1, 2, 3])
         self.assertEqual(parts, ["AB", "C"])
+
+
+class BytePairEncoderTest(unittest.TestCase):
+    def test_merge(self):
+        encoder = BytePairEncoder({("l", "o"): 0, ("lo", "w"): 1, ("e", "r"): 2, ("a", "a"): 3})
+        self.assertEqual(encoder("lower"), "low er")
+        self.assertEqual(encoder("x"), "x")
+        # All the occurrences of a pair are merged from left to right before the next pair
+        self.assertEqual(encoder("aaaaa"), "aa aa a")
+
+    def test_end_of_word_suffix(self):
+        encoder = BytePairEncoder(
+            {("l", "o"): 0, ("lo", "w</w>"): 1}, end_of_word_suffix="</w>", never_split=["<|endoftext|>"]
+        )
+        self.assertEqual(encoder("low"), "low</w>")
+        self.assertEqual(encoder("w"), "w</w>")
+        self.assertEqual(encoder("<|endoftext|>"), "<|endoftext|>")
+
+    def test_cache(self):
+        encoder = BytePairEncoder({("a", "b"): 0}, max_cache_size=2)
+        for word in ["ab", "ba", "ab", "abc", "ba"]:
+            encoder(word)
+        # "ba" is the least recently used word when "abc" is added
+        self.assertEqual(list(encoder.cache), ["abc", "ba"])
+        self.assertEqual(encoder.cache_info(), {"hits": 1, "misses": 4, "max_size": 2, "size": 2, "hit_rate": 0.2})
+        encoder.clear_cache()
+        self.assertEqual(encoder.cache_info()["size"], 0)
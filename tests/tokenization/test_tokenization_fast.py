@@ -19,9 +19,10 @@ import os
 import shutil
 import tempfile
 import unittest
+import unittest.mock as mock
 
-from transformers import AutoTokenizer, PreTrainedTokenizerFast
-from transformers.testing_utils import require_tokenizers
+from transformers import AutoTokenizer, GPT2TokenizerFast, PreTrainedTokenizerFast, T5Tokenizer, T5TokenizerFast
+from transformers.testing_utils import get_tests_dir, require_sentencepiece, require_tokenizers
 
 from ..test_tokenization_common import TokenizerTesterMixin
 
@@ -225,6 +226,66 @@ class TokenizerVersioningTest(unittest.TestCase):
         self.assertNotIn("huggingface", json_tokenizer["model"]["vocab"])
 
 
+@require_sentencepiece
+@require_tokenizers
+class SlowTokenizerConversionCacheTest(unittest.TestCase):
+    def test_conversion_cache(self):
+        from transformers import convert_slow_tokenizer
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            T5Tokenizer(get_tests_dir("fixtures/test_sentencepiece.model")).save_pretrained(tmp_dir)
+            cache_dir = os.path.join(tmp_dir, "cache")
+            convert = mock.Mock(wraps=convert_slow_tokenizer.convert_slow_tokenizer)
+            with mock.patch.object(convert_slow_tokenizer, "CONVERTED_TOKENIZERS_CACHE", cache_dir), mock.patch.object(
+                convert_slow_tokenizer, "convert_slow_tokenizer", convert
+            ):
+                tokenizer = T5TokenizerFast.from_pretrained(tmp_dir)
+                self.assertEqual(convert.call_count, 1)
+                self.assertEqual(len(os.listdir(cache_dir)), 1)
+                cache_key = os.listdir(cache_dir)[0]
+                self.assertTrue(os.path.isfile(os.path.join(cache_dir, cache_key, "tokenizer.json")))
+
+                cached_tokenizer = T5TokenizerFast.from_pretrained(tmp_dir)
+                self.assertEqual(convert.call_count, 1)
+                self.assertEqual(tokenizer.backend_tokenizer.to_str(), cached_tokenizer.backend_tokenizer.to_str())
+                text = "This is a test <extra_id_0>"
+                self.assertEqual(tokenizer(text)["input_ids"], cached_tokenizer(text)["input_ids"])
+
+                # Different init kwargs or vocabulary files lead to a different conversion
+                T5TokenizerFast.from_pretrained(tmp_dir, extra_ids=10, additional_special_tokens=None)
+                self.assertEqual(convert.call_count, 2)
+                self.assertEqual(len(os.listdir(cache_dir)), 2)
+
+                with mock.patch.dict(os.environ, {"TRANSFORMERS_NO_TOKENIZER_CONVERSION_CACHE": "1"}):
+                    T5TokenizerFast.from_pretrained(tmp_dir)
+                self.assertEqual(convert.call_count, 3)
+
+    def test_conversion_cache_positional_vocab_files(self):
+        from transformers import convert_slow_tokenizer
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            vocab = {"l": 0, "o": 1, "w": 2, "lo": 3, "low": 4, "<|endoftext|>": 5}
+            vocab_file = os.path.join(tmp_dir, "vocab.json")
+            merges_file = os.path.join(tmp_dir, "merges.txt")
+            with open(vocab_file, "w") as f:
+                json.dump(vocab, f)
+            with open(merges_file, "w") as f:
+                f.write("#version: 0.2\nl o\nlo w\n")
+
+            cache_dir = os.path.join(tmp_dir, "cache")
+            with mock.patch.object(convert_slow_tokenizer, "CONVERTED_TOKENIZERS_CACHE", cache_dir):
+                tokenizer = GPT2TokenizerFast(vocab_file, merges_file)
+                self.assertEqual(len(os.listdir(cache_dir)), 1)
+                self.assertEqual(tokenizer.tokenize("low"), ["low"])
+
+                # The cache is keyed by the contents of the files
+                with open(merges_file, "w") as f:
+                    f.write("#version: 0.2\nl o\n")
+                tokenizer = GPT2TokenizerFast(vocab_file, merges_file)
+                self.assertEqual(len(os.listdir(cache_dir)), 2)
+                self.assertEqual(tokenizer.tokenize("low"), ["lo", "w"])
+
+
 @require_tokenizers
 class ReduceMutableBorrowTests(unittest.TestCase):
     def test_async_share_tokenizer(self):
@@ -19,11 +19,13 @@ import os
 import pickle
 import tempfile
 import unittest
-from typing import Callable, Optional
+import unittest.mock as mock
+from typing import Callable, List, Optional
 
 import numpy as np
 
 from transformers import (
+    AddedToken,
     BatchEncoding,
     BertTokenizer,
     BertTokenizerFast,
@@ -78,6 +80,15 @@ class TokenizerUtilsTest(unittest.TestCase):
             else:
                 self.assertEqual(restored_v, original_v)
 
+    def get_bert_tokenizer(self, vocab_tokens: Optional[List[str]] = None, **kwargs) -> BertTokenizer:
+        if vocab_tokens is None:
+            vocab_tokens = ["[UNK]", "[CLS]", "[SEP]", "[PAD]", "[MASK]", "un", "##want", "##ed", "runn", "##ing", ","]
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            vocab_file = os.path.join(tmpdirname, "vocab.txt")
+            with open(vocab_file, "w", encoding="utf-8") as vocab_writer:
+                vocab_writer.write("".join([x + "\n" for x in vocab_tokens]))
+            return BertTokenizer(vocab_file, **kwargs)
+
     @slow
     def test_pretrained_tokenizers(self):
         self.check_tokenizer_from_pretrained(GPT2Tokenizer)
@@ -283,3 +294,188 @@ class TokenizerUtilsTest(unittest.TestCase):
         with tempfile.TemporaryDirectory() as tmpdirname:
             bert_tokenizer.save(os.path.join(tmpdirname, "tokenizer.json"))
             PreTrainedTokenizerFast(tokenizer_file=os.path.join(tmpdirname, "tokenizer.json"))
+
+    def test_tokenize_lower_case_added_tokens(self):
+        vocab_tokens = ["[UNK]", "[CLS]", "[SEP]", "[PAD]", "[MASK]", "hello", "world"]
+        tokenizer = self.get_bert_tokenizer(vocab_tokens, do_lower_case=True)
+
+        self.assertEqual(
+            tokenizer.tokenize("[CLS] HELLO <Name> World"), ["[CLS]", "hello", "[UNK]", "[UNK]", "[UNK]", "world"]
+        )
+        # The cached pattern of tokens which are not lowercased is updated with the added tokens
+        tokenizer.add_tokens(["<Name>"], special_tokens=True)
+        self.assertEqual(tokenizer.tokenize("[CLS] HELLO <Name> World"), ["[CLS]", "hello", "<Name>", "world"])
+
+    def test_parallel_encoding(self):
+        tokenizer = self.get_bert_tokenizer()
+
+        texts = ["unwanted running", "unwanted, running, running", "running"] * 4
+        pairs = ["running"] * len(texts)
+        expected_small = tokenizer(texts[:2])
+        expected = tokenizer(texts, pairs, padding=True, return_overflowing_tokens=True, max_length=6, stride=1)
+        expected_added = tokenizer(texts, padding=True)
+        tokenizer.truncation_side = "left"
+        expected_left = tokenizer(texts, truncation=True, max_length=3)
+        tokenizer.truncation_side = "right"
+
+        tokenizer.enable_parallel_encoding(num_workers=2, min_batch_size=4)
+        try:
+            # Batches smaller than `min_batch_size` are encoded serially
+            with mock.patch("transformers.tokenization_utils.pickle.dumps", wraps=pickle.dumps) as mock_dumps:
+                self.assertEqual(tokenizer(texts[:2]).data, expected_small.data)
+                mock_dumps.assert_not_called()
+            encoding = tokenizer(texts, pairs, padding=True, return_overflowing_tokens=True, max_length=6, stride=1)
+            self.assertEqual(encoding.data, expected.data)
+
+            # The tokenizer is not pickled again as long as it is not modified
+            with mock.patch("transformers.tokenization_utils.pickle.dumps", wraps=pickle.dumps) as mock_dumps:
+                tokenizer(texts, pairs, padding=True, return_overflowing_tokens=True, max_length=6, stride=1)
+                mock_dumps.assert_not_called()
+                tokenizer.truncation_side = "left"
+                self.assertEqual(tokenizer(texts, truncation=True, max_length=3).data, expected_left.data)
+                self.assertEqual(mock_dumps.call_count, 1)
+                tokenizer.truncation_side = "right"
+
+            # The workers are restarted with the updated tokenizer
+            tokenizer.add_tokens(["unwanted"])
+            encoding = tokenizer(texts, padding=True)
+            self.assertNotEqual(encoding.data, expected_added.data)
+            self.assertEqual(encoding["input_ids"][0][:5], [1, tokenizer.vocab_size, 8, 9, 2])
+
+            # The tokenizer can still be pickled
+            self.assertEqual(pickle.loads(pickle.dumps(tokenizer))(texts).data, tokenizer(texts).data)
+        finally:
+            tokenizer.disable_parallel_encoding()
+
+    def test_decode_tables(self):
+        tokenizer = self.get_bert_tokenizer()
+
+        ids = [1, 5, 6, 7, 10, 8, 9, 2, 3]
+        self.assertEqual(tokenizer.decode(ids), "[CLS] unwanted, running [SEP] [PAD]")
+        self.assertEqual(tokenizer.decode(np.array(ids), skip_special_tokens=True), "unwanted, running")
+        self.assertEqual(tokenizer.convert_ids_to_tokens(ids[:3], skip_special_tokens=True), ["un", "##want"])
+
+        # The tables are rebuilt when tokens are added or the special tokens change
+        tokenizer.add_tokens(["wanted"])
+        self.assertEqual(tokenizer.decode([5, tokenizer.vocab_size, 10]), "un wanted,")
+        tokenizer.add_special_tokens({"additional_special_tokens": ["runn"]})
+        self.assertEqual(tokenizer.decode([5, 8, 9], skip_special_tokens=True), "uning")
+
+        # Ids that are not in the vocabulary go through the regular conversion
+        self.assertEqual(tokenizer.convert_ids_to_tokens([5, 100, -1]), ["un", "[UNK]", "[UNK]"])
+
+        # The tables are also rebuilt when the vocabulary is modified in place
+        self.assertEqual(tokenizer.decode([5, 10]), "un,")
+        del tokenizer.ids_to_tokens[10]
+        self.assertEqual(tokenizer.convert_ids_to_tokens([5, 10]), ["un", "[UNK]"])
+        tokenizer.ids_to_tokens[10] = "!"
+        self.assertEqual(tokenizer.decode([5, 10]), "un!")
+
+    def test_parallel_batch_decode(self):
+        tokenizer = self.get_bert_tokenizer()
+
+        sequences = [[1, 5, 6, 7, 2], [1, 8, 9, 10, 8, 9, 2, 3]] * 4
+        expected = tokenizer.batch_decode(sequences, skip_special_tokens=True)
+        tokenizer.enable_parallel_encoding(num_workers=2, min_batch_size=4)
+        try:
+            self.assertEqual(tokenizer.batch_decode(sequences, skip_special_tokens=True), expected)
+            self.assertEqual(
+                tokenizer.batch_decode(np.array(sequences[:2] * 2, dtype=object))[0], "[CLS] unwanted [SEP]"
+            )
+        finally:
+            tokenizer.disable_parallel_encoding()
+
+    def test_padding_to_arrays(self):
+        tokenizer = self.get_bert_tokenizer()
+
+        features = [
+            {"input_ids": [1, 5, 2], "token_type_ids": [0, 0, 1], "label": 0},
+            {"input_ids": [1, 2], "token_type_ids": [0, 1], "label": 1},
+            {"input_ids": [1, 6, 7, 8, 2], "token_type_ids": [0, 0, 0, 1, 1], "label": 1},
+        ]
+        batch = tokenizer.pad(features, pad_to_multiple_of=3, return_tensors="np")
+        self.assertEqual(batch["input_ids"].dtype, np.int64)
+        self.assertEqual(batch["input_ids"].tolist(), [[1, 5, 2, 3, 3, 3], [1, 2, 3, 3, 3, 3], [1, 6, 7, 8, 2, 3]])
+        self.assertEqual(
+            batch["token_type_ids"].tolist(), [[0, 0, 1, 0, 0, 0], [0, 1, 0, 0, 0, 0], [0, 0, 0, 1, 1, 0]]
+        )
+        self.assertEqual(
+            batch["attention_mask"].tolist(), [[1, 1, 1, 0, 0, 0], [1, 1, 0, 0, 0, 0], [1, 1, 1, 1, 1, 0]]
+        )
+        self.assertEqual(batch["label"].tolist(), [0, 1, 1])
+
+        tokenizer.padding_side = "left"
+        batch = tokenizer.pad(features, padding="max_length", max_length=5, return_tensors="np")
+        self.assertEqual(batch["input_ids"].tolist(), [[3, 3, 1, 5, 2], [3, 3, 3, 1, 2], [1, 6, 7, 8, 2]])
+        self.assertEqual(batch["attention_mask"].tolist(), [[0, 0, 1, 1, 1], [0, 0, 0, 1, 1], [1, 1, 1, 1, 1]])
+
+        # Non-integer values are padded input by input and keep their type
+        features = [{"input_ids": [1, 5], "attention_mask": [1.0, 0.5]}, {"input_ids": [1], "attention_mask": [1.0]}]
+        batch = tokenizer.pad(features, return_tensors="np")
+        self.assertEqual(batch["attention_mask"].dtype, np.float64)
+        self.assertEqual(batch["attention_mask"].tolist(), [[1.0, 0.5], [0.0, 1.0]])
+
+    @require_torch
+    def test_padding_to_arrays_pt(self):
+        import torch
+
+        tokenizer = self.get_bert_tokenizer(padding_side="left")
+
+        features = [
+            {"input_ids": torch.tensor([1, 5, 2]), "attention_mask": torch.tensor([1, 1, 0])},
+            {"input_ids": torch.tensor([1, 2]), "attention_mask": torch.tensor([1, 1])},
+        ]
+        batch = tokenizer.pad(features, pad_to_multiple_of=4)
+        self.assertTrue(isinstance(batch["input_ids"], torch.Tensor))
+        self.assertEqual(batch["input_ids"].dtype, torch.int64)
+        self.assertEqual(batch["input_ids"].tolist(), [[3, 1, 5, 2], [3, 3, 1, 2]])
+        self.assertEqual(batch["attention_mask"].tolist(), [[0, 1, 1, 0], [0, 0, 1, 1]])
+
+    def test_apply_chat_template_incremental(self):
+        vocab_tokens = ["[UNK]", "[CLS]", "[SEP]", "[PAD]", "[MASK]", "user", "assistant", "hello", "world"]
+        tokenizer = self.get_bert_tokenizer(vocab_tokens, additional_special_tokens=["<|im_start|>", "<|im_end|>"])
+        tokenizer.chat_template = (
+            "{% for message in messages %}"
+            "{{'<|im_start|>' + message['role'] + '\n' + message['content'] + '<|im_end|>' + '\n'}}"
+            "{% endfor %}"
+            "{% if add_generation_prompt %}"
+            "{{ '<|im_start|>assistant\n' }}"
+            "{% endif %}"
+        )
+
+        conversation = []
+        for content in ["hello", "hello world", "world hello", "hello hello"]:
+            role = "user" if len(conversation) % 2 == 0 else "assistant"
+            conversation.append({"role": role, "content": content})
+            for add_generation_prompt in [False, True]:
+                input_ids = tokenizer.apply_chat_template(
+                    conversation, add_generation_prompt=add_generation_prompt, incremental=True
+                )
+                self.assertEqual(
+                    input_ids,
+                    tokenizer.apply_chat_template(conversation, add_generation_prompt=add_generation_prompt),
+                )
+            # Modifying the returned ids does not change the cached ones
+            input_ids.append(tokenizer.pad_token_id)
+
+        # Only the new messages are tokenized
+        with mock.patch.object(tokenizer, "encode", wraps=tokenizer.encode) as mock_encode:
+            tokenizer.apply_chat_template(conversation + [{"role": "user", "content": "world"}], incremental=True)
+        mock_encode.assert_called_once_with("<|im_start|>user\nworld<|im_end|>\n", add_special_tokens=False)
+
+        with self.assertRaises(ValueError):
+            tokenizer.apply_chat_template(conversation, incremental=True, padding=True)
+
+    def test_apply_chat_template_incremental_single_word(self):
+        vocab_tokens = ["[UNK]", "[CLS]", "[SEP]", "[PAD]", "[MASK]", "user", "hello", "world", "[", "]", "end"]
+        end_token = AddedToken("[END]", single_word=True)
+        tokenizer = self.get_bert_tokenizer(vocab_tokens, additional_special_tokens=[end_token])
+        tokenizer.chat_template = "{% for message in messages %}{{ '[END] ' + message['content'] }}{% endfor %}"
+
+        # "[END]" is not split out of "hello[END] world", so "hello" can't be tokenized on its own
+        conversation = [{"role": "user", "content": "hello"}, {"role": "user", "content": "world"}]
+        for i in range(len(conversation)):
+            self.assertEqual(
+                tokenizer.apply_chat_template(conversation[: i + 1], incremental=True),
+                tokenizer.apply_chat_template(conversation[: i + 1]),
+            )
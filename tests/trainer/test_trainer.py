@@ -1365,6 +1365,29 @@ class TrainerIntegrationTest(TestCasePlus, TrainerIntegrationCommon):
             self.assertTrue(np.array_equal(2 * expected + 1, seen[: expected.shape[0]]))
             self.assertTrue(np.all(seen[expected.shape[0] :] == -100))
 
+        # Same tests with the predictions and labels written to disk
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            args = TrainingArguments("./regression", eval_accumulation_steps=2, eval_spill_dir=tmp_dir)
+            trainer = Trainer(model, args, eval_dataset=eval_dataset)
+
+            preds = trainer.predict(eval_dataset)
+            self.assertIsInstance(preds.predictions, np.memmap)
+            self.assertIsInstance(preds.label_ids, np.memmap)
+            for expected, seen in zip(eval_dataset.ys, preds.label_ids):
+                self.assertTrue(np.array_equal(expected, seen[: expected.shape[0]]))
+                self.assertTrue(np.all(seen[expected.shape[0] :] == -100))
+
+            for expected, seen in zip(eval_dataset.xs, preds.predictions):
+                self.assertTrue(np.array_equal(2 * expected + 1, seen[: expected.shape[0]]))
+                self.assertTrue(np.all(seen[expected.shape[0] :] == -100))
+
+            # No files are left once the evaluations are done
+            trainer.evaluate()
+            self.assertEqual(os.listdir(tmp_dir), [])
+
+            with self.assertRaises(ValueError):
+                TrainingArguments("./regression", eval_spill_dir=tmp_dir, use_legacy_prediction_loop=True)
+
     def test_log_level(self):
         # testing only --log_level (--log_level_replica requires multiple gpus and DDP and is tested elsewhere)
         logger = logging.get_logger()
@@ -1406,6 +1429,42 @@ class TrainerIntegrationTest(TestCasePlus, TrainerIntegrationCommon):
             trainer.train()
             self.check_saved_checkpoints(tmpdir, 5, int(self.n_epochs * 64 / self.batch_size), False)
 
+    def test_save_checkpoints_async(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            trainer = get_regression_trainer(output_dir=tmpdir, train_len=128, save_steps=5, save_async=True)
+            trainer.train()
+            (a, b) = trainer.model.a.item(), trainer.model.b.item()
+            self.check_saved_checkpoints(tmpdir, 5, int(self.n_epochs * 128 / self.batch_size))
+            self.assertFalse(any(name.startswith("tmp-") for name in os.listdir(tmpdir)))
+
+            # The checkpoints can be used to resume training
+            trainer = get_regression_trainer(output_dir=tmpdir, train_len=128, save_steps=5, save_async=True)
+            trainer.train(resume_from_checkpoint=os.path.join(tmpdir, "checkpoint-5"))
+            self.assertEqual((a, b), (trainer.model.a.item(), trainer.model.b.item()))
+
+    @require_safetensors
+    def test_save_delta_checkpoints(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            kwargs = {"output_dir": tmpdir, "train_len": 128, "save_steps": 5, "save_delta_checkpoints": True}
+            trainer = get_regression_trainer(save_total_limit=2, **kwargs)
+            trainer.model.b.requires_grad_(False)
+            trainer.train()
+            (a, b) = trainer.model.a.item(), trainer.model.b.item()
+
+            # The first checkpoint is kept since the last ones read the frozen weights from it
+            last_step = (int(self.n_epochs * 128 / self.batch_size) // 5) * 5
+            checkpoints = [f"checkpoint-{step}" for step in (5, last_step - 5, last_step)]
+            self.assertEqual(sorted(os.listdir(tmpdir)), sorted(checkpoints))
+            with open(os.path.join(tmpdir, checkpoints[1], SAFE_WEIGHTS_INDEX_NAME)) as f:
+                weight_map = json.load(f)["weight_map"]
+            self.assertEqual(weight_map["b"], os.path.join("..", "checkpoint-5", SAFE_WEIGHTS_NAME))
+            self.assertEqual(weight_map["a"], "model-00001-of-00001.safetensors")
+
+            trainer = get_regression_trainer(**kwargs)
+            trainer.model.b.requires_grad_(False)
+            trainer.train(resume_from_checkpoint=os.path.join(tmpdir, checkpoints[1]))
+            self.assertEqual((a, b), (trainer.model.a.item(), trainer.model.b.item()))
+
     def test_save_checkpoints_is_atomic(self):
         class UnsaveableTokenizer(PreTrainedTokenizerBase):
             def save_pretrained(self, *args, **kwargs):
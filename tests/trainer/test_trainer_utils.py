@@ -14,6 +14,9 @@
 # limitations under the License.
 
 import copy
+import glob
+import os
+import tempfile
 import unittest
 
 import numpy as np
@@ -35,12 +38,15 @@ if is_torch_available():
         DistributedLengthGroupedSampler,
         DistributedSamplerWithLoop,
         DistributedTensorGatherer,
+        EvalLoopContainer,
         IterableDatasetShard,
         LabelSmoother,
         LengthGroupedSampler,
         SequentialDistributedSampler,
         ShardSampler,
         get_parameter_names,
+        nested_concat,
+        nested_numpify,
         numpy_pad_and_concatenate,
         torch_pad_and_concatenate,
     )
@@ -473,6 +479,53 @@ class TrainerUtilsTest(unittest.TestCase):
         result = torch_pad_and_concatenate(tensor1, tensor2)
         self.assertTrue(torch.equal(result, torch.Tensor([1.0, 2.0])))
 
+    def test_eval_loop_container(self):
+        # Nested outputs, with sequence lengths increasing and decreasing between the steps
+        steps = [
+            (torch.randn(2, 3 + i), (torch.arange(2.0), {"a": torch.randint(10, (2, 5 - i, 2))})) for i in range(5)
+        ]
+        expected = steps[0]
+        for step in steps[1:]:
+            expected = nested_concat(expected, step, padding_index=-100)
+        self.assertIsNone(EvalLoopContainer().get_tensors())
+
+        container = EvalLoopContainer()
+        for step in steps:
+            container.add(step)
+        tensors = container.get_tensors()
+        self.assertTrue(torch.equal(tensors[0], expected[0]))
+        self.assertTrue(torch.equal(tensors[1][0], expected[1][0]))
+        self.assertTrue(torch.equal(tensors[1][1]["a"], expected[1][1]["a"]))
+        self.assertIsNone(container.get_tensors())
+
+        expected = nested_numpify(expected)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for spill_dir in [None, tmp_dir]:
+                container = EvalLoopContainer(spill_dir=spill_dir)
+                for i, step in enumerate(steps):
+                    container.add(step)
+                    if i % 2 == 1:
+                        container.to_cpu_and_numpy()
+                arrays = container.get_arrays()
+                self.assertIsInstance(arrays, tuple)
+                self.assertIsInstance(arrays[1], tuple)
+                self.assertIsInstance(arrays[1][1], dict)
+                self.assertTrue(np.array_equal(arrays[0], expected[0]))
+                self.assertTrue(np.array_equal(arrays[1][0], expected[1][0]))
+                self.assertTrue(np.array_equal(arrays[1][1]["a"], expected[1][1]["a"]))
+                self.assertEqual(isinstance(arrays[0], np.memmap), spill_dir is not None)
+
+                # Only the files of the concatenated arrays are left
+                spill_files = glob.glob(os.path.join(tmp_dir, "*", "*.npy"))
+                self.assertEqual(len(spill_files), 3 if spill_dir is not None else 0)
+
+                # They can still be read once their folder is removed
+                container.remove_spill_folder()
+                self.assertEqual(os.listdir(tmp_dir), [])
+                self.assertTrue(np.array_equal(arrays[0], expected[0]))
+
+        self.assertIsNone(EvalLoopContainer().get_arrays())
+
     def test_remove_columns_collator(self):
         class MockLogger:
             def __init__(self) -> None:
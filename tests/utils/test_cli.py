@@ -15,6 +15,7 @@
 
 import os
 import shutil
+import tempfile
 import unittest
 from unittest.mock import patch
 
@@ -33,6 +34,21 @@ class CLITest(unittest.TestCase):
         self.assertIn("Platform", cs.out)
         self.assertIn("Using distributed or parallel set-up in script?", cs.out)
 
+    @require_torch
+    def test_cli_convert_to_safetensors(self):
+        import transformers.commands.transformers_cli
+        from transformers import BertConfig, BertModel
+
+        config = BertConfig(
+            vocab_size=99, hidden_size=32, num_hidden_layers=2, num_attention_heads=4, intermediate_size=37
+        )
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            BertModel(config).save_pretrained(tmp_dir, safe_serialization=False)
+            with patch("sys.argv", ["fakeprogrampath", "convert-to-safetensors", tmp_dir]), CaptureStd() as cs:
+                transformers.commands.transformers_cli.main()
+            self.assertIn(os.path.join(tmp_dir, "model.safetensors"), cs.out)
+            self.assertTrue(os.path.isfile(os.path.join(tmp_dir, "model.safetensors")))
+
     @is_pt_tf_cross_test
     @patch(
         "sys.argv", ["fakeprogrampath", "pt-to-tf", "--model-name", "hf-internal-testing/tiny-random-gptj", "--no-pr"]
@@ -91,13 +91,76 @@ class GetFromCacheTests(unittest.TestCase):
         response_mock.raise_for_status.side_effect = HTTPError
         response_mock.json.return_value = {}
 
-        # Under the mock environment we get a 500 error when trying to reach the tokenizer.
-        with mock.patch("requests.Session.request", return_value=response_mock) as mock_head:
+        # Under the mock environment we get a 500 error when trying to reach the tokenizer (the list of files of the
+        # repo fetched above would otherwise answer without any request).
+        with mock.patch("requests.Session.request", return_value=response_mock) as mock_head, mock.patch(
+            "transformers.utils.hub.RESOLUTION_MANIFEST_TTL", 0
+        ):
             path = cached_file(RANDOM_BERT, "conf", _raise_exceptions_for_connection_errors=False)
             self.assertIsNone(path)
             # This check we did call the fake head request
             mock_head.assert_called()
 
+    def test_resolution_manifest(self):
+        commit_hash = "a" * 40
+        repo_info = mock.Mock(sha=commit_hash, siblings=[mock.Mock(rfilename=CONFIG_NAME)])
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache_dir = os.path.join(tmp_dir, "hub")
+            snapshot_dir = os.path.join(cache_dir, "models--user--model", "snapshots", commit_hash)
+            os.makedirs(snapshot_dir)
+            Path(snapshot_dir, CONFIG_NAME).touch()
+
+            manifests, resolved_files = {}, {}
+            mock_download = mock.Mock(side_effect=AssertionError)
+            with mock.patch.multiple(
+                "transformers.utils.hub",
+                RESOLUTION_MANIFESTS_CACHE=os.path.join(tmp_dir, "manifests"),
+                _resolution_manifests=manifests,
+                _resolved_files=resolved_files,
+                hf_hub_download=mock_download,
+                _is_offline_mode=False,
+            ), mock.patch("transformers.utils.hub.HfApi.repo_info", return_value=repo_info) as mock_repo_info:
+                resolved_file = cached_file("user/model", CONFIG_NAME, cache_dir=cache_dir)
+                self.assertEqual(resolved_file, os.path.join(snapshot_dir, CONFIG_NAME))
+
+                # Missing files are known from the list of files and cached like the Hub does.
+                with self.assertRaisesRegex(EnvironmentError, "does not appear to have a file named"):
+                    cached_file("user/model", "tokenizer.json", cache_dir=cache_dir)
+                path = cached_file(
+                    "user/model", "tokenizer.json", cache_dir=cache_dir, _raise_exceptions_for_missing_entries=False
+                )
+                self.assertIsNone(path)
+                self.assertTrue(
+                    os.path.isfile(
+                        os.path.join(cache_dir, "models--user--model", ".no_exist", commit_hash, "tokenizer.json")
+                    )
+                )
+                with open(os.path.join(cache_dir, "models--user--model", "refs", "main")) as f:
+                    self.assertEqual(f.read(), commit_hash)
+                self.assertEqual(mock_repo_info.call_count, 1)
+
+                # Other processes use the manifest saved on disk.
+                manifests.clear()
+                resolved_files.clear()
+                self.assertEqual(cached_file("user/model", CONFIG_NAME, cache_dir=cache_dir), resolved_file)
+                path = cached_file(
+                    "user/model",
+                    "tokenizer.json",
+                    cache_dir=cache_dir,
+                    _commit_hash=commit_hash,
+                    _raise_exceptions_for_missing_entries=False,
+                )
+                self.assertIsNone(path)
+                self.assertEqual(mock_repo_info.call_count, 1)
+                mock_download.assert_not_called()
+
+                # Expired manifests of branches are fetched again.
+                with mock.patch("transformers.utils.hub.RESOLUTION_MANIFEST_TTL", 1e-6):
+                    manifests.clear()
+                    cached_file("user/model", CONFIG_NAME, cache_dir=cache_dir)
+                    self.assertEqual(mock_repo_info.call_count, 2)
+
     def test_has_file(self):
         self.assertTrue(has_file("hf-internal-testing/tiny-bert-pt-only", WEIGHTS_NAME))
         self.assertFalse(has_file("hf-internal-testing/tiny-bert-pt-only", TF2_WEIGHTS_NAME))
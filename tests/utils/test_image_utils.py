@@ -35,8 +35,8 @@ if is_torch_available():
 if is_vision_available():
     import PIL.Image
 
-    from transformers import ImageFeatureExtractionMixin
-    from transformers.image_utils import get_image_size, infer_channel_dimension_format, load_image
+    from transformers import ImageFeatureExtractionMixin, ViTImageProcessor
+    from transformers.image_utils import ImagePrefetcher, get_image_size, infer_channel_dimension_format, load_image
 
 
 def get_random_image(height, width):
@@ -597,6 +597,75 @@ class LoadImageTester(unittest.TestCase):
             (500, 333, 3),
         )
 
+    def test_load_img_draft_size(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            tmp_file = os.path.join(tmp_dir, "image.jpg")
+            PIL.Image.new("RGB", (640, 480), color=(255, 0, 0)).save(tmp_file)
+
+            self.assertEqual(load_image(tmp_file).size, (640, 480))
+            # The smallest scale with both sides larger than 200 is 1/2
+            self.assertEqual(load_image(tmp_file, draft_size=200).size, (320, 240))
+            self.assertEqual(load_image(tmp_file, draft_size=100).size, (160, 120))
+
+            # Draft mode only applies to JPEG files
+            png_file = os.path.join(tmp_dir, "image.png")
+            PIL.Image.new("RGB", (640, 480), color=(255, 0, 0)).save(png_file)
+            self.assertEqual(load_image(png_file, draft_size=100).size, (640, 480))
+
+
+@require_vision
+class ImagePrefetcherTester(unittest.TestCase):
+    def test_prefetch_in_order(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            images = []
+            for i in range(10):
+                tmp_file = os.path.join(tmp_dir, f"{i}.png")
+                PIL.Image.new("RGB", (10 + i, 10), color=(i, 0, 0)).save(tmp_file)
+                images.append(tmp_file)
+            pil_image = PIL.Image.new("RGB", (5, 5))
+            images.append(pil_image)
+
+            prefetcher = ImagePrefetcher(num_workers=3, max_prefetch=2)
+            loaded = list(prefetcher(iter(images)))
+            self.assertEqual([image.size for image in loaded[:-1]], [(10 + i, 10) for i in range(10)])
+            self.assertIs(loaded[-1], pil_image)
+
+    def test_prefetch_errors(self):
+        prefetcher = ImagePrefetcher(num_workers=2)
+        iterator = prefetcher(["./tests/fixtures/tests_samples/COCO/000000039769.png", "not an image"])
+        self.assertEqual(next(iterator).size, (640, 480))
+        with self.assertRaises(ValueError):
+            next(iterator)
+
+    def test_cache(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            images = []
+            for i in range(3):
+                tmp_file = os.path.join(tmp_dir, f"{i}.png")
+                PIL.Image.new("RGB", (10 + i, 10)).save(tmp_file)
+                images.append(tmp_file)
+
+            prefetcher = ImagePrefetcher(cache_size=2)
+            first = prefetcher.load(images[0])
+            self.assertIs(prefetcher.load(images[0]), first)
+            prefetcher.load(images[1])
+            prefetcher.load(images[2])
+            # The least recently used image was evicted
+            self.assertIsNot(prefetcher.load(images[0]), first)
+            self.assertEqual(len(prefetcher._cache), 2)
+
+            # Modified files are loaded again
+            second = prefetcher.load(images[0])
+            stat = os.stat(images[0])
+            os.utime(images[0], ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+            self.assertIsNot(prefetcher.load(images[0]), second)
+
+    def test_from_image_processor(self):
+        image_processor = ViTImageProcessor(size={"height": 224, "width": 200})
+        self.assertEqual(ImagePrefetcher.from_image_processor(image_processor).draft_size, 224)
+        image_processor = ViTImageProcessor(do_resize=False)
+        self.assertIsNone(ImagePrefetcher.from_image_processor(image_processor).draft_size)
+
 
 class UtilFunctionTester(unittest.TestCase):
     def test_get_image_size(self):